@@ -4,6 +4,7 @@ from config import SQLALCHEMY_DATABASE_URI
 from .models.strategy_select import Base, StrategySelect
 from .repositories.strategy_select_repository import StrategySelectRepository
 from .repositories.base_repository import BaseRepository
+from .migrations import migrate
 
 # 创建数据库引擎
 engine = create_engine(
@@ -23,8 +24,10 @@ SessionLocal = scoped_session(
 )
 
 def init_db():
-    """初始化数据库"""
-    Base.metadata.create_all(bind=engine)
+    """初始化数据库，已有的数据库会补齐缺失的索引"""
+    created = migrate(engine)
+    if created:
+        print(f"Created indexes: {', '.join(created)}")
 
 def get_db():
     """获取数据库会话"""
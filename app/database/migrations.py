@@ -0,0 +1,59 @@
+from sqlalchemy import inspect, select, update, delete, func
+from .models.strategy_select import Base, StrategySelect
+
+
+def merge_duplicate_selects(conn):
+    """
+    合并同一天、同一股票、同一策略的重复记录，保留 id 最小的一条。
+    合并后的 update_count 与逐条写入时的计数一致：原有次数之和加上多出的记录数。
+
+    :return: 删除的记录数
+    """
+    table = StrategySelect.__table__
+    groups = conn.execute(
+        select(table.c.date, table.c.symbol, table.c.strategy)
+        .group_by(table.c.date, table.c.symbol, table.c.strategy)
+        .having(func.count() > 1)
+    ).all()
+
+    removed = 0
+    for date, symbol, strategy in groups:
+        rows = conn.execute(
+            select(table.c.id, table.c.update_count, table.c.last_trade_time)
+            .where(table.c.date == date, table.c.symbol == symbol, table.c.strategy == strategy)
+            .order_by(table.c.id)
+        ).all()
+        keep = rows[0]
+        trade_times = [row.last_trade_time for row in rows if row.last_trade_time is not None]
+        conn.execute(
+            update(table).where(table.c.id == keep.id).values(
+                update_count=sum(row.update_count or 0 for row in rows) + len(rows) - 1,
+                last_trade_time=max(trade_times) if trade_times else None,
+            )
+        )
+        conn.execute(delete(table).where(table.c.id.in_([row.id for row in rows[1:]])))
+        removed += len(rows) - 1
+    return removed
+
+
+def migrate(engine):
+    """
+    把已有的 SQLite/MySQL 数据库升级到当前模型：建表并补齐缺失的索引。
+    可以重复执行，已存在的索引会跳过。
+
+    :return: 新建的索引名称列表
+    """
+    Base.metadata.create_all(bind=engine)
+    table = StrategySelect.__table__
+    created = []
+    with engine.begin() as conn:
+        existing = {index['name'] for index in inspect(conn).get_indexes(table.name)}
+        missing = [index for index in table.indexes if index.name not in existing]
+        if any(index.unique for index in missing):
+            removed = merge_duplicate_selects(conn)
+            if removed:
+                print(f"Merged {removed} duplicate strategy_select records")
+        for index in missing:
+            index.create(bind=conn)
+            created.append(index.name)
+    return created
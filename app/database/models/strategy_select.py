@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Enum, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -7,6 +7,12 @@ Base = declarative_base()
 class StrategySelect(Base):
     """策略选股记录表"""
     __tablename__ = 'strategy_select'
+    __table_args__ = (
+        # 每天每只股票每个策略只保留一条记录，同时覆盖 find_by_symbol_and_date 的查询
+        Index('uq_strategy_select_date_symbol_strategy', 'date', 'symbol', 'strategy', unique=True),
+        # 按天列出买入/卖出信号
+        Index('ix_strategy_select_date_action', 'date', 'action'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     date = Column(Date, nullable=False, comment='选股日期')
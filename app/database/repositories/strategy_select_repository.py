@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import insert, update, bindparam
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from .base_repository import BaseRepository
 from ..models.strategy_select import StrategySelect
 from event_trader.config import PRICE_COL
@@ -34,22 +36,119 @@ class StrategySelectRepository(BaseRepository):
         if existing_record:
             return self.update(existing_record)
         else:
-            strategy_select = StrategySelect(
-                date=today,
-                symbol=symbol,
-                idx=strategy_data.get('index', None),
-                strategy=strategy_data.get('name', ''),
-                action=strategy_data.get('status', ''),
-                price=strategy_data.get('factors', {}).get(PRICE_COL, 0),
-                last_trade_time=datetime.now(),
-                update_count=0,
-                strategy_info={
-                    'name': strategy_data.get('name', ''),
-                    'description': strategy_data.get('description', ''),
-                    'parameters': strategy_data.get('parameters', {}),
-                    'status': strategy_data.get('status', ''),
-                    'profit': strategy_data.get('profit', 0),
-                    'data': strategy_data.get('data', {})
-                }
-            )
+            strategy_select = StrategySelect(**self.build_record(symbol, strategy_data, today, datetime.now()))
             return self.create(strategy_select)
+
+    @staticmethod
+    def build_record(symbol: str, strategy_data: dict, date, now: datetime) -> dict:
+        """把策略结果转换为 strategy_select 表的列值"""
+        return {
+            'date': date,
+            'symbol': symbol,
+            'idx': strategy_data.get('index', None),
+            'strategy': strategy_data.get('name', ''),
+            'action': strategy_data.get('status', ''),
+            'price': strategy_data.get('factors', {}).get(PRICE_COL, 0),
+            'last_trade_time': now,
+            'update_count': 0,
+            'strategy_info': {
+                'name': strategy_data.get('name', ''),
+                'description': strategy_data.get('description', ''),
+                'parameters': strategy_data.get('parameters', {}),
+                'status': strategy_data.get('status', ''),
+                'profit': strategy_data.get('profit', 0),
+                'data': strategy_data.get('data', {})
+            }
+        }
+
+    def find_keys_by_date(self, date) -> dict:
+        """一次查询某天已有记录，返回 {(symbol, strategy): id}"""
+        rows = self.db.query(StrategySelect.id, StrategySelect.symbol, StrategySelect.strategy).filter(
+            StrategySelect.date == date
+        ).all()
+        return {(row.symbol, row.strategy): row.id for row in rows}
+
+    def save_strategy_selects(self, items):
+        """
+        批量保存或更新策略选股记录，与逐条调用 save_strategy_select 的结果相同，但只提交一次。
+        SQLite/PostgreSQL 使用 INSERT ... ON CONFLICT DO UPDATE，MySQL 使用 ON DUPLICATE KEY UPDATE，
+        依靠 (date, symbol, strategy) 唯一索引在一条语句中完成插入或更新，多个写入方并发写入同一条记录也不会冲突。
+        其他数据库按写入前已有的记录分别批量插入和更新，同样只提交一次。
+
+        :param items: (symbol, strategy_data) 的可迭代对象
+        :return: (新增条数, 更新条数)，按写入前已有的记录估算，只用于日志
+        """
+        today = datetime.now().date()
+        now = datetime.now()
+        records = {}
+        for symbol, strategy_data in items:
+            key = (symbol, strategy_data.get('name', ''))
+            if key in records:
+                # 同一批次中重复出现，等同于插入后再更新
+                records[key]['update_count'] += 1
+            else:
+                records[key] = self.build_record(symbol, strategy_data, today, now)
+        if not records:
+            return 0, 0
+
+        existing = self.find_keys_by_date(today)
+        updated = sum(1 for key in records if key in existing)
+        statement = self.upsert_statement(self.db.get_bind().dialect.name)
+        try:
+            if statement is not None:
+                self.db.execute(statement, list(records.values()))
+            else:
+                self.insert_or_update(records, existing, now)
+        except Exception:
+            self.db.rollback()
+            raise
+        self.commit()
+        return len(records) - updated, updated
+
+    @staticmethod
+    def upsert_statement(dialect: str):
+        """
+        按数据库方言生成插入或更新的语句。
+        已有记录只更新 last_trade_time 和 update_count：批次中出现 k 次的记录插入值为 k-1，冲突时加上 k。
+
+        :param dialect: engine.dialect.name
+        :return: 不支持的方言返回 None
+        """
+        table = StrategySelect.__table__
+        if dialect == 'mysql':
+            statement = mysql.insert(table)
+            return statement.on_duplicate_key_update(
+                last_trade_time=statement.inserted.last_trade_time,
+                update_count=table.c.update_count + statement.inserted.update_count + 1,
+            )
+        if dialect in ('sqlite', 'postgresql'):
+            statement = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+            return statement.on_conflict_do_update(
+                index_elements=[table.c.date, table.c.symbol, table.c.strategy],
+                set_={
+                    'last_trade_time': statement.excluded.last_trade_time,
+                    'update_count': table.c.update_count + statement.excluded.update_count + 1,
+                },
+            )
+        return None
+
+    def insert_or_update(self, records: dict, existing: dict, now: datetime):
+        """
+        不支持 upsert 的数据库：新记录批量插入，已有记录按 id 批量更新，由调用方提交。
+
+        :param records: {(symbol, strategy): 列值}，update_count 为批次中重复出现的次数
+        :param existing: find_keys_by_date 的返回值
+        """
+        inserts = [record for key, record in records.items() if key not in existing]
+        updates = [{'record_id': existing[key], 'increment': record['update_count'] + 1}
+                   for key, record in records.items() if key in existing]
+        if inserts:
+            self.db.execute(insert(StrategySelect), inserts)
+        if updates:
+            table = StrategySelect.__table__
+            self.db.execute(
+                update(table)
+                .where(table.c.id == bindparam('record_id'))
+                .values(last_trade_time=now, update_count=table.c.update_count + bindparam('increment')),
+                updates
+            )
@@ -1,8 +1,11 @@
 
 from .database import SessionLocal
 from .database.repositories.strategy_select_repository import StrategySelectRepository
+from .write_behind import WriteBehindQueue
+from event_trader.instrumentation import timed
 
 
+@timed('persist', 'save_trade_records')
 def save_trade_records(df, symbol, market):
     """保存策略选股记录到数据库"""
     with SessionLocal() as db:
@@ -10,16 +13,42 @@ def save_trade_records(df, symbol, market):
         try:
             for _, row in df.iterrows():
                 if row['status'] in ['Buy', 'Sell']:
-                    strategy_data = {
-                        'index': market.index,
-                        'name': row.get('name', ''),
-                        'status': row['status'],
-                        'row': row.get('row', {}),
-                        'description': row.get('description', ''),
-                        'parameters': row.get('parameters', {}),
-                        'profit': row.get('profit', 0),
-                        'factors': row.get('factors', {})
-                    }
-                    repository.save_strategy_select(symbol, strategy_data)
+                    repository.save_strategy_select(symbol, build_strategy_data(row, market))
         except Exception as e:
-            print(f"Error saving strategy select record: {e}")
\ No newline at end of file
+            print(f"Error saving strategy select record: {e}")
+
+
+def build_strategy_data(row, market):
+    return {
+        'index': market.index,
+        'name': row.get('name', ''),
+        'status': row['status'],
+        'row': row.get('row', {}),
+        'description': row.get('description', ''),
+        'parameters': row.get('parameters', {}),
+        'profit': row.get('profit', 0),
+        'factors': row.get('factors', {})
+    }
+
+
+@timed('persist', 'write_strategy_selects')
+def write_strategy_selects(items):
+    """写入一个批次的 (symbol, strategy_data)，供 WriteBehindQueue 的写入线程调用"""
+    with SessionLocal() as db:
+        inserted, updated = StrategySelectRepository(db).save_strategy_selects(items)
+    print(f"Saved strategy select records: {inserted} inserted, {updated} updated")
+
+
+def strategy_select_writer(**kwargs):
+    """创建写入 strategy_select 表的异步队列，参数同 WriteBehindQueue"""
+    return WriteBehindQueue(write_strategy_selects, name='strategy-select-writer', **kwargs)
+
+
+def queue_trade_records(writer: WriteBehindQueue):
+    """
+    返回 StocksManager 的单股回调：把 Buy/Sell 记录放入写入队列后立即返回，计算线程不等待数据库。
+    """
+    def callback(df, symbol, market):
+        selected = df[df['status'].isin(['Buy', 'Sell'])]
+        writer.put_many((symbol, build_strategy_data(row, market)) for row in selected.to_dict('records'))
+    return callback
@@ -0,0 +1,114 @@
+import threading
+from datetime import datetime, timedelta, time as dt_time
+from china_stock_data import TradingTimeChecker
+
+# A股连续竞价时段
+TRADING_SESSIONS = [
+    (dt_time(9, 30), dt_time(11, 30)),
+    (dt_time(13, 0), dt_time(15, 0)),
+]
+
+
+def is_trading_time(moment: datetime) -> bool:
+    return TradingTimeChecker.is_trading_time(moment.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+class TradingScheduler:
+    """
+    常驻进程内的调度器：在交易时段内按固定间隔执行任务，间隔从每个时段的开盘时刻对齐，
+    休市期间直接睡到下一个时段开盘。
+    """
+    def __init__(self, job, interval_minutes=10, sessions=None, is_open=is_trading_time, clock=datetime.now, sleep=None):
+        """
+        :param job: 每个周期执行的无参数函数
+        :param interval_minutes: 周期间隔（分钟）
+        :param sessions: 交易时段列表 [(开始, 结束)]，默认为 A 股时段
+        :param is_open: 判断某一时刻是否为交易时间，用于排除节假日
+        :param clock: 获取当前时间的函数
+        :param sleep: 等待指定秒数的函数，默认在等待期间可被 stop() 打断
+        """
+        self.job = job
+        self.interval = timedelta(minutes=interval_minutes)
+        self.sessions = sessions or TRADING_SESSIONS
+        self.is_open = is_open
+        self.clock = clock
+        self.sleep = sleep
+        self.cycles = 0
+        self._stop = threading.Event()
+
+    def next_run(self, now: datetime) -> datetime:
+        """返回 now 之后（含 now）最近的一个对齐到交易时段的执行时刻"""
+        day = now.date()
+        while True:
+            for start, end in self.sessions:
+                session_start = datetime.combine(day, start)
+                session_end = datetime.combine(day, end)
+                if now <= session_start:
+                    return session_start
+                if now <= session_end:
+                    steps = -(-(now - session_start) // self.interval)
+                    moment = session_start + steps * self.interval
+                    if moment <= session_end:
+                        return moment
+            day += timedelta(days=1)
+            now = datetime.combine(day, dt_time(0, 0))
+
+    def run_once(self):
+        try:
+            self.job()
+        except Exception as e:
+            print(f"Error running scheduled job: {e}")
+        self.cycles += 1
+
+    def run(self, max_cycles=None):
+        """
+        阻塞运行，直到调用 stop() 或执行了 max_cycles 个周期。
+        """
+        while not self._stop.is_set():
+            moment = self.next_run(self.clock())
+            wait = (moment - self.clock()).total_seconds()
+            if wait > 0 and self._wait(wait):
+                break
+            if self.is_open(moment):
+                self.run_once()
+                if max_cycles is not None and self.cycles >= max_cycles:
+                    break
+            # 避免同一时刻重复执行
+            if self.clock() < moment + timedelta(seconds=1):
+                if self._wait((moment + timedelta(seconds=1) - self.clock()).total_seconds()):
+                    break
+
+    def _wait(self, seconds):
+        """等待 seconds 秒，返回是否已被要求停止"""
+        if self.sleep is None:
+            return self._stop.wait(seconds)
+        self.sleep(seconds)
+        return self._stop.is_set()
+
+    def stop(self):
+        self._stop.set()
+
+
+class TradingDayCache:
+    """
+    常驻进程内按交易日缓存的对象。StockData 在创建时确定 end_date，跨日继续使用会一直请求创建当天为止的K线，
+    因此日期变化后丢弃前一天创建的全部对象，由 factory 按新的日期重新创建。
+    """
+    def __init__(self, factory, clock=datetime.now):
+        """
+        :param factory: factory(key, day) 创建对象，day 为 'YYYY-MM-DD' 格式的当前日期
+        :param clock: 获取当前时间的函数
+        """
+        self.factory = factory
+        self.clock = clock
+        self.day = None
+        self.items = {}
+
+    def get(self, key):
+        day = self.clock().strftime('%Y-%m-%d')
+        if day != self.day:
+            self.day = day
+            self.items = {}
+        if key not in self.items:
+            self.items[key] = self.factory(key, day)
+        return self.items[key]
@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    异步写入队列：计算线程只把记录放入有界队列，由专门的写入线程按批次写库。
+    批次在攒够 max_batch 条或距第一条记录超过 max_delay 秒时写出；
+    写库变慢导致队列写满时 put 会阻塞，对计算线程形成背压。
+    """
+    def __init__(self, write, max_batch=500, max_delay=1.0, maxsize=10000, name='write-behind'):
+        """
+        :param write: 写入函数，以一个批次的记录列表调用 write(records)
+        :param max_batch: 每批最多的记录数
+        :param max_delay: 一批记录最长的等待时间（秒）
+        :param maxsize: 队列最多积压的记录数，0 表示不限制
+        """
+        self.write = write
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, record, timeout=None):
+        """
+        放入一条记录，队列已满时最多等待 timeout 秒。
+
+        :raises queue.Full: 等待超时
+        """
+        if self._closed:
+            raise RuntimeError("WriteBehindQueue is closed")
+        self._queue.put(record, timeout=timeout)
+
+    def put_many(self, records, timeout=None):
+        for record in records:
+            self.put(record, timeout=timeout)
+
+    def join(self):
+        """等待已放入的记录全部写出"""
+        self._queue.join()
+
+    def close(self):
+        """不再接收新记录，写出剩余的记录后结束写入线程，可以重复调用"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            record = self._queue.get()
+            if record is _STOP:
+                self._queue.task_done()
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(record)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            self.write(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Error writing {len(batch)} records: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
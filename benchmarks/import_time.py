@@ -0,0 +1,70 @@
+"""
+测量无界面启动（main.py start、进程池子进程）时 import event_trader 的耗时，
+并与同时加载绘图依赖的情况（绘图依赖改为延迟导入之前的行为）对比。
+
+用法: python benchmarks/import_time.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    'headless': 'import event_trader',
+    'with_plotting': 'import event_trader, matplotlib.pyplot, mplfinance',
+}
+
+SNIPPET = '''
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+loaded = any(name.split('.')[0] in ('matplotlib', 'mplfinance') for name in sys.modules)
+print(elapsed, loaded)
+'''
+
+
+def measure(code, runs):
+    """在全新的解释器中导入，返回每次的耗时（秒）和是否加载了绘图依赖"""
+    timings = []
+    loaded = False
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', SNIPPET.format(code=code)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(output[0]))
+        loaded = output[1] == 'True'
+    return timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', dest='json_path', help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in CASES.items():
+        timings, loaded = measure(code, args.runs)
+        results[name] = {
+            'median': statistics.median(timings),
+            'min': min(timings),
+            'plotting_loaded': loaded,
+        }
+        print(f"{name:<15} median {results[name]['median'] * 1000:8.1f} ms  "
+              f"min {results[name]['min'] * 1000:8.1f} ms  plotting loaded: {loaded}")
+
+    saved = results['with_plotting']['median'] - results['headless']['median']
+    print(f"headless startup saves {saved * 1000:.1f} ms per process")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
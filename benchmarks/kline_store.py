@@ -0,0 +1,69 @@
+"""
+对比从 CSV（china_stock_data 的缓存格式）和本地列存储（内存映射）加载多只股票K线的耗时。
+
+用法: python benchmarks/kline_store.py --symbols 900 --days 360
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from event_trader.kline_store import KlineStore  # noqa: E402
+from tests.helpers import make_kline  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=900)
+    parser.add_argument('--days', type=int, default=360)
+    parser.add_argument('--json', dest='json_path', help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    symbols = [f"{600000 + i:06d}" for i in range(args.symbols)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = KlineStore(os.path.join(tmp, 'klines'))
+        csv_dir = os.path.join(tmp, 'csv')
+        os.makedirs(csv_dir)
+        for i, symbol in enumerate(symbols):
+            kline = make_kline(symbol, args.days, seed=i)
+            kline.to_csv(os.path.join(csv_dir, f'{symbol}.csv'), index=False)
+            store.write(symbol, kline)
+
+        start = time.perf_counter()
+        for symbol in symbols:
+            pd.read_csv(os.path.join(csv_dir, f'{symbol}.csv'))
+        csv_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for symbol in symbols:
+            store.read(symbol)
+        store_seconds = time.perf_counter() - start
+
+        update = make_kline(symbols[0], args.days + 1, seed=0)
+        start = time.perf_counter()
+        store.append(symbols[0], update)
+        append_seconds = time.perf_counter() - start
+
+    results = {
+        'symbols': args.symbols,
+        'csv_seconds': csv_seconds,
+        'store_seconds': store_seconds,
+        'append_one_bar_ms': append_seconds * 1000,
+    }
+    print(f"csv   load {args.symbols} symbols: {csv_seconds:.3f} s")
+    print(f"store load {args.symbols} symbols: {store_seconds:.3f} s ({csv_seconds / store_seconds:.1f}x)")
+    print(f"append one bar: {results['append_one_bar_ms']:.2f} ms")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+对比逐只股票计算（StockInfo.get_result）与面板模式（panel_result）处理整个指数的耗时。
+
+用法: python benchmarks/panel.py --symbols 300 --days 360
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from event_trader.panel import panel_result  # noqa: E402
+from event_trader.stock_info import StockInfo  # noqa: E402
+from tests.helpers import SyntheticStockData, make_kline  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--days', type=int, default=360)
+    parser.add_argument('--json', dest='json_path', help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    klines = {f"{600000 + i:06d}": make_kline(f"{600000 + i:06d}", args.days, seed=i) for i in range(args.symbols)}
+
+    start = time.perf_counter()
+    for symbol, kline in klines.items():
+        stock_data = SyntheticStockData(symbol, args.days)
+        stock_data.kline = kline.copy()
+        StockInfo(symbol, stock_data=stock_data).get_result()
+    per_symbol = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel_result(klines)
+    panel = time.perf_counter() - start
+
+    results = {'symbols': args.symbols, 'days': args.days, 'per_symbol_seconds': per_symbol, 'panel_seconds': panel}
+    print(f"per symbol: {per_symbol:.2f} s")
+    print(f"panel:      {panel:.2f} s ({per_symbol / panel:.1f}x)")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
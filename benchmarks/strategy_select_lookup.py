@@ -0,0 +1,120 @@
+"""
+在写入一年历史的 strategy_select 表上测量查询耗时，对比迁移前（无索引）和迁移后（复合索引）。
+查询包括 find_by_symbol_and_date 的单条查找和按天列出 Buy/Sell 信号。
+
+用法: python benchmarks/strategy_select_lookup.py --days 250 --symbols 300
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.database.migrations import migrate  # noqa: E402
+from app.database.models.strategy_select import Base, StrategySelect  # noqa: E402
+from app.database.repositories.strategy_select_repository import StrategySelectRepository  # noqa: E402
+
+STRATEGIES = ['ma1', 'ma2', 'boll', 'kdj', 'macd', 'vma', 'pd']
+
+
+def trading_days(count, end=date(2024, 12, 31)):
+    days = []
+    day = end
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def populate(engine, days, symbols, seed=0):
+    """每个交易日为每只股票的部分策略写入一条信号"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    with engine.begin() as conn:
+        for day in days:
+            rows = [
+                {'date': day, 'symbol': f"{600000 + s:06d}", 'idx': '000300', 'strategy': strategy,
+                 'action': rng.choice(('Buy', 'Sell')), 'price': 10.0, 'last_trade_time': now,
+                 'update_count': 0, 'strategy_info': {}}
+                for s in range(symbols) for strategy in STRATEGIES if rng.random() < 0.5
+            ]
+            conn.execute(insert(StrategySelect), rows)
+
+
+def time_queries(engine, days, symbols, lookups, seed=1):
+    rng = random.Random(seed)
+    table = StrategySelect.__table__
+    with Session(engine) as db:
+        repository = StrategySelectRepository(db)
+        point = []
+        for _ in range(lookups):
+            day = rng.choice(days)
+            symbol = f"{600000 + rng.randrange(symbols):06d}"
+            start = time.perf_counter()
+            repository.find_by_symbol_and_date(symbol, day, rng.choice(STRATEGIES))
+            point.append(time.perf_counter() - start)
+
+        listing = []
+        for _ in range(max(1, lookups // 10)):
+            day = rng.choice(days)
+            start = time.perf_counter()
+            db.execute(select(table).where(table.c.date == day, table.c.action == 'Buy')).all()
+            listing.append(time.perf_counter() - start)
+    return {
+        'lookup_median_ms': statistics.median(point) * 1000,
+        'daily_listing_median_ms': statistics.median(listing) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=250, help='交易日数，默认约一年')
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--lookups', type=int, default=500)
+    parser.add_argument('--json', dest='json_path', help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    days = trading_days(args.days)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        # 先按迁移前的结构建表：不带任何索引
+        table = StrategySelect.__table__
+        indexes = set(table.indexes)
+        table.indexes.clear()
+        Base.metadata.create_all(engine)
+        table.indexes.update(indexes)
+
+        populate(engine, days, args.symbols)
+        with Session(engine) as db:
+            rows = db.query(StrategySelect).count()
+        print(f"strategy_select rows: {rows}")
+
+        results = {'rows': rows, 'before': time_queries(engine, days, args.symbols, args.lookups)}
+        start = time.perf_counter()
+        migrate(engine)
+        results['migration_seconds'] = time.perf_counter() - start
+        results['after'] = time_queries(engine, days, args.symbols, args.lookups)
+        engine.dispose()
+
+    for name in ('before', 'after'):
+        print(f"{name:<7} lookup {results[name]['lookup_median_ms']:8.3f} ms  "
+              f"daily listing {results[name]['daily_listing_median_ms']:8.3f} ms")
+    print(f"migration took {results['migration_seconds']:.2f} s")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
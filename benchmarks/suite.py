@@ -0,0 +1,235 @@
+"""
+基准测试套件：在确定性的合成K线上测量各策略、参数寻优、模拟账户、整个指数的计算和 SQLite 持久化的耗时，
+不访问网络。每项记录多次运行的最小值、中位数、平均值和最大值，结果可以写入 JSON 并与之前的结果对比。
+
+用法:
+    python benchmarks/suite.py --json results.json
+    python benchmarks/suite.py --only strategy.kdj account --repeat 10
+    python benchmarks/suite.py --symbols 300 900 --json new.json --compare old.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.database.migrations import migrate  # noqa: E402
+from app.database.repositories.strategy_select_repository import StrategySelectRepository  # noqa: E402
+from event_trader.demo_account import DemoAccount, simulate_profits  # noqa: E402
+from event_trader.factor_cache import FactorCache  # noqa: E402
+from event_trader.search import RandomSearch  # noqa: E402
+from event_trader.stock_info import StockInfo  # noqa: E402
+from event_trader.stocks_manager import StocksManager  # noqa: E402
+from event_trader.strategies import STRATEGIES  # noqa: E402
+from tests.helpers import SyntheticStockData  # noqa: E402
+
+
+class Case:
+    """
+    一个基准项：每次运行前调用 setup()（不计时），然后计时调用 func()。
+    """
+    def __init__(self, name, func, setup=None, repeat=None):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.repeat = repeat
+
+    def run(self, repeat):
+        samples = []
+        for _ in range(self.repeat or repeat):
+            # 被测代码打印的寻优结果、阶段耗时等信息不输出
+            with contextlib.redirect_stdout(io.StringIO()):
+                if self.setup is not None:
+                    self.setup()
+                start = time.perf_counter()
+                self.func()
+                samples.append(time.perf_counter() - start)
+        return {
+            'repeat': len(samples),
+            'min': min(samples),
+            'median': statistics.median(samples),
+            'mean': statistics.mean(samples),
+            'max': max(samples),
+        }
+
+
+def strategy_cases(args):
+    for strategy_class in STRATEGIES:
+        strategy = strategy_class(SyntheticStockData(days=args.days, seed=0))
+        prefix = f'strategy.{strategy_class.name}'
+
+        def cold(strategy=strategy):
+            # 每次都从空的因子缓存和原始K线开始
+            strategy.factor_cache = FactorCache()
+            strategy.data = strategy.load_data()
+
+        def factors(strategy=strategy):
+            cold(strategy)
+            strategy.calculate_factors()
+
+        search = RandomSearch(budget=args.budget, seed=0) if args.budget else None
+        yield Case(f'{prefix}.calculate_factors', strategy.calculate_factors, setup=cold)
+        yield Case(f'{prefix}.calculate_profit', strategy.calculate_profit, setup=factors)
+        yield Case(f'{prefix}.status', strategy.status, setup=factors)
+        yield Case(f'{prefix}.optimize_parameters', lambda strategy=strategy, search=search: strategy.optimize_parameters(search=search),
+                   setup=cold, repeat=args.heavy_repeat)
+
+
+def account_cases(args):
+    kline = SyntheticStockData(days=args.days, seed=0).kline
+    rows = kline.to_dict('records')
+
+    for ledger in ('list', 'array', 'profit'):
+        def trade(ledger=ledger):
+            account = DemoAccount(ledger=ledger)
+            for i, row in enumerate(rows):
+                if i % 2 == 0:
+                    account.buy(row, i)
+                else:
+                    account.sell(row, i)
+            account.get_profit()
+        yield Case(f'account.demo_account.{ledger}', trade)
+
+    rng = np.random.default_rng(0)
+    prices = kline['收盘'].to_numpy()
+    buy = rng.random((256, len(prices))) < 0.05
+    sell = rng.random((256, len(prices))) < 0.05
+    yield Case('account.simulate_profits.256', lambda: simulate_profits(prices, buy, sell))
+
+
+def manager_cases(args):
+    for count in args.symbols:
+        symbols = [f'{600000 + i:06d}' for i in range(count)]
+        manager = StocksManager(symbols=list(symbols))
+
+        def build(manager=manager, symbols=symbols):
+            for seed, symbol in enumerate(symbols):
+                manager.stocks[symbol] = StockInfo(symbol, stock_data=SyntheticStockData(symbol, days=args.days, seed=seed))
+
+        # 首次运行前创建 StockInfo（不计时），之后复用，与常驻进程中的每个周期一致
+        yield Case(f'manager.get_result.{count}', manager.get_result,
+                   setup=lambda build=build, manager=manager: manager.stocks or build(),
+                   repeat=args.heavy_repeat)
+
+
+def database_cases(args, tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+    items = [
+        (f'{600000 + i:06d}', {'index': '000300', 'name': strategy_class.name, 'status': 'Buy',
+                               'factors': {'收盘': 10.0 + i % 7}, 'profit': 1.5})
+        for i in range(args.records // len(STRATEGIES))
+        for strategy_class in STRATEGIES
+    ]
+
+    def reset():
+        with engine.begin() as conn:
+            conn.exec_driver_sql('DROP TABLE IF EXISTS strategy_select')
+        migrate(engine)
+
+    def save():
+        with Session(engine) as db:
+            StrategySelectRepository(db).save_strategy_selects(items)
+
+    yield Case(f'database.insert.{len(items)}', save, setup=reset)
+    # 同一天再次出现的信号只更新次数和时间
+    yield Case(f'database.update.{len(items)}', save, setup=lambda: None if _count(engine) else save())
+
+
+def _count(engine):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql('SELECT COUNT(*) FROM strategy_select').scalar()
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': vars(args),
+    }
+
+
+def compare(results, path, threshold):
+    """打印与之前结果的中位数之比，返回变慢超过 threshold 倍的项"""
+    with open(path) as f:
+        old = json.load(f)['results']
+    slower = []
+    print(f"\n{'case':<48} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for name, stats in results.items():
+        if name not in old:
+            continue
+        ratio = stats['median'] / old[name]['median'] if old[name]['median'] else float('inf')
+        mark = ' slower' if ratio > threshold else ' faster' if ratio < 1 / threshold else ''
+        if ratio > threshold:
+            slower.append(name)
+        print(f"{name:<48} {old[name]['median'] * 1000:>10.3f} {stats['median'] * 1000:>10.3f} {ratio:>6.2f}x{mark}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=360, help='每只股票的K线数')
+    parser.add_argument('--repeat', type=int, default=5, help='每项的运行次数')
+    parser.add_argument('--heavy-repeat', type=int, default=1, help='寻优和整个指数计算的运行次数')
+    parser.add_argument('--budget', type=int, default=50, help='寻优时随机搜索的参数组数，0 表示遍历整个网格')
+    parser.add_argument('--symbols', type=int, nargs='+', default=[300, 900], help='整个指数计算的股票数')
+    parser.add_argument('--records', type=int, default=2100, help='持久化测试写入的记录数')
+    parser.add_argument('--only', nargs='+', help='只运行名称以这些前缀开头的项')
+    parser.add_argument('--json', dest='json_path', help='把结果写入 JSON 文件')
+    parser.add_argument('--compare', help='与之前写入的 JSON 结果对比')
+    parser.add_argument('--threshold', type=float, default=1.2, help='中位数之比超过该值视为变慢')
+    parser.add_argument('--strict', action='store_true', help='有变慢的项时以非零状态退出')
+    args = parser.parse_args()
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # 寻优保存的参数文件和股票列表缓存写入临时目录
+        os.chdir(tmp)
+        try:
+            groups = (strategy_cases(args), account_cases(args), manager_cases(args), database_cases(args, tmp))
+            for cases in groups:
+                for case in cases:
+                    if args.only and not any(case.name.startswith(prefix) for prefix in args.only):
+                        continue
+                    results[case.name] = stats = case.run(args.repeat)
+                    print(f"{case.name:<48} median {stats['median'] * 1000:10.3f} ms  "
+                          f"min {stats['min'] * 1000:10.3f} ms  ({stats['repeat']} runs)", flush=True)
+        finally:
+            os.chdir(cwd)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'meta': metadata(args), 'results': results}, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        slower = compare(results, args.compare, args.threshold)
+        if slower and args.strict:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
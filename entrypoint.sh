@@ -76,9 +76,5 @@ check_and_install_poetry
 # 安装项目依赖
 install_dependencies
 
-while true; do
-    echo "Running main.py with --allindex"
-    poetry run python main.py start --allindex
-    echo "Waiting for $INTERVAL minutes before next execution"
-    sleep $(( INTERVAL * 60 ))
-done
\ No newline at end of file
+echo "Serving main.py with --allindex every $INTERVAL minutes"
+exec poetry run python main.py serve --allindex --interval $INTERVAL
\ No newline at end of file
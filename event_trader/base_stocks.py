@@ -3,7 +3,10 @@ from china_stock_data import StockMarket, PersistentDict
 from .utils import is_a_share
 
 class BaseStocks(ABC):
-    def __init__(self, symbols=None, file_path = 'base_stocks.json', index=None, start=None, limit=None, **kwargs):
+    def __init__(self, symbols=None, file_path = 'base_stocks.json', index=None, start=None, limit=None, data_source=None, **kwargs):
+        """
+        :param data_source: DataSource，提供指数成分股列表，默认从网络获取
+        """
         self.index = index
         self.kwargs = kwargs
         self.cached = PersistentDict(file_path)
@@ -11,8 +14,11 @@ class BaseStocks(ABC):
         if symbols is not None:
             self.symbols = symbols
         elif index:
-            self.stock_market = StockMarket(index = index)
-            codes = self.stock_market['index_codes']
+            if data_source is not None:
+                codes = data_source.index_codes(index)
+            else:
+                self.stock_market = StockMarket(index = index)
+                codes = self.stock_market['index_codes']
             
             if start is None:
                 start = 0
@@ -6,3 +6,9 @@ SYMBOL_COL = "股票代码"
 HISTORY_DAYS = 360
 CURRENT_DAYS = 360
 FETCHER_DEBOUNCE_TIME = 120
+
+# 数据获取限速：每秒请求数、突发请求数、同时在途的请求数和失败重试次数
+FETCH_RATE = 5
+FETCH_BURST = 5
+FETCH_CONCURRENCY = 4
+FETCH_RETRIES = 3
@@ -0,0 +1,154 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pandas as pd
+from china_stock_data import StockData, StockMarket
+from event_trader.kline_store import KlineStore, StoredStockData
+from event_trader.config import PRICE_COL
+from event_trader.utils import is_a_share
+
+SNAPSHOT_FILE = 'snapshot.json'
+
+
+class DataSource(ABC):
+    """
+    StockInfo 和 StocksManager 的数据来源：提供指数成分股列表和每只股票的数据对象。
+    数据对象需要提供 symbol、kline（每次访问返回 DataFrame）和 ['涨跌幅']，与 StockData 相同。
+    """
+
+    @abstractmethod
+    def stock_data(self, symbol):
+        """返回一只股票的数据对象"""
+
+    @abstractmethod
+    def index_codes(self, index):
+        """返回指数的成分股代码列表"""
+
+
+class LiveDataSource(DataSource):
+    """从网络获取数据（china_stock_data），传入 store 时K线先从本地列存储读取，只追加新的K线"""
+    def __init__(self, store: KlineStore = None, stock_kwargs={}):
+        self.store = store
+        self.stock_kwargs = stock_kwargs
+
+    def stock_data(self, symbol):
+        stock_data = StockData(symbol, **self.stock_kwargs)
+        if self.store is not None:
+            stock_data = StoredStockData(symbol, self.store, stock_data)
+        return stock_data
+
+    def index_codes(self, index):
+        return list(StockMarket(index=index)['index_codes'])
+
+
+class CsvStockData:
+    """从 CSV 文件读取K线的数据对象"""
+    def __init__(self, symbol, path):
+        self.symbol = symbol
+        self.path = path
+
+    @property
+    def kline(self):
+        return pd.read_csv(self.path, dtype={'股票代码': str})
+
+    def __getitem__(self, key):
+        if key == '涨跌幅':
+            close = self.kline[PRICE_COL]
+            return (close.iloc[-1] - close.iloc[0]) * 100 / close.iloc[0]
+        raise KeyError(f"Key '{key}' not found")
+
+
+class SnapshotDataSource(DataSource):
+    """
+    回放本地快照，不访问网络。快照目录的结构::
+
+        snapshot.json        创建时间和包含的指数
+        index/{index}.json   指数成分股代码列表
+        klines/              KlineStore 列存储，内存映射读取
+        csv/{symbol}.csv     （可选）没有列存储时读取的 CSV K线
+
+    回放时返回快照中的全部K线，不按当前日期截取最近的数据，保证每次运行的结果相同。
+    """
+    def __init__(self, root):
+        self.root = root
+        self.store = KlineStore(os.path.join(root, 'klines'))
+
+    def stock_data(self, symbol):
+        if symbol in self.store:
+            return StoredStockData(symbol, self.store, days=None)
+        path = os.path.join(self.root, 'csv', f'{symbol}.csv')
+        if os.path.exists(path):
+            return CsvStockData(symbol, path)
+        raise KeyError(f"Symbol '{symbol}' not found in snapshot {self.root}")
+
+    def index_codes(self, index):
+        path = os.path.join(self.root, 'index', f'{index}.json')
+        if not os.path.exists(path):
+            raise KeyError(f"Index '{index}' not found in snapshot {self.root}")
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def symbols(self):
+        """快照中有K线的全部股票"""
+        csv = os.path.join(self.root, 'csv')
+        files = [name[:-4] for name in os.listdir(csv) if name.endswith('.csv')] if os.path.isdir(csv) else []
+        return sorted(set(self.store.symbols()) | set(files))
+
+    def info(self):
+        path = os.path.join(self.root, SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def take_snapshot(root, indexes=(), symbols=(), source: DataSource = None, workers=5):
+    """
+    把指数成分股列表和K线保存为快照，供 SnapshotDataSource 回放。已有的快照会被更新（K线整体覆盖）。
+
+    :param indexes: 要保存的指数，成分股的K线一并保存
+    :param symbols: 额外保存K线的股票
+    :param source: 数据来源，默认为 LiveDataSource
+    :param workers: 下载K线的线程数
+    :return: (保存的股票数, 失败的股票列表)
+    """
+    source = source or LiveDataSource()
+    store = KlineStore(os.path.join(root, 'klines'))
+    os.makedirs(os.path.join(root, 'index'), exist_ok=True)
+
+    wanted = list(symbols)
+    for index in indexes:
+        codes = list(source.index_codes(index))
+        with open(os.path.join(root, 'index', f'{index}.json'), 'w', encoding='utf-8') as f:
+            json.dump(codes, f, ensure_ascii=False)
+        # 与 BaseStocks 一致，只有 A 股参与计算
+        wanted.extend(code for code in codes if is_a_share(code))
+
+    def _save(symbol):
+        try:
+            kline = source.stock_data(symbol).kline
+            if kline is None or kline.empty:
+                raise ValueError("no kline data")
+            store.write(symbol, kline)
+            return True
+        except Exception as e:
+            print(f"Error processing {symbol}: {e}")
+            return False
+
+    wanted = list(dict.fromkeys(wanted))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_save, wanted))
+    saved = sum(results)
+    failed = [symbol for symbol, ok in zip(wanted, results) if not ok]
+
+    info = SnapshotDataSource(root).info()
+    info.update({
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'indexes': sorted(set(info.get('indexes', [])) | set(indexes)),
+        'symbols': len(store.symbols()),
+    })
+    with open(os.path.join(root, SNAPSHOT_FILE), 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return saved, failed
@@ -1,20 +1,129 @@
+import numpy as np
 import pandas as pd
 from event_trader.config import PRICE_COL, DATE_COL, SYMBOL_COL
 
+TRANSACTION_FIELDS = ('date', 'type', 'symbol', 'price', 'shares', 'cash', 'fee', 'index')
+
+
+class ListLedger:
+    """以字典列表记录交易明细"""
+    def __init__(self):
+        self.records = []
+
+    def append(self, date, type, symbol, price, shares, cash, fee, index):
+        self.records.append({
+            'date': date,
+            'type': type,
+            'symbol': symbol,
+            'price': price,
+            'shares': shares,
+            'cash': cash,
+            'fee': fee,
+            'index': index
+        })
+
+    def to_list(self):
+        return self.records
+
+    def to_frame(self):
+        return pd.DataFrame(self.records)
+
+    def clear(self):
+        self.records.clear()
+
+    def __len__(self):
+        return len(self.records)
+
+
+class ArrayLedger:
+    """
+    以预分配的 numpy 结构化数组记录交易明细，只在需要时才生成字典列表或 DataFrame。
+    """
+    dtype = np.dtype([
+        ('date', object),
+        ('type', 'U4'),
+        ('symbol', object),
+        ('price', 'f8'),
+        ('shares', 'f8'),
+        ('cash', 'f8'),
+        ('fee', 'f8'),
+        ('index', object),
+    ])
+
+    def __init__(self, capacity=64):
+        self.array = np.empty(capacity, dtype=self.dtype)
+        self.size = 0
+        self._records = None
+
+    def append(self, date, type, symbol, price, shares, cash, fee, index):
+        if self.size == len(self.array):
+            self.array = np.resize(self.array, max(1, 2 * len(self.array)))
+        self.array[self.size] = (date, type, symbol, price, shares, cash, fee, index)
+        self.size += 1
+        self._records = None
+
+    def to_list(self):
+        if self._records is None:
+            columns = [self.array[name][:self.size].tolist() for name in TRANSACTION_FIELDS]
+            self._records = [dict(zip(TRANSACTION_FIELDS, values)) for values in zip(*columns)]
+        return self._records
+
+    def to_frame(self):
+        return pd.DataFrame({name: self.array[name][:self.size] for name in TRANSACTION_FIELDS})
+
+    def clear(self):
+        self.size = 0
+        self._records = None
+
+    def __len__(self):
+        return self.size
+
+
+class ProfitLedger:
+    """只计算利润、不记录交易明细，供参数寻优使用"""
+    def append(self, *args):
+        pass
+
+    def to_list(self):
+        return []
+
+    def to_frame(self):
+        return pd.DataFrame(columns=list(TRANSACTION_FIELDS))
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+LEDGERS = {
+    'list': ListLedger,
+    'array': ArrayLedger,
+    'profit': ProfitLedger,
+}
+
+
 class DemoAccount:
-    def __init__(self, initial_cash=1000000, buy_commission=0.0003, sell_commission=0.0008):
+    def __init__(self, initial_cash=1000000, buy_commission=0.0003, sell_commission=0.0008, ledger='list'):
         """
         初始化模拟账户。
         :param initial_cash: 初始资金
         :param buy_commission: 买入佣金比例
         :param sell_commission: 卖出佣金比例
+        :param ledger: 交易记录方式，list 为字典列表，array 为 numpy 结构化数组，profit 不记录明细
         """
         self.initial_cash = initial_cash
         self.cash = initial_cash
         self.holdings = {}  # 持有股票及其数量
+        self.last_prices = {}  # 每只股票最后一笔交易的价格
         self.buy_commission = buy_commission
         self.sell_commission = sell_commission
-        self.transactions = []  # 记录交易记录
+        self.ledger = LEDGERS[ledger]()  # 记录交易记录
+
+    @property
+    def transactions(self):
+        return self.ledger.to_list()
 
     def buy(self, data, index, position=1.0):
         """
@@ -38,16 +147,8 @@ class DemoAccount:
             if cost <= self.cash and shares_to_buy > 0:
                 self.holdings[symbol] = self.holdings.get(symbol, 0) + shares_to_buy
                 self.cash -= cost
-                self.transactions.append({
-                    'date': date,
-                    'type': 'buy',
-                    'symbol': symbol,
-                    'price': price,
-                    'shares': shares_to_buy,
-                    'cash': self.cash,
-                    'fee': fee,
-                    'index': index
-                })
+                self.last_prices[symbol] = price
+                self.ledger.append(date, 'buy', symbol, price, shares_to_buy, self.cash, fee, index)
 
     def sell(self, data, index, position=1.0):
         """
@@ -69,22 +170,14 @@ class DemoAccount:
             revenue = shares_to_sell * price * (1 - self.sell_commission)
             self.cash += revenue
             self.holdings[symbol] -= shares_to_sell
-            self.transactions.append({
-                'date': date,
-                'type': 'sell',
-                'symbol': symbol,
-                'price': price,
-                'shares': shares_to_sell,
-                'cash': self.cash,
-                'fee': fee,
-                'index': index
-            })
+            self.last_prices[symbol] = price
+            self.ledger.append(date, 'sell', symbol, price, shares_to_sell, self.cash, fee, index)
 
     def get_profit(self):
         return (self.cash - self.initial_cash) / self.initial_cash * 100
 
     def get_transactions(self):
-        return pd.DataFrame(self.transactions)
+        return self.ledger.to_frame()
 
     def reset_account(self):
         """
@@ -92,7 +185,8 @@ class DemoAccount:
         """
         self.cash = self.initial_cash
         self.holdings.clear()
-        self.transactions.clear()
+        self.last_prices.clear()
+        self.ledger.clear()
 
     def get_account_status(self):
         """
@@ -103,10 +197,54 @@ class DemoAccount:
         for symbol, shares in self.holdings.items():
             if shares > 0:
                 # 假设使用最后一笔交易价格计算当前持股市值
-                last_price = [t['price'] for t in self.transactions if t['symbol'] == symbol][-1]
-                total_assets += shares * last_price
+                total_assets += shares * self.last_prices[symbol]
         return {
             'cash': self.cash,
             'holdings': self.holdings,
             'total_assets': total_assets
         }
+
+def simulate_profits(prices, buy, sell, initial_cash=1000000, buy_commission=0.0003, sell_commission=0.0008):
+    """
+    同时回测多组参数的全仓买卖信号，规则与 DemoAccount.buy/sell 相同（佣金、100股整手），
+    最后一根K线仍持仓的账户按收盘价卖出。
+
+    :param prices: 长度为 K线数 的收盘价数组，或与 buy 形状相同、每行一只股票的收盘价矩阵
+    :param buy: (参数组数, K线数) 的买入信号矩阵
+    :param sell: (参数组数, K线数) 的卖出信号矩阵，同一根K线同时有买卖信号时只买入
+    :return: 每组参数的利润百分比，与 DemoAccount.get_profit 一致
+    """
+    prices = np.asarray(prices, dtype=float)
+    per_row = prices.ndim == 2
+    buy = np.asarray(buy, dtype=bool)
+    sell = np.asarray(sell, dtype=bool) & ~buy
+    cash = np.full(buy.shape[0], float(initial_cash))
+    holdings = np.zeros(buy.shape[0])
+
+    for i in np.flatnonzero((buy | sell).any(axis=0)):
+        price = prices[:, i] if per_row else prices[i]
+        if per_row:
+            if (price[buy[:, i] | sell[:, i]] <= 0).any():
+                raise ValueError("价格必须为正数")
+        elif price <= 0:
+            raise ValueError("价格必须为正数")
+        buying = buy[:, i] & (cash > 0)
+        if buying.any():
+            buy_price = price[buying] if per_row else price
+            shares = np.floor_divide(np.floor_divide(cash[buying], buy_price), 100) * 100
+            cost = shares * buy_price * (1 + buy_commission)
+            ok = (cost <= cash[buying]) & (shares > 0)
+            rows = np.flatnonzero(buying)[ok]
+            holdings[rows] += shares[ok]
+            cash[rows] -= cost[ok]
+        selling = sell[:, i] & (holdings > 0)
+        if selling.any():
+            sell_price = price[selling] if per_row else price
+            cash[selling] += holdings[selling] * sell_price * (1 - sell_commission)
+            holdings[selling] = 0
+
+    holding = holdings > 0
+    if holding.any() and prices.shape[-1]:
+        last_price = prices[holding, -1] if per_row else prices[-1]
+        cash[holding] += holdings[holding] * last_price * (1 - sell_commission)
+    return (cash - initial_cash) / initial_cash * 100
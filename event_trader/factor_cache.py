@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+from event_trader.indicators import rsv, rsi
+
+
+class FactorCache:
+    """
+    按 (symbol, 指标, 参数, 输入数据) 缓存因子序列的 LRU 存储。
+    参数寻优时同一个指标只需计算一次，例如 MA2 在遍历 short_window 时复用同一条 long_mavg。
+    输入数据以全部输入列的内容指纹区分，重新读取、窗口平移或原地替换任意一行K线后不会读到旧的因子。
+    """
+    def __init__(self, maxsize=256):
+        """
+        :param maxsize: 最多缓存的序列条数，超出后淘汰最久未使用的
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        读取缓存，未命中时调用 compute() 计算并写入。
+
+        :param key: 可哈希的缓存键
+        :param compute: 无参数的计算函数
+        """
+        with self._lock:
+            if key in self._store:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return self._store[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._store[key] = value
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+        return value
+
+    @staticmethod
+    def _version(*columns: pd.Series):
+        # 每一列的行数和全部数据的哈希；只比较行数和最后一个值时，长度相同、最后一个值相同的不同序列会被误认为同一份数据
+        # 哈希一列 1000 根K线约 5us，远小于计算一次指标
+        return tuple((len(column), hash(column.to_numpy().tobytes())) for column in columns)
+
+    def sma(self, symbol, series: pd.Series, window):
+        key = (symbol, 'sma', series.name, window, self._version(series))
+        return self.get(key, lambda: series.rolling(window=window).mean())
+
+    def rolling_std(self, symbol, series: pd.Series, window):
+        key = (symbol, 'rolling_std', series.name, window, self._version(series))
+        return self.get(key, lambda: series.rolling(window=window).std())
+
+    def ewm(self, symbol, series: pd.Series, span):
+        key = (symbol, 'ewm', series.name, span, self._version(series))
+        return self.get(key, lambda: series.ewm(span=span, adjust=False).mean())
+
+    def rolling_min(self, symbol, series: pd.Series, window):
+        key = (symbol, 'rolling_min', series.name, window, self._version(series))
+        return self.get(key, lambda: series.rolling(window=window, min_periods=1).min())
+
+    def rolling_max(self, symbol, series: pd.Series, window):
+        key = (symbol, 'rolling_max', series.name, window, self._version(series))
+        return self.get(key, lambda: series.rolling(window=window, min_periods=1).max())
+
+    def rsi(self, symbol, series: pd.Series, period):
+        key = (symbol, 'rsi', series.name, period, self._version(series))
+        return self.get(key, lambda: rsi(series, period))
+
+    def rsv(self, symbol, data: pd.DataFrame, n):
+        key = (symbol, 'rsv', n, self._version(data['最高'], data['最低'], data['收盘']))
+        return self.get(key, lambda: rsv(data['最高'], data['最低'], data['收盘'], n))
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._store),
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._store)
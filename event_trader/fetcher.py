@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from event_trader.config import FETCH_RATE, FETCH_BURST, FETCH_CONCURRENCY, FETCH_RETRIES
+
+
+class TokenBucket:
+    """
+    令牌桶：以 rate 个/秒的速度补充令牌，最多积攒 capacity 个，允许短时间的突发请求。
+    """
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param rate: 每秒补充的令牌数
+        :param capacity: 桶的容量，默认为 max(1, rate)
+        :param clock: 获取单调时间的函数
+        :param sleep: 等待指定秒数的函数
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        取出 tokens 个令牌，不够时等待补充。
+
+        :return: 等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                wait = (tokens - self.tokens) / self.rate
+            # 在锁外等待，其他线程可以同时计算自己的等待时间
+            self.sleep(wait)
+            waited += wait
+
+
+class RetryableResponse(Exception):
+    """服务端返回了可以重试的状态码（限流或暂时不可用）"""
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code} from {response.url}")
+        self.response = response
+
+
+class RateLimitedFetcher:
+    """
+    数据获取层：令牌桶限制请求速率，信号量限制同时在途的请求数（与计算线程数无关），
+    失败时按带随机抖动的指数退避重试，HTTP 请求复用连接池中的长连接。
+    """
+    def __init__(self, rate=FETCH_RATE, burst=FETCH_BURST, concurrency=FETCH_CONCURRENCY, retries=FETCH_RETRIES,
+                 backoff=0.5, max_backoff=30.0, retry_statuses=(429, 500, 502, 503, 504),
+                 retry_on=(requests.ConnectionError, requests.Timeout), timeout=15,
+                 sleep=time.sleep, rng=random.random):
+        """
+        :param rate: 每秒最多发起的请求数
+        :param burst: 允许的突发请求数，默认为 max(1, rate)
+        :param concurrency: 同时在途的请求数上限，也是连接池的大小
+        :param retries: 失败后最多重试的次数
+        :param backoff: 第一次重试前的最长等待时间（秒），之后每次加倍
+        :param max_backoff: 单次等待时间的上限（秒）
+        :param retry_statuses: 需要重试的 HTTP 状态码
+        :param retry_on: 需要重试的异常类型
+        :param timeout: HTTP 请求默认的超时时间（秒）
+        """
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = set(retry_statuses)
+        self.retry_on = tuple(retry_on) + (RetryableResponse,)
+        self.timeout = timeout
+        self.sleep = sleep
+        self.rng = rng
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'waited': 0.0}
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._session = None
+        self._patched = 0
+        self._original_get = None
+
+    @property
+    def session(self):
+        """共享的 requests.Session，连接池大小与并发数一致"""
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.concurrency, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def call(self, func, *args, **kwargs):
+        """
+        在限速和并发限制下调用 func(*args, **kwargs)，遇到 retry_on 中的异常时退避后重试。
+        """
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            with self._slots:
+                self._count('requests', 1, waited)
+                try:
+                    return func(*args, **kwargs)
+                except self.retry_on as e:
+                    if attempt >= self.retries:
+                        self._count('failures')
+                        raise
+                    error = e
+            # 退避期间不占用并发名额
+            self._count('retries')
+            self.sleep(self.delay(attempt, error))
+            attempt += 1
+
+    def delay(self, attempt, error=None):
+        """第 attempt 次重试前的等待时间：full jitter，服务端给出 Retry-After 时不少于该值"""
+        delay = self.rng() * min(self.max_backoff, self.backoff * 2 ** attempt)
+        if isinstance(error, RetryableResponse):
+            retry_after = error.response.headers.get('Retry-After')
+            if retry_after is not None and retry_after.isdigit():
+                delay = max(delay, min(self.max_backoff, float(retry_after)))
+        return delay
+
+    def get(self, url, **kwargs):
+        """
+        通过连接池发起 GET 请求，参数与 requests.get 相同。
+        重试次数用完后仍是可重试的状态码时返回最后一次的响应，由调用方处理。
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            return self.call(self._get, url, **kwargs)
+        except RetryableResponse as e:
+            return e.response
+
+    def _get(self, url, **kwargs):
+        response = self.session.get(url, **kwargs)
+        if response.status_code in self.retry_statuses:
+            response.close()
+            raise RetryableResponse(response)
+        return response
+
+    @contextmanager
+    def patch_requests(self):
+        """
+        在 with 块内把 requests.get 替换为 self.get。
+        china_stock_data 通过 akshare 使用模块级的 requests.get 下载数据，替换后同样受限速、重试和连接池管理。
+        """
+        with self._lock:
+            if self._patched == 0:
+                self._original_get = requests.get
+                requests.get = self.get
+            self._patched += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._patched -= 1
+                if self._patched == 0:
+                    requests.get = self._original_get
+                    self._original_get = None
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _count(self, key, value=1, waited=0.0):
+        with self._lock:
+            self.stats[key] += value
+            self.stats['waited'] += waited
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+
+def rsv(high, low, close, n):
+    """
+    计算未成熟随机值 RSV。
+
+    :param high: 最高价序列
+    :param low: 最低价序列
+    :param close: 收盘价序列
+    :param n: 滚动窗口长度
+    :return: (L_n, H_n, RSV) 三个 numpy 数组
+    """
+    low_n = pd.Series(low, dtype=float).rolling(window=n, min_periods=1).min().to_numpy()
+    high_n = pd.Series(high, dtype=float).rolling(window=n, min_periods=1).max().to_numpy()
+    close = np.asarray(close, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = (close - low_n) / (high_n - low_n) * 100
+    return low_n, high_n, value
+
+
+def rsi(close: pd.Series, period):
+    """
+    计算相对强弱指标 RSI（简单移动平均口径）。
+
+    :param close: 收盘价序列
+    :param period: 计算周期
+    :return: RSI 序列
+    """
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def kd_filter(rsv_values, m1, m2, init=50.0):
+    """
+    把 K、D 当作一阶递归滤波器计算：
+    K[i] = (m1 - 1) / m1 * K[i-1] + 1 / m1 * RSV[i]
+    D[i] = (m2 - 1) / m2 * D[i-1] + 1 / m2 * K[i]
+    第一根K线的 K、D 固定为 init，与逐行计算的结果逐位一致。
+
+    :param rsv_values: RSV 序列
+    :param m1: K 值平滑周期
+    :param m2: D 值平滑周期
+    :param init: K、D 的初始值
+    :return: (K, D) 两个 numpy 数组
+    """
+    values = np.asarray(rsv_values, dtype=float).tolist()
+    k_weight, k_input = (m1 - 1) / m1, 1 / m1
+    d_weight, d_input = (m2 - 1) / m2, 1 / m2
+    k_values = [init] * len(values)
+    d_values = [init] * len(values)
+    k, d = init, init
+    for i in range(1, len(values)):
+        k = k_weight * k + k_input * values[i]
+        d = d_weight * d + d_input * k
+        k_values[i] = k
+        d_values[i] = d
+    return np.array(k_values, dtype=float), np.array(d_values, dtype=float)
+
+
+def kdj(high, low, close, n, m1, m2):
+    """
+    计算 KDJ 指标。
+
+    :return: (K, D, J) 三个 numpy 数组
+    """
+    _, _, rsv_values = rsv(high, low, close, n)
+    k, d = kd_filter(rsv_values, m1, m2)
+    return k, d, 3.0 * k - 2.0 * d
+
+
+def kdj_batch(high, low, close, params):
+    """
+    一次计算多组 (n, m1, m2) 参数的 KDJ 指标。
+    相同 n 的 RSV 只计算一次，K、D 的递推对所有参数组同时进行。
+
+    :param params: 可迭代的 (n, m1, m2) 参数组
+    :return: (K, D, J) 三个形状为 (参数组数, K线数) 的 numpy 数组
+    """
+    params = list(params)
+    length = len(close)
+    rsv_matrix = np.empty((length, len(params)), dtype=float)
+    rsv_by_n = {}
+    for col, (n, _, _) in enumerate(params):
+        if n not in rsv_by_n:
+            rsv_by_n[n] = rsv(high, low, close, n)[2]
+        rsv_matrix[:, col] = rsv_by_n[n]
+
+    m1 = np.array([p[1] for p in params], dtype=float)
+    m2 = np.array([p[2] for p in params], dtype=float)
+    k_weight, k_input = (m1 - 1) / m1, 1 / m1
+    d_weight, d_input = (m2 - 1) / m2, 1 / m2
+
+    k = np.full((length, len(params)), 50.0)
+    d = np.full((length, len(params)), 50.0)
+    for i in range(1, length):
+        k[i] = k_weight * k[i - 1] + k_input * rsv_matrix[i]
+        d[i] = d_weight * d[i - 1] + d_input * k[i]
+    k, d = k.T.copy(), d.T.copy()
+    return k, d, 3.0 * k - 2.0 * d
@@ -0,0 +1,207 @@
+import cProfile
+import functools
+import json
+import math
+import pstats
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class _Stat:
+    """一个 (阶段, 键) 的耗时统计，直方图按 2 的幂划分微秒区间"""
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = max(0, math.ceil(math.log2(max(seconds * 1e6, 1))))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def quantile(self, q):
+        """由直方图估计分位数，返回所在区间的上界（秒），不超过最大值"""
+        target = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min(self.max, 2 ** bucket / 1e6)
+        return self.max
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('recorder', 'stage', 'key', 'start')
+
+    def __init__(self, recorder, stage, key):
+        self.recorder = recorder
+        self.stage = stage
+        self.key = key
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.add(self.stage, self.key, perf_counter() - self.start)
+        return False
+
+
+class Recorder:
+    """
+    热点路径的耗时记录：按 (阶段, 键) 聚合次数、总耗时、最小/最大值和直方图。
+    默认关闭，关闭时 timer 返回共享的空上下文，timed 装饰的函数只多一次属性判断。
+    嵌套的阶段分别计时，例如 stock 的耗时包含其中各策略的 factors 和 backtest。
+    只记录当前进程内的耗时，进程池子进程中计算的阶段不会记录。
+    """
+    def __init__(self):
+        self.enabled = False
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def add(self, stage, key, seconds):
+        with self._lock:
+            stat = self._stats.get((stage, key))
+            if stat is None:
+                stat = self._stats[(stage, key)] = _Stat()
+            stat.add(seconds)
+
+    def timer(self, stage, key=None):
+        """
+        计时的上下文管理器::
+
+            with recorder.timer('fetch'):
+                kline = stock_data.kline
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage, key)
+
+    def timed(self, stage, key=None):
+        """
+        计时的装饰器。
+
+        :param key: 固定的键，或以被装饰函数的参数调用、返回键的函数，例如 lambda self, *args, **kwargs: self.name
+        """
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.add(stage, key(*args, **kwargs) if callable(key) else key, perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        """
+        :return: 按总耗时从大到小排列的统计列表，时间单位为秒
+        """
+        with self._lock:
+            items = list(self._stats.items())
+        rows = [{
+            'stage': stage,
+            'key': key,
+            'count': stat.count,
+            'total': stat.total,
+            'mean': stat.total / stat.count,
+            'min': stat.min,
+            'p50': stat.quantile(0.5),
+            'p95': stat.quantile(0.95),
+            'max': stat.max,
+            'histogram': {f'<={2 ** bucket}us': count for bucket, count in sorted(stat.buckets.items())},
+        } for (stage, key), stat in items]
+        return sorted(rows, key=lambda row: -row['total'])
+
+    def report(self, file=None):
+        """打印各阶段、各策略的耗时表"""
+        file = file or sys.stdout
+        rows = self.summary()
+        if not rows:
+            print("No timings recorded.", file=file)
+            return
+        print(f"{'stage':<12} {'key':<16} {'count':>8} {'total s':>10} {'mean ms':>10} "
+              f"{'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}", file=file)
+        for row in rows:
+            print(f"{row['stage']:<12} {str(row['key'] or '-'):<16} {row['count']:>8} {row['total']:>10.3f} "
+                  f"{row['mean'] * 1000:>10.3f} {row['p50'] * 1000:>10.3f} {row['p95'] * 1000:>10.3f} "
+                  f"{row['max'] * 1000:>10.3f}", file=file)
+
+    def dump(self, path):
+        """把统计结果写入 JSON 文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+
+
+recorder = Recorder()
+timer = recorder.timer
+timed = recorder.timed
+
+
+def strategy_key(strategy, *args, **kwargs):
+    """以策略名称作为 timed 的键"""
+    return strategy.name
+
+
+@contextmanager
+def profile_threads(path):
+    """
+    用 cProfile 分析 with 块内的代码，包括块内新启动的线程（线程池中的计算），结果合并后写入 pstats 文件。
+    进程池中的子进程不在分析范围内。
+    """
+    main = cProfile.Profile()
+    profilers = []
+    lock = threading.Lock()
+
+    def start_thread_profiler(frame, event, arg):
+        # 新线程的第一次回调时换成该线程自己的 cProfile
+        profiler = cProfile.Profile()
+        with lock:
+            profilers.append(profiler)
+        profiler.enable()
+
+    threading.setprofile(start_thread_profiler)
+    main.enable()
+    try:
+        yield main
+    finally:
+        main.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(main)
+        with lock:
+            for profiler in profilers:
+                stats.add(profiler)
+        stats.dump_stats(path)
@@ -0,0 +1,262 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from china_stock_data import TradingTimeChecker
+from event_trader.config import CACHE_PATH, DATE_COL, PRICE_COL, HISTORY_DAYS, FETCHER_DEBOUNCE_TIME
+
+META_FILE = 'meta.json'
+
+
+class KlineStore:
+    """
+    本地K线列存储：每只股票一个目录，每一列是一个连续的二进制文件，meta.json 记录列名、类型和行数。
+    读取时用内存映射直接构造 DataFrame，不复制数据；更新时只在文件末尾追加新的K线。
+    已写入的字节不会被原地修改：替换最后一根K线、类型变宽和整体重写都先写入临时文件再原子替换，
+    之前读取的 DataFrame 仍映射原来的文件，内容保持不变。
+    """
+    def __init__(self, root=os.path.join(CACHE_PATH, 'klines')):
+        """
+        :param root: 存储目录，默认为 CACHE_PATH/klines
+        """
+        self.root = root
+        self._lock = threading.Lock()
+
+    def path(self, symbol):
+        return os.path.join(self.root, str(symbol))
+
+    def meta(self, symbol):
+        """返回股票的元数据，没有存储时返回 None"""
+        path = os.path.join(self.path(symbol), META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, META_FILE)))
+
+    def __contains__(self, symbol):
+        return self.meta(symbol) is not None
+
+    def read(self, symbol, start=None):
+        """
+        以内存映射读取K线。数值列与文件共享内存（写时复制，修改不会写回文件，之后的写入也不会改变它），日期列转换为字符串。
+
+        :param start: 只返回日期不早于 start（YYYY-MM-DD）的K线，切片同样不复制数据
+        :return: DataFrame，没有存储时返回 None
+        """
+        meta = self.meta(symbol)
+        if meta is None:
+            return None
+        rows = meta['rows']
+        columns = {name: self._map(symbol, i, dtype, rows) for i, (name, dtype) in enumerate(meta['columns'])}
+        first = 0
+        if start is not None and DATE_COL in columns:
+            first = int(np.searchsorted(columns[DATE_COL], np.datetime64(start, 'D')))
+        data = {}
+        for name, values in columns.items():
+            values = values[first:]
+            if name == DATE_COL:
+                values = np.datetime_as_string(values, unit='D').astype(object)
+            data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    def last_date(self, symbol):
+        """返回已存储的最后一根K线的日期（YYYY-MM-DD），没有时返回 None"""
+        meta = self.meta(symbol)
+        if meta is None or meta['rows'] == 0:
+            return None
+        names = [name for name, _ in meta['columns']]
+        if DATE_COL not in names:
+            return None
+        i = names.index(DATE_COL)
+        dates = self._map(symbol, i, meta['columns'][i][1], meta['rows'])
+        return str(dates[-1])
+
+    def write(self, symbol, kline: pd.DataFrame):
+        """用 kline 覆盖已存储的全部K线"""
+        with self._lock:
+            directory = self.path(symbol)
+            os.makedirs(directory, exist_ok=True)
+            columns = []
+            for i, name in enumerate(kline.columns):
+                values = self._encode(name, kline[name])
+                self._replace_file(symbol, i, values)
+                columns.append([name, values.dtype.str])
+            self._write_meta(symbol, columns, len(kline))
+
+    def append(self, symbol, kline: pd.DataFrame):
+        """
+        只追加比已存储的最后一根K线更新的部分。与最后一根日期相同的K线视为盘中刷新，替换最后一根。
+        只有新K线时在文件末尾追加，已映射的部分不变；需要替换或类型变宽时整列写入新文件后原子替换。
+
+        :return: (追加的行数, 是否替换了最后一根)
+        """
+        meta = self.meta(symbol)
+        if meta is None or meta['rows'] == 0:
+            self.write(symbol, kline)
+            return len(kline), False
+        if list(kline.columns) != [name for name, _ in meta['columns']]:
+            # 列发生变化时无法按列追加，退化为整体重写
+            merged = pd.concat([self.read(symbol), kline], ignore_index=True)
+            merged = merged.drop_duplicates(subset=DATE_COL, keep='last')
+            self.write(symbol, merged)
+            return len(merged) - meta['rows'], False
+
+        last = np.datetime64(self.last_date(symbol), 'D')
+        dates = self._encode(DATE_COL, kline[DATE_COL])
+        replace = bool((dates == last).any())
+        new = kline[dates > last]
+        if not replace and new.empty:
+            return 0, False
+
+        with self._lock:
+            rows = meta['rows']
+            columns = meta['columns']
+            for i, (name, dtype) in enumerate(columns):
+                stored = np.dtype(dtype)
+                tail = self._encode(name, new[name])
+                head = self._encode(name, kline[name][dates == last].iloc[-1:]) if replace else tail[:0]
+                widened = np.result_type(stored, head, tail)
+                if replace or widened != stored:
+                    # 类型变宽（例如整数变浮点、更长的字符串）或替换最后一根时写入新文件
+                    kept = self._map(symbol, i, dtype, rows - 1 if replace else rows)
+                    self._replace_file(symbol, i, np.concatenate([kept.astype(widened), head.astype(widened),
+                                                                  tail.astype(widened)]))
+                    columns[i][1] = widened.str
+                    continue
+                with open(self._file(symbol, i), 'r+b') as f:
+                    # 截掉上次写入中断时可能残留的多余字节，只影响已存储的行之后的部分
+                    f.truncate(rows * stored.itemsize)
+                    f.seek(rows * stored.itemsize)
+                    f.write(tail.astype(stored).tobytes())
+            self._write_meta(symbol, columns, rows + len(new))
+        return len(new), replace
+
+    def history_changed(self, symbol, kline: pd.DataFrame):
+        """
+        比较 kline 与已存储K线日期重叠的部分（不含可能被盘中刷新的最后一根），任一数值列不同时返回 True。
+        前复权（qfq）的价格在除权除息后整体变化，这时只追加新K线会留下错误的历史。
+        """
+        meta = self.meta(symbol)
+        if meta is None or meta['rows'] < 2 or DATE_COL not in kline.columns:
+            return False
+        stored = self.read(symbol)
+        if DATE_COL not in stored.columns:
+            return False
+        stored_dates = self._encode(DATE_COL, stored[DATE_COL])[:-1]
+        _, stored_index, index = np.intersect1d(stored_dates, self._encode(DATE_COL, kline[DATE_COL]),
+                                                return_indices=True)
+        for name in kline.columns:
+            if name == DATE_COL or name not in stored.columns:
+                continue
+            old = stored[name].to_numpy()[stored_index]
+            new = kline[name].to_numpy()[index]
+            if old.dtype.kind in 'fiu' and new.dtype.kind in 'fiu' and not np.allclose(old, new, equal_nan=True):
+                return True
+        return False
+
+    def _file(self, symbol, i):
+        return os.path.join(self.path(symbol), f'{i}.bin')
+
+    def _replace_file(self, symbol, i, values):
+        # 写入临时文件后原子替换，不截断可能仍被读取方映射的旧文件
+        path = self._file(symbol, i)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(np.ascontiguousarray(values).tobytes())
+        os.replace(path + '.tmp', path)
+
+    def _map(self, symbol, i, dtype, rows):
+        dtype = np.dtype(dtype)
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._file(symbol, i), dtype=dtype, mode='c', shape=(rows,))
+
+    def _write_meta(self, symbol, columns, rows):
+        # 先写数据再原子替换元数据，读取方只会看到完整的行
+        path = os.path.join(self.path(symbol), META_FILE)
+        meta = {'columns': columns, 'rows': rows, 'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _encode(name, series: pd.Series):
+        if name == DATE_COL:
+            return pd.to_datetime(series).to_numpy().astype('datetime64[D]')
+        values = series.to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        return np.ascontiguousarray(values)
+
+
+class StoredStockData:
+    """
+    从 KlineStore 读取K线的数据源，提供与 StockData 相同的 symbol/kline 接口。
+    本地数据过期时从 source（通常是 StockData）取一次最新K线，只把新增的部分写入存储；
+    与已存储的K线重叠的部分发生变化时（前复权价格在除权除息后改变）按最新K线整体重写。
+    """
+    def __init__(self, symbol, store: KlineStore, source=None, days=HISTORY_DAYS, is_stale=None):
+        """
+        :param store: K线存储
+        :param source: 获取最新K线的数据对象，需要提供 kline；为 None 时只读本地存储
+        :param days: kline 返回最近多少个自然日的数据，与 StockData 的 days 一致
+        :param is_stale: 判断本地数据是否需要刷新的函数 is_stale(meta)，默认按最近交易日判断
+        """
+        self.symbol = symbol
+        self.store = store
+        self.source = source
+        self.days = days
+        self.is_stale = is_stale or _is_stale
+        self._checked_at = None
+
+    def refresh(self):
+        """从 source 获取最新K线并追加到存储，返回追加的行数，整体重写时返回写入的行数"""
+        if self.source is None:
+            return 0
+        kline = self.source.kline
+        if kline is None or kline.empty:
+            return 0
+        if self.store.history_changed(self.symbol, kline):
+            self.store.write(self.symbol, kline)
+            return len(kline)
+        appended, _ = self.store.append(self.symbol, kline)
+        return appended
+
+    @property
+    def kline(self):
+        """每次访问都返回新的 DataFrame（与 StockData 相同），数值列与存储文件共享内存"""
+        # 同一对象被多个策略读取，FETCHER_DEBOUNCE_TIME 秒内只检查一次是否需要刷新
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at > FETCHER_DEBOUNCE_TIME:
+            self._checked_at = now
+            if self.source is not None and self.is_stale(self.store.meta(self.symbol)):
+                self.refresh()
+        start = None
+        if self.days:
+            start = (datetime.now() - timedelta(days=self.days)).strftime('%Y-%m-%d')
+        kline = self.store.read(self.symbol, start=start)
+        return kline if kline is not None else pd.DataFrame()
+
+    def __getitem__(self, key):
+        if key == '涨跌幅':
+            close = self.kline[PRICE_COL]
+            return (close.iloc[-1] - close.iloc[0]) * 100 / close.iloc[0]
+        if self.source is not None:
+            return self.source[key]
+        raise KeyError(f"Key '{key}' not found")
+
+
+def _is_stale(meta):
+    if meta is None or meta['rows'] == 0:
+        return True
+    if TradingTimeChecker.is_trading_time():
+        return True
+    return not TradingTimeChecker.compare_with_nearest_trade_date(meta['updated'][:10])
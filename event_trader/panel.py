@@ -0,0 +1,249 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from event_trader.config import PRICE_COL
+from event_trader.demo_account import simulate_profits
+from event_trader.strategies import STRATEGIES
+from event_trader.strategies.macd_strategy import LOOKBACK_PERIOD
+from event_trader.strategies.vma_strategy import RSI_PERIOD
+from event_trader.utils import get_first_line, shift
+
+PANEL_COLUMNS = [PRICE_COL, '开盘', '最高', '最低', '成交量']
+
+
+class Panel:
+    """
+    整个指数的K线面板：每个字段是一个 (K线数, 股票数) 的二维数组。
+    各股票按最后一根K线右对齐，较短的历史在前面补 NaN。停牌日不插入空行，
+    这样每一列的滚动窗口与单只股票的计算完全一致。
+    """
+    def __init__(self, klines: dict):
+        """
+        :param klines: {symbol: kline DataFrame}，空的K线会被忽略
+        """
+        klines = {symbol: kline for symbol, kline in klines.items() if kline is not None and len(kline)}
+        self.symbols = list(klines)
+        lengths = np.array([len(kline) for kline in klines.values()], dtype=int)
+        self.bars = int(lengths.max()) if len(lengths) else 0
+        # 每只股票第一根K线所在的行
+        self.start = self.bars - lengths
+        # 每个元素为该股票自己的K线序号，与逐只计算时的行号 i 相同
+        self.index = np.arange(self.bars)[:, None] - self.start[None, :]
+        self.last_rows = [kline.iloc[-1].to_dict() for kline in klines.values()]
+        self.values = {}
+        for column in PANEL_COLUMNS:
+            values = np.full((self.bars, len(self.symbols)), np.nan)
+            for j, kline in enumerate(klines.values()):
+                if column in kline.columns:
+                    values[self.start[j]:, j] = kline[column].to_numpy(dtype=float)
+            self.values[column] = values
+
+    def __getitem__(self, column):
+        return self.values[column]
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def stock_profit(self):
+        """各股票区间涨跌幅，与 StockData['涨跌幅'] 的口径相同"""
+        close = self[PRICE_COL]
+        first = close[self.start, np.arange(len(self.symbols))]
+        return (close[-1] - first) * 100 / first
+
+
+def _by_value(params, compute, shape):
+    """
+    按参数取值把列分组，每组调用一次 compute(value, columns)，结果拼回完整的面板。
+
+    :param params: 每列的参数值
+    """
+    out = np.full(shape, np.nan)
+    for value in np.unique(params):
+        columns = np.flatnonzero(params == value)
+        out[:, columns] = compute(value, columns)
+    return out
+
+
+def _rolling(values, windows, method, **kwargs):
+    def compute(window, columns):
+        rolling = pd.DataFrame(values[:, columns]).rolling(window=int(window), **kwargs)
+        return getattr(rolling, method)().to_numpy()
+    return _by_value(windows, compute, values.shape)
+
+
+def _ewm(values, spans):
+    def compute(span, columns):
+        return pd.DataFrame(values[:, columns]).ewm(span=span, adjust=False).mean().to_numpy()
+    return _by_value(spans, compute, values.shape)
+
+
+def _diff(values):
+    # 与 Series.diff().fillna(0) 相同
+    out = np.zeros(values.shape)
+    out[1:] = values[1:] - values[:-1]
+    return np.nan_to_num(out, nan=0.0)
+
+
+def _kd_filter(rsv, m1, m2, start, init=50.0):
+    """按列递推 K、D，每只股票在自己的第一根K线处取 init，与 indicators.kd_filter 逐位一致"""
+    k_weight, k_input = (m1 - 1) / m1, 1 / m1
+    d_weight, d_input = (m2 - 1) / m2, 1 / m2
+    k = np.full(rsv.shape, init)
+    d = np.full(rsv.shape, init)
+    for i in range(1, len(rsv)):
+        started = i > start
+        k[i] = np.where(started, k_weight * k[i - 1] + k_input * rsv[i], init)
+        d[i] = np.where(started, d_weight * d[i - 1] + d_input * k[i], init)
+    return k, d
+
+
+def _rsi(close, period, start):
+    delta = close - shift(close)
+    # 逐只计算时第一根K线的涨跌为 NaN，被当作 0 计入窗口；补齐的空行保持 NaN，不计入窗口
+    rows = np.arange(len(close))[:, None]
+    gain = np.where(rows < start, np.nan, np.where(delta > 0, delta, 0))
+    loss = np.where(rows < start, np.nan, np.where(delta < 0, -delta, 0))
+    gain = pd.DataFrame(gain).rolling(window=period).mean().to_numpy()
+    loss = pd.DataFrame(loss).rolling(window=period).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+
+def ma2_factors(panel, params):
+    close = panel[PRICE_COL]
+    short = _rolling(close, params['short_window'], 'mean')
+    long = _rolling(close, params['long_window'], 'mean')
+    return OrderedDict([
+        ('short_mavg', short), ('long_mavg', long),
+        ('short_mavg_derivative', _diff(short)), ('long_mavg_derivative', _diff(long)),
+    ])
+
+
+def kdj_factors(panel, params):
+    close, high, low = panel[PRICE_COL], panel['最高'], panel['最低']
+    low_n = _rolling(low, params['n'], 'min', min_periods=1)
+    high_n = _rolling(high, params['n'], 'max', min_periods=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsv = (close - low_n) / (high_n - low_n) * 100
+    k, d = _kd_filter(rsv, np.asarray(params['m1'], dtype=float), np.asarray(params['m2'], dtype=float), panel.start)
+    return OrderedDict([('L_n', low_n), ('H_n', high_n), ('RSV', rsv), ('K', k), ('D', d), ('J', 3.0 * k - 2.0 * d)])
+
+
+def ma1_factors(panel, params):
+    moving_avg = _rolling(panel[PRICE_COL], params['window'], 'mean')
+    return OrderedDict([('moving_avg', moving_avg), ('mavg_derivative', _diff(moving_avg))])
+
+
+def boll_factors(panel, params):
+    close = panel[PRICE_COL]
+    moving_avg = _rolling(close, params['window'], 'mean')
+    std = _rolling(close, params['window'], 'std')
+    multiple = np.asarray(params['std'], dtype=float)
+    upper = moving_avg + (std * multiple)
+    down = moving_avg - (std * multiple)
+    return OrderedDict([('moving_avg', moving_avg), ('std', std), ('upper', upper), ('down', down)])
+
+
+def macd_factors(panel, params):
+    close = panel[PRICE_COL]
+    ema_short = _ewm(close, params['short'])
+    ema_long = _ewm(close, params['long'])
+    dif = ema_short - ema_long
+    dea = _ewm(dif, params['middle'])
+    window = pd.DataFrame(close).rolling(window=LOOKBACK_PERIOD + 1, min_periods=1)
+    return OrderedDict([
+        ('EMA_short', ema_short), ('EMA_long', ema_long), ('DIF', dif), ('DEA', dea), ('MACD', 2 * (dif - dea)),
+        ('low_period', window.min().to_numpy()), ('high_period', window.max().to_numpy()),
+    ])
+
+
+def vma_factors(panel, params):
+    close, volume = panel[PRICE_COL], panel['成交量']
+    window = np.asarray(params['window'])
+    return OrderedDict([
+        ('volume_ma', _rolling(volume, window, 'mean')),
+        ('price_ma', _rolling(close, window, 'mean')),
+        ('rsi', _rsi(close, RSI_PERIOD, panel.start)),
+    ])
+
+
+def pd_factors(panel, params):
+    close = panel[PRICE_COL]
+    moving_avg = _rolling(close, params['window'], 'mean')
+    return OrderedDict([('moving_avg', moving_avg), ('percent', (close - moving_avg) * 100 / moving_avg)])
+
+
+# 策略名称到面板因子函数的映射：函数接收 Panel 和 {参数名: 每列参数值}，返回与 calculate_factors 同名的因子，
+# 买卖信号由策略的 signal_rules 在 (K线数, 股票数) 的数组上计算，与逐只计算共用同一套规则
+PANEL_FACTORS = {
+    'ma2': ma2_factors,
+    'kdj': kdj_factors,
+    'ma1': ma1_factors,
+    'boll': boll_factors,
+    'macd': macd_factors,
+    'vma': vma_factors,
+    'pd': pd_factors,
+}
+
+
+class _PanelStockData:
+    """只用于读取各股票已保存参数的轻量数据对象"""
+    def __init__(self, symbol, kline):
+        self.symbol = symbol
+        self.kline = kline
+
+
+def panel_result(klines: dict, strategies=None):
+    """
+    在整个面板上一次计算所有股票、所有策略的因子、信号和回测利润。
+
+    :param klines: {symbol: kline DataFrame}
+    :param strategies: 策略类列表，默认为全部内置策略；没有面板因子函数或 signal_rules 的策略逐只计算
+    :return: 与 StocksManager.get_result 相同列的 DataFrame
+    """
+    panel = Panel(klines)
+    strategies = strategies if strategies is not None else STRATEGIES
+    if not len(panel):
+        return pd.DataFrame()
+    stock_profit = panel.stock_profit()
+    prices = panel[PRICE_COL].T
+
+    records = {symbol: [] for symbol in panel.symbols}
+    for strategy_class in strategies:
+        # 各股票可能有各自寻优后保存的参数
+        instances = [strategy_class(_PanelStockData(symbol, klines[symbol])) for symbol in panel.symbols]
+        description = get_first_line(strategy_class.__doc__)
+        factor_function = PANEL_FACTORS.get(strategy_class.name)
+        params = {name: np.array([s.parameters[name] for s in instances]) for name in instances[0].parameters}
+        factors = factor_function(panel, params) if factor_function is not None else None
+        signals = strategy_class.signal_rules({**panel.values, **factors}, panel.index, params) if factors else None
+        if signals is None:
+            for symbol, strategy in zip(panel.symbols, instances):
+                account = strategy.calculate()
+                records[symbol].append({
+                    'name': strategy_class.name,
+                    'description': description,
+                    'parameters': strategy.parameters,
+                    'status': strategy.status(),
+                    'stock_profit': stock_profit[panel.symbols.index(symbol)],
+                    'profit': account.get_profit(),
+                    'factors': strategy.factors_value(),
+                })
+            continue
+
+        buy = np.asarray(signals[0], dtype=bool)
+        sell = np.asarray(signals[1], dtype=bool)
+        profits = simulate_profits(prices, buy.T, sell.T)
+        for j, (symbol, strategy) in enumerate(zip(panel.symbols, instances)):
+            status = 'Buy' if buy[-1, j] else 'Sell' if sell[-1, j] else 'None'
+            records[symbol].append({
+                'name': strategy_class.name,
+                'description': description,
+                'parameters': strategy.parameters,
+                'status': status,
+                'stock_profit': stock_profit[j],
+                'profit': profits[j],
+                'factors': {**panel.last_rows[j], **{name: values[-1, j] for name, values in factors.items()}},
+            })
+
+    return pd.DataFrame([{**row, 'symbol': symbol} for symbol, rows in records.items() for row in rows])
@@ -0,0 +1,191 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from event_trader.factor_cache import FactorCache
+
+
+class SharedKline:
+    """
+    把K线的每一列放入共享内存，子进程通过 handle 只需附加一次即可读取，不用每个任务都序列化整张表。
+    """
+    def __init__(self, symbol, kline: pd.DataFrame):
+        self.symbol = symbol
+        self._blocks = []
+        columns = []
+        for name in kline.columns:
+            values = kline[name].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+            self._blocks.append(block)
+            columns.append((name, block.name, values.dtype.str, values.shape))
+        self.handle = (symbol, tuple(columns))
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _WorkerStockData:
+    """子进程中代替 StockData 的轻量对象"""
+    def __init__(self, symbol, kline):
+        self.symbol = symbol
+        self.kline = kline
+
+
+# 子进程内按 handle 缓存的数据和策略实例
+_worker_stocks = OrderedDict()
+_WORKER_CACHE_SIZE = 4
+
+
+def _attach(handle):
+    if handle in _worker_stocks:
+        _worker_stocks.move_to_end(handle)
+        return _worker_stocks[handle]
+
+    symbol, columns = handle
+    data = {}
+    for name, block_name, dtype, shape in columns:
+        # 子进程与主进程共用同一个 resource_tracker，共享内存由主进程的 SharedKline.close 释放
+        block = shared_memory.SharedMemory(name=block_name)
+        data[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf).copy()
+        block.close()
+    state = {
+        'stock_data': _WorkerStockData(symbol, pd.DataFrame(data)),
+        'factor_cache': FactorCache(),
+        'strategies': {},
+    }
+    _worker_stocks[handle] = state
+    while len(_worker_stocks) > _WORKER_CACHE_SIZE:
+        _worker_stocks.popitem(last=False)
+    return state
+
+
+def _worker_strategy(handle, strategy_class, parameters):
+    state = _attach(handle)
+    strategy = state['strategies'].get(strategy_class)
+    if strategy is None:
+        strategy = strategy_class(state['stock_data'])
+        strategy.factor_cache = state['factor_cache']
+        state['strategies'][strategy_class] = strategy
+    strategy.parameters = dict(parameters)
+    return strategy
+
+
+def _search_chunk(handle, strategy_class, parameters, param_names, combinations):
+    strategy = _worker_strategy(handle, strategy_class, parameters)
+    return strategy.search_parameters(param_names, combinations)
+
+
+def evaluate_strategy(handle, strategy_class, parameters, optimize=False, opt_params={}):
+    """在子进程中执行 BaseStrategy.evaluate，返回结果字典"""
+    strategy = _worker_strategy(handle, strategy_class, parameters)
+    return strategy.evaluate(optimize=optimize, opt_params=opt_params)
+
+
+def optimize_strategy(handle, strategy_class, parameters, **kwargs):
+    """在子进程中寻优（同样写入参数 CSV），返回最佳参数"""
+    strategy = _worker_strategy(handle, strategy_class, parameters)
+    return strategy.optimize_parameters(**kwargs).parameters
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ParallelOptimizer:
+    """
+    多进程参数寻优：把参数网格切片后分发到进程池，结果按网格顺序归约，
+    与 BaseStrategy.optimize_parameters 得到相同的最佳参数并写入相同的 CSV。
+    """
+    def __init__(self, workers=None, chunks_per_worker=4):
+        """
+        :param workers: 进程数，默认为 CPU 核数
+        :param chunks_per_worker: 每个进程平均分到的网格切片数
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.executor = None
+
+    def __enter__(self):
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.executor.shutdown()
+        self.executor = None
+
+    def submit(self, shared: SharedKline, strategy, params_range=None, params_step=None):
+        """
+        提交单个策略的参数网格。
+
+        :return: 供 collect 使用的任务描述
+        """
+        strategy.set_search_space(params_range, params_step)
+        param_names, combinations = strategy.parameter_grid()
+        combinations = list(combinations)
+        size = max(1, -(-len(combinations) // (self.workers * self.chunks_per_worker)))
+        futures = [
+            self.executor.submit(_search_chunk, shared.handle, type(strategy),
+                                 strategy.parameters, param_names, chunk)
+            for chunk in _chunks(combinations, size)
+        ]
+        return strategy, strategy.parameters.copy(), futures
+
+    @staticmethod
+    def collect(task):
+        """按切片顺序归约结果，严格大于才替换，与顺序寻优的并列规则一致"""
+        strategy, initial_parameters, futures = task
+        best_profit = -np.inf
+        best_parameters = None
+        for future in futures:
+            profit, parameters = future.result()
+            if parameters is not None and profit > best_profit:
+                best_profit = profit
+                best_parameters = parameters
+        if best_parameters is None:
+            best_parameters = initial_parameters
+        return strategy.apply_parameters(best_parameters, best_profit)
+
+    def optimize(self, strategy, params_range=None, params_step=None):
+        with SharedKline(strategy.stock_data.symbol, strategy.data) as shared:
+            return self.collect(self.submit(shared, strategy, params_range, params_step))
+
+    def optimize_stocks(self, stocks, **kwargs):
+        """
+        优化多只股票的全部策略，所有股票和策略的切片同时排队，进程池始终保持满载。
+
+        :param stocks: StockInfo 的可迭代对象
+        """
+        shared_list = []
+        tasks = []
+        try:
+            for stock in stocks:
+                try:
+                    shared = SharedKline(stock.symbol, stock.stock_data.kline)
+                    shared_list.append(shared)
+                    for strategy in stock.strategies.values():
+                        tasks.append((stock.symbol, self.submit(shared, strategy, **kwargs)))
+                except Exception as e:
+                    print(f"Error processing {stock.symbol}: {e}")
+            for symbol, task in tasks:
+                try:
+                    self.collect(task)
+                except Exception as e:
+                    print(f"Error processing {symbol}: {e}")
+        finally:
+            for shared in shared_list:
+                shared.close()
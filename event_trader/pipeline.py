@@ -0,0 +1,150 @@
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from event_trader.config import PRICE_COL
+from event_trader.stock_info import StockInfo
+
+_DONE = object()
+
+# 计算阶段的执行方式，也可以直接传入 concurrent.futures 的 Executor
+EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+
+class FrameStockData:
+    """由已经下载好的K线构造的数据对象，计算阶段代替 StockData"""
+    def __init__(self, symbol, kline):
+        self.symbol = symbol
+        self.kline = kline
+
+    def __getitem__(self, key):
+        if key == '涨跌幅':
+            close = self.kline[PRICE_COL]
+            return (close.iloc[-1] - close.iloc[0]) * 100 / close.iloc[0]
+        raise KeyError(f"Key '{key}' not found")
+
+
+def compute_result(symbol, kline, strategies=None, **kwargs):
+    """
+    计算一只股票全部策略的结果，可以在子进程中执行。
+
+    :return: (symbol, 带 symbol 列的结果 DataFrame)
+    """
+    stock = StockInfo(symbol, strategies=strategies, stock_data=FrameStockData(symbol, kline))
+    df = stock.get_result(**kwargs)
+    df['symbol'] = symbol
+    return symbol, df
+
+
+class Pipeline:
+    """
+    分阶段的流水线：下载线程池 -> 有界队列 -> 计算进程池 -> 按完成顺序逐只输出。
+    下载等待网络时计算进程继续工作；队列写满时下载线程阻塞，内存中最多保留 queue_size 只股票的K线。
+    保存由调用方在消费结果时完成（例如 WriteBehindQueue 按批次写库）。
+    """
+    def __init__(self, fetch, compute=compute_result, fetch_workers=5, compute_workers=None,
+                 executor='process', queue_size=None, fetching=nullcontext):
+        """
+        :param fetch: 下载一只股票K线的函数 fetch(symbol)，返回 DataFrame
+        :param compute: 计算函数 compute(symbol, kline, **kwargs)，返回 (symbol, df)；使用进程池时必须可以序列化
+        :param fetch_workers: 下载线程数
+        :param compute_workers: 计算进程（或线程）数，默认为 CPU 核数
+        :param executor: 'process'、'thread' 或 Executor 实例（由调用方负责关闭）
+        :param queue_size: 已下载待计算的K线队列长度，默认为计算并发数的两倍
+        :param fetching: 返回上下文管理器的函数，下载阶段在其中执行，例如 StocksManager.fetching
+        """
+        if isinstance(executor, str) and executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', choose from {', '.join(EXECUTORS)}")
+        self.fetch = fetch
+        self.compute = compute
+        self.fetch_workers = fetch_workers
+        self.compute_workers = compute_workers
+        self.executor = executor
+        self.queue_size = queue_size
+        self.fetching = fetching
+
+    def run(self, symbols, **kwargs):
+        """
+        逐只输出 (symbol, df)，顺序为计算完成的顺序。下载或计算失败的股票打印错误后跳过。
+        提前结束迭代时停止下载并取消尚未开始的计算。
+
+        :param kwargs: 传给 compute 的参数
+        """
+        owned = isinstance(self.executor, str)
+        executor = EXECUTORS[self.executor](max_workers=self.compute_workers) if owned else self.executor
+        in_flight = self.compute_workers or os.cpu_count() or 1
+        fetched = queue.Queue(maxsize=self.queue_size or in_flight * 2)
+        stop = threading.Event()
+        feeder = threading.Thread(target=self._feed, args=(list(symbols), fetched, stop), name='pipeline-fetch', daemon=True)
+        feeder.start()
+
+        pending = {}
+        fetching = True
+        try:
+            while fetching or pending:
+                # 计算并发未满时继续提交；没有正在计算的任务时阻塞等待下载
+                while fetching and len(pending) < in_flight:
+                    try:
+                        item = fetched.get(block=not pending)
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        fetching = False
+                        break
+                    symbol, kline = item
+                    pending[executor.submit(self.compute, symbol, kline, **kwargs)] = symbol
+                if not pending:
+                    continue
+                done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol = pending.pop(future)
+                    try:
+                        symbol, df = future.result()
+                    except Exception as e:
+                        print(f"Error processing {symbol}: {e}")
+                        continue
+                    yield symbol, df
+        finally:
+            stop.set()
+            for future in pending:
+                future.cancel()
+            # 取出队列中的K线，让阻塞在 put 上的下载线程退出
+            while feeder.is_alive():
+                try:
+                    fetched.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            if owned:
+                executor.shutdown(cancel_futures=True)
+
+    def _feed(self, symbols, fetched, stop):
+        def _fetch(symbol):
+            if stop.is_set():
+                return
+            try:
+                kline = self.fetch(symbol)
+            except Exception as e:
+                print(f"Error processing {symbol}: {e}")
+                return
+            if kline is None or kline.empty:
+                print(f"Error processing {symbol}: no kline data")
+                return
+            while not stop.is_set():
+                try:
+                    fetched.put((symbol, kline), timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        try:
+            with self.fetching(), ThreadPoolExecutor(max_workers=self.fetch_workers) as pool:
+                for _ in pool.map(_fetch, symbols):
+                    pass
+        finally:
+            while not stop.is_set():
+                try:
+                    fetched.put(_DONE, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
@@ -0,0 +1,150 @@
+import itertools
+import math
+import numpy as np
+
+
+class GridSearch:
+    """遍历整个参数网格，与默认的 optimize_parameters 行为一致"""
+
+    def search(self, strategy, param_names, axes):
+        return strategy.search_parameters(param_names, itertools.product(*axes))
+
+
+class RandomSearch:
+    """
+    在参数网格中随机抽取 budget 组参数回测。
+    latin=True 时使用拉丁超立方抽样，使每个参数的取值在各自区间内均匀分布。
+    """
+    def __init__(self, budget=100, latin=True, seed=None):
+        self.budget = budget
+        self.latin = latin
+        self.seed = seed
+
+    def sample(self, axes):
+        """
+        :return: 网格下标组合列表，已去重并保持抽样顺序
+        """
+        rng = np.random.default_rng(self.seed)
+        total = math.prod(len(axis) for axis in axes)
+        if total <= self.budget:
+            return list(itertools.product(*(range(len(axis)) for axis in axes)))
+
+        if self.latin:
+            columns = []
+            for axis in axes:
+                strata = (rng.permutation(self.budget) + rng.random(self.budget)) / self.budget
+                columns.append(np.minimum((strata * len(axis)).astype(int), len(axis) - 1))
+            samples = [tuple(int(c[i]) for c in columns) for i in range(self.budget)]
+        else:
+            flat = rng.choice(total, size=self.budget, replace=False)
+            samples = [np.unravel_index(i, [len(axis) for axis in axes]) for i in flat]
+            samples = [tuple(int(i) for i in sample) for sample in samples]
+        return list(dict.fromkeys(samples))
+
+    def search(self, strategy, param_names, axes):
+        combinations = (_values(axes, sample) for sample in self.sample(axes))
+        return strategy.search_parameters(param_names, combinations)
+
+
+class CoarseToFineSearch:
+    """
+    由粗到细的网格搜索：先在每个参数上取 points 个等间隔的点，
+    然后在最佳点附近逐轮把步长减半，直到回到原始步长。
+    """
+    def __init__(self, points=5):
+        self.points = points
+
+    def search(self, strategy, param_names, axes):
+        sizes = [len(axis) for axis in axes]
+        strides = [max(1, math.ceil(size / self.points)) for size in sizes]
+        ranges = [range(0, size, stride) for size, stride in zip(sizes, strides)]
+        evaluated = set()
+        best_profit = -np.inf
+        best_parameters = None
+        best_index = None
+
+        while True:
+            for index in itertools.product(*ranges):
+                if index in evaluated:
+                    continue
+                evaluated.add(index)
+                profit = strategy.evaluate_parameters(param_names, _values(axes, index))
+                if profit is not None and profit > best_profit:
+                    best_profit = profit
+                    best_parameters = strategy.parameters.copy()
+                    best_index = index
+            if best_index is None or all(stride == 1 for stride in strides):
+                break
+            # 在最佳点左右各一个旧步长的范围内，以减半后的步长继续搜索
+            ranges = [
+                range(max(0, center - stride), min(size, center + stride + 1), max(1, stride // 2))
+                for center, stride, size in zip(best_index, strides, sizes)
+            ]
+            strides = [max(1, stride // 2) for stride in strides]
+        return best_profit, best_parameters
+
+
+class SuccessiveHalving:
+    """
+    逐级淘汰：先在较短的近期历史上回测大量候选参数，每一轮只保留前 1/eta，
+    并把回测历史按 eta 倍加长，最后一轮使用完整历史。
+    """
+    def __init__(self, candidates=81, eta=3, min_bars=60, seed=None):
+        """
+        :param candidates: 初始候选参数组数，从网格中随机抽取
+        :param eta: 每轮保留 1/eta 的候选
+        :param min_bars: 最短回测历史
+        """
+        self.candidates = candidates
+        self.eta = eta
+        self.min_bars = min_bars
+        self.seed = seed
+
+    def search(self, strategy, param_names, axes):
+        samples = RandomSearch(budget=self.candidates, seed=self.seed).sample(axes)
+        candidates = [_values(axes, sample) for sample in samples]
+        length = len(strategy.data)
+        rounds = max(0, math.ceil(math.log(max(len(candidates), 1), self.eta)))
+
+        for rung in range(rounds):
+            bars = max(self.min_bars, int(length / self.eta ** (rounds - rung)))
+            if bars >= length or len(candidates) <= 1:
+                break
+            with strategy.recent_history(bars):
+                scores = [strategy.evaluate_parameters(param_names, c) for c in candidates]
+            ranked = sorted(
+                (i for i, score in enumerate(scores) if score is not None),
+                key=lambda i: -scores[i]
+            )
+            keep = max(1, math.ceil(len(candidates) / self.eta))
+            candidates = [candidates[i] for i in sorted(ranked[:keep])]
+
+        return strategy.search_parameters(param_names, candidates)
+
+
+SEARCHES = {
+    'grid': GridSearch,
+    'random': RandomSearch,
+    'coarse': CoarseToFineSearch,
+    'halving': SuccessiveHalving,
+}
+
+
+def make_search(name, budget=None):
+    """
+    根据名称创建搜索策略。
+
+    :param name: grid/random/coarse/halving
+    :param budget: random 的回测次数或 halving 的初始候选数
+    """
+    if name not in SEARCHES:
+        raise ValueError(f"Unknown search '{name}', choose from {', '.join(SEARCHES)}")
+    if budget is None or name in ('grid', 'coarse'):
+        return SEARCHES[name]()
+    if name == 'random':
+        return RandomSearch(budget=budget)
+    return SuccessiveHalving(candidates=budget)
+
+
+def _values(axes, index):
+    return tuple(axis[i] for axis, i in zip(axes, index))
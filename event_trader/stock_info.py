@@ -1,16 +1,57 @@
 from event_trader.strategies import BaseStrategy, STRATEGIES
-from china_stock_data import StockData
-from event_trader.utils import get_first_line
+from event_trader.utils import get_first_line, upsert_bar
+from event_trader.config import DATE_COL
+from event_trader.factor_cache import FactorCache
+from event_trader.instrumentation import timed
+from event_trader.kline_store import KlineStore
+from event_trader.data_source import DataSource, LiveDataSource
+from event_trader.parallel_optimizer import SharedKline, evaluate_strategy, optimize_strategy
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 import pandas as pd
 
+# 策略并发执行的方式，也可以直接传入 concurrent.futures 的 Executor
+EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
 class StockInfo:
-    def __init__(self, symbol: str, stock_kwargs = {}, strategies = None):
+    """
+    一只股票及其全部策略。
+
+    executor 不为 None 时 get_result 和 optmize 并发执行各策略，结果始终按 self.strategies 的顺序合并。
+    并发时每个策略只能修改自己的 data 因子列、parameters、account、last_status 和 length；
+    K线的基础列由所有策略只读共享，factor_cache 在线程之间共享（读写有锁）。
+    使用进程池时策略在子进程中计算，主进程的策略对象只更新 parameters 和 last_status，
+    account 置为 None，data 中的因子列不会更新，需要时调用 item.calculate()。
+    """
+    def __init__(self, symbol: str, stock_kwargs = {}, strategies = None, stock_data = None, store: KlineStore = None,
+                 executor = None, workers = None, data_source: DataSource = None):
+        """
+        :param data_source: 没有传入 stock_data 时从中获取数据对象，默认为 LiveDataSource(store, stock_kwargs)
+        :param executor: None（顺序执行）、'thread'、'process' 或 concurrent.futures.Executor 实例，
+            传入实例时由调用方负责关闭，可以在多只股票之间复用
+        :param workers: executor 为字符串时每次创建的线程或进程数，默认为策略数
+        """
+        if isinstance(executor, str) and executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', choose from {', '.join(EXECUTORS)}")
         self.symbol = symbol
-        self.stock_data = StockData(symbol, **stock_kwargs)
+        self.executor = executor
+        self.workers = workers
+        # stock_data 可以传入已有的数据对象（需要提供 symbol 和 kline），否则从 data_source 获取，默认使用 StockData
+        # 传入 store 时从本地列存储内存映射读取K线，只在数据过期时通过 StockData 追加新K线
+        if stock_data is None:
+            stock_data = (data_source or LiveDataSource(store, stock_kwargs)).stock_data(symbol)
+        self.stock_data = stock_data
         self.strategies: dict[str, BaseStrategy] = {}
+        # 同一只股票的所有策略共享因子缓存
+        self.factor_cache = FactorCache()
+        self.incremental = False
+        # 已经计算过结果的 StockInfo 再次计算前需要重新读取K线
+        self.evaluated = False
         strategies = strategies if strategies is not None else STRATEGIES
         for strategy_class in strategies:
-            self.strategies[strategy_class.name] = strategy_class(self.stock_data)
+            strategy = strategy_class(self.stock_data)
+            strategy.factor_cache = self.factor_cache
+            self.strategies[strategy_class.name] = strategy
             
     def __getattr__(self, key: str):
         if key in self.strategies:
@@ -23,28 +64,90 @@ class StockInfo:
             item.show(**kwargs)
             
     def optmize(self, **kwargs):
-        for key, item in self.strategies.items():
-                item.optimize_parameters(**kwargs)
-            
-    def get_result(self, optimize = False, strategy = None, opt_params = {},  **kwargs):
-        arr = []
+        items = list(self.strategies.values())
+        results = self._map(items, lambda item: item.optimize_parameters(**kwargs).parameters,
+                            partial(optimize_strategy, **kwargs))
+        for item, parameters in zip(items, results):
+            if item.parameters is not parameters:
+                item.parameters = parameters
+                item.account = None
+
+    def walk_forward(self, strategy = None, **kwargs):
+        """
+        对各策略做滚动窗口寻优，不改变当前参数。
+
+        :param kwargs: BaseStrategy.walk_forward 的参数
+        :return: 所有策略的窗口结果，name 列为策略名称
+        """
+        frames = []
         for key, item in self.strategies.items():
             if strategy is not None and key != strategy:
                 continue
+            frame = item.walk_forward(**kwargs)
+            frame.insert(0, 'name', key)
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _map(self, items, local, remote):
+        """
+        对每个策略执行 local(item)，使用进程池时改为在子进程中执行 remote(handle, 策略类, 参数)。
+        返回值与 items 的顺序一致，与完成的先后无关。
+        """
+        if self.executor is None or len(items) == 0:
+            return [local(item) for item in items]
+        owned = isinstance(self.executor, str)
+        executor = EXECUTORS[self.executor](max_workers=self.workers or len(items)) if owned else self.executor
+        try:
+            if isinstance(executor, ProcessPoolExecutor):
+                # 使用策略已经读取的K线，不再通过 stock_data 重新获取
+                kline = items[0].data[items[0].kline_columns]
+                with SharedKline(self.symbol, kline) as shared:
+                    futures = [executor.submit(remote, shared.handle, type(item), item.parameters) for item in items]
+                    return [future.result() for future in futures]
+            futures = [executor.submit(local, item) for item in items]
+            return [future.result() for future in futures]
+        finally:
+            if owned:
+                executor.shutdown()
             
-            if optimize:
-                item.optimize_parameters(**opt_params)
-            account = item.calculate()
-            
+    def reload(self):
+        """重新读取各策略的K线，复用 StockInfo 时保证使用最新数据，旧K线的因子缓存一并清空"""
+        self.factor_cache.clear()
+        for item in self.strategies.values():
+            item.data = item.load_data()
+            item.account = None
+        self.incremental = False
+
+    @timed('stock')
+    def get_result(self, optimize = False, strategy = None, opt_params = {},  **kwargs):
+        """
+        单次遍历计算各策略的结果：因子只计算一次，最新状态在回测时记录，不再重复判断最后一根K线。
+        """
+        if self.evaluated:
+            self.reload()
+        stock_profit = self.stock_data['涨跌幅']
+
+        items = [item for key, item in self.strategies.items() if strategy is None or key == strategy]
+        outcomes = self._map(items, lambda item: item.evaluate(optimize, opt_params),
+                             partial(evaluate_strategy, optimize=optimize, opt_params=opt_params))
+        remote = isinstance(self.executor, ProcessPoolExecutor) or self.executor == 'process'
+
+        arr = []
+        for item, record in zip(items, outcomes):
+            if remote:
+                item.parameters = record['parameters']
+                item.last_status = record['status']
+                item.account = None
             arr.append({
-                "name": key,
-                "description": get_first_line(item.__doc__),
-                "parameters": item.parameters,
-                'status': item.status(),
-                'stock_profit': self.stock_data['涨跌幅'],
-                'profit': account.get_profit(),
-                'factors': item.factors_value(),
+                "name": item.name,
+                "description": record['description'],
+                "parameters": record['parameters'],
+                'status': record['status'],
+                'stock_profit': stock_profit,
+                'profit': record['profit'],
+                'factors': record['factors'],
             })
+        self.evaluated = True
         return pd.DataFrame(arr)
     
     def get_status(self, strategy = None, opt_params = {},  **kwargs):
@@ -64,6 +167,27 @@ class StockInfo:
             })
         return pd.DataFrame(arr)
 
-        
-        
-   
\ No newline at end of file
+    @timed('update_bar')
+    def update_bar(self, bar: dict):
+        """
+        增量模式：追加或替换最新一根K线，只更新最后一行的因子并返回各策略的最新状态。
+        第一次调用时完整计算一遍因子，之后每次只需 O(window) 的计算。
+
+        :param bar: 新K线的列值，日期与最后一根K线相同则替换（盘中刷新），否则追加
+        :return: {策略名称: 状态}
+        """
+        # 每个策略有独立的因子 DataFrame；外部传入的策略可能共用同一个，每个 DataFrame 只更新一次
+        frames = {id(item.data): item.data for item in self.strategies.values()}
+        for kline in frames.values():
+            upsert_bar(kline, bar, DATE_COL)
+
+        statuses = {}
+        for key, item in self.strategies.items():
+            if self.incremental:
+                item.update_factors()
+            else:
+                item.length = len(item.data)
+                item.calculate_factors()
+            statuses[key] = item.status()
+        self.incremental = True
+        return statuses
@@ -1,9 +1,16 @@
-from event_trader.stock_info import StockInfo
+from event_trader.stock_info import StockInfo, EXECUTORS
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from .base_stocks import BaseStocks
 from .utils import generate_short_md5
-import matplotlib.pyplot as plt
+from .parallel_optimizer import ParallelOptimizer
+from .panel import panel_result
+from .pipeline import Pipeline
+from .instrumentation import timed, timer
+from .data_source import DataSource, LiveDataSource
+from .fetcher import RateLimitedFetcher
+from contextlib import nullcontext
+import threading
 import time
 
 def execute_in_threads(iterable, func, max_workers=5):
@@ -31,30 +38,93 @@ def execute_normal(iterable, func, timespan = 1):
     return results
 
 
+def _callback_name(callback):
+    return getattr(callback, '__qualname__', type(callback).__name__).split('.<locals>')[0]
+
+
 class StocksManager(BaseStocks):
-    def __init__(self, symbols=None, index=None, start=None, limit=None, **kwargs):
+    def __init__(self, symbols=None, index=None, start=None, limit=None, store=None, fetcher: RateLimitedFetcher = None,
+                 data_source: DataSource = None, executor=None, workers=None, **kwargs):
+        """
+        :param store: KlineStore，传入时各股票从本地列存储读取K线
+        :param data_source: 成分股列表和K线的来源，例如回放本地快照的 SnapshotDataSource，默认为 LiveDataSource(store)
+        :param fetcher: RateLimitedFetcher，传入时下载K线的请求受其限速、重试和连接池管理，
+            请求并发由 fetcher 控制，与计算线程数无关
+        :param executor: 各股票并发执行策略的方式，见 StockInfo；为 'thread' 或 'process' 时只创建一个线程池或进程池，
+            由所有股票共享，用完后调用 close() 关闭
+        :param workers: executor 为字符串时创建的线程或进程数
+        """
+        if isinstance(executor, str) and executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', choose from {', '.join(EXECUTORS)}")
         file_path = generate_short_md5(f'{str(symbols)}-{str(index)}') + '.json'
-        super().__init__(symbols=symbols, file_path=file_path, index=index, start=start, limit=limit, **kwargs)
+        super().__init__(symbols=symbols, file_path=file_path, index=index, start=start, limit=limit, data_source=data_source, **kwargs)
         self.stocks = {}
+        self.store = store
+        self.data_source = data_source or LiveDataSource(store)
+        self.fetcher = fetcher
         self.callbacks = []
+        self.executor = executor
+        self.workers = workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
         
     def add_callback(self, callback):
-        """添加回调函数"""
+        """添加回调函数，每只股票计算完成后调用 callback(df, symbol, manager)"""
         self.callbacks.append(callback)
 
+    def run_callbacks(self, df, symbol):
+        for callback in self.callbacks:
+            with timer('callback', _callback_name(callback)):
+                callback(df, symbol, self)
+
     def get_stock_info(self, symbol, **kwargs):
         if symbol not in self.symbols:
             self.symbols.append(symbol)
         if symbol in self.stocks:
             return self.stocks[symbol]
             
-        self.stocks[symbol] = StockInfo(symbol, **kwargs)
+        if 'executor' not in kwargs:
+            kwargs['executor'] = self.strategy_executor()
+        self.stocks[symbol] = StockInfo(symbol, data_source=self.data_source, **kwargs)
         return  self.stocks[symbol]
+
+    def strategy_executor(self):
+        """
+        传给各 StockInfo 的 executor，executor 为字符串时在第一次使用时创建线程池或进程池。
+        各股票在线程中计算，进程池需要在启动这些线程之前由主线程调用本方法创建，
+        先启动子进程，避免在多线程运行时 fork 子进程导致死锁。
+        """
+        if not isinstance(self.executor, str):
+            return self.executor
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = EXECUTORS[self.executor](max_workers=self.workers)
+                if isinstance(self._pool, ProcessPoolExecutor):
+                    self._pool.submit(int).result()
+        return self._pool
+
+    def close(self):
+        """关闭共享的线程池或进程池"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
+    def fetching(self):
+        """with 块内的数据下载经过 self.fetcher，没有 fetcher 时不做任何处理"""
+        return self.fetcher.patch_requests() if self.fetcher is not None else nullcontext()
+
     def show(self, **kwargs):
         def _show(symbol):
             stock = self.get_stock_info(symbol)
             stock.show(**kwargs)
+        self.strategy_executor()
         execute_in_threads(self.symbols, _show)
 
     def merge_dataframes(self, dataframes):
@@ -65,19 +135,26 @@ class StocksManager(BaseStocks):
             print("No data to merge.")
             return pd.DataFrame()
 
-    def get_result(self, **kwargs):
+    def get_result(self, reuse=True, **kwargs):
+        """
+        计算所有股票的策略结果。
+
+        :param reuse: 为 True 时复用 self.stocks 中已创建的 StockInfo 和策略对象，只重新读取K线
+        """
         dataframes = []
         def _get_result(symbol):
-            stock = StockInfo(symbol)
+            stock = self.get_stock_info(symbol) if reuse else StockInfo(symbol, data_source=self.data_source,
+                                                                         executor=self.strategy_executor())
             df = stock.get_result(**kwargs)
             df['symbol'] = symbol
             
-            for callback in self.callbacks:
-                callback(df, symbol, self)
+            self.run_callbacks(df, symbol)
                 
             return df
 
-        results = execute_in_threads(self.symbols, _get_result)
+        self.strategy_executor()
+        with self.fetching():
+            results = execute_in_threads(self.symbols, _get_result)
         # 处理结果
         for df in results:
             if df is not None:
@@ -88,12 +165,79 @@ class StocksManager(BaseStocks):
         self.result = result_df
         return result_df
 
-    def optimize(self):
-        def _optimize(symbol):
-            stock = self.get_stock_info(symbol)
-            stock.optmize()
-        execute_in_threads(self.symbols, _optimize)
-        
+    def iter_results(self, fetch_workers=5, compute_workers=None, executor='process', strategies=None, **kwargs):
+        """
+        流水线模式：下载、计算和保存分阶段并发执行，每只股票计算完成后立即输出带 symbol 列的结果。
+        下载线程数与计算进程数分别配置，每只股票的结果先交给回调（保存），再由生成器返回；
+        不合并结果。
+
+        :param fetch_workers: 下载K线的线程数
+        :param compute_workers: 计算的进程数，默认为 CPU 核数
+        :param executor: 计算阶段使用 'process' 或 'thread'，见 Pipeline
+        :param strategies: 策略类列表，默认为全部内置策略
+        :param kwargs: 传给 StockInfo.get_result 的参数
+        """
+        pipeline = Pipeline(self.fetch_kline, fetch_workers=fetch_workers, compute_workers=compute_workers,
+                            executor=executor, fetching=self.fetching)
+        for symbol, df in pipeline.run(self.symbols, strategies=strategies, **kwargs):
+            self.run_callbacks(df, symbol)
+            yield df
+
+    @timed('fetch')
+    def fetch_kline(self, symbol):
+        """从 data_source 读取一只股票的K线"""
+        return self.data_source.stock_data(symbol).kline
+
+    def load_klines(self):
+        """并发读取所有股票的K线，返回 {symbol: kline}"""
+        with self.fetching():
+            return dict(execute_in_threads(self.symbols, lambda symbol: (symbol, self.fetch_kline(symbol))))
+
+    def get_panel_result(self, strategies=None):
+        """
+        面板模式：把整个指数的K线放入 (K线数, 股票数) 的数组，一次计算所有股票的策略结果。
+        返回与 get_result 相同列的 DataFrame，回调的调用方式也相同。
+
+        :param strategies: 策略类列表，默认为全部内置策略
+        """
+        klines = self.load_klines()
+        # 保持 symbols 的顺序
+        result_df = panel_result({symbol: klines[symbol] for symbol in self.symbols if symbol in klines}, strategies)
+        if not result_df.empty:
+            for symbol, df in result_df.groupby('symbol', sort=False):
+                self.run_callbacks(df.reset_index(drop=True), symbol)
+        self.result = result_df
+        return result_df
+
+    def optimize(self, workers=None, **kwargs):
+        """
+        优化所有股票的策略参数。
+
+        :param workers: 为 None 时使用线程池逐个策略寻优；否则使用该数量的进程切分参数网格，0 表示使用全部 CPU 核
+        :param kwargs: 线程池寻优时传给 optimize_parameters 的参数，例如 search
+        """
+        if workers is None:
+            def _optimize(symbol):
+                stock = self.get_stock_info(symbol)
+                stock.optmize(**kwargs)
+            self.strategy_executor()
+            with self.fetching():
+                execute_in_threads(self.symbols, _optimize)
+            return
+
+        with ParallelOptimizer(workers=workers or None) as optimizer, self.fetching():
+            optimizer.optimize_stocks(self.iter_stock_infos())
+
+    def iter_stock_infos(self):
+        """逐个返回各股票的 StockInfo，创建失败（例如读取K线出错）的股票打印错误后跳过"""
+        for symbol in list(self.symbols):
+            try:
+                stock = self.get_stock_info(symbol)
+            except Exception as e:
+                print(f"Error processing {symbol}: {e}")
+                continue
+            yield stock
+
     def __getitem__(self, symbol):
         return self.get_stock_info(symbol)
     
@@ -107,6 +251,7 @@ class StocksManager(BaseStocks):
             
     def evaluate_strategy_profits(self, **kwargs):
         """评估各策略的平均盈利并绘制图表"""
+        import matplotlib.pyplot as plt
         if not hasattr(self, 'result'):
             self.get_result(**kwargs)
             
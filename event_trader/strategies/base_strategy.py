@@ -1,13 +1,51 @@
 import os
+import functools
+from contextlib import contextmanager
 import pandas as pd
 from abc import ABC, abstractmethod
-from event_trader.demo_account import DemoAccount
-from event_trader.config import DATE_COL, SYMBOL_COL, CURRENT_DAYS
-from event_trader.utils import friendly_number
+from event_trader.demo_account import DemoAccount, simulate_profits
+from event_trader.factor_cache import FactorCache
+from event_trader.config import DATE_COL, PRICE_COL, SYMBOL_COL, CURRENT_DAYS
+from event_trader.utils import friendly_number, get_first_line
+from event_trader.instrumentation import recorder, timed, timer, strategy_key
 import numpy as np
-import mplfinance as mpf
+
+def _timed_factors(func):
+    """按策略计时 calculate_factors，子类通过 super() 调用父类的实现时只计外层的一次"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not recorder.enabled or self._timing_factors:
+            return func(self, *args, **kwargs)
+        self._timing_factors = True
+        try:
+            with timer('factors', self.name):
+                return func(self, *args, **kwargs)
+        finally:
+            self._timing_factors = False
+    return wrapper
+
+
+class _FrameColumns:
+    """按列名取出 DataFrame 列的 numpy 数组，作为 signal_rules 的 data"""
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __getitem__(self, column):
+        return self.frame[column].to_numpy()
+
 
 class BaseStrategy(ABC):
+    # 为 False 时强制使用逐行回测
+    vectorized = True
+    # calculate_factors 正在计时，嵌套调用不再重复计时
+    _timing_factors = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 各子类实现的 calculate_factors 统一按策略计时
+        if 'calculate_factors' in cls.__dict__:
+            cls.calculate_factors = _timed_factors(cls.calculate_factors)
+
     def __init__(self, stock_data, sub_path, params, params_range, params_step, factors = []):
         self.stock_data = stock_data
         self.data = self.load_data()
@@ -16,20 +54,105 @@ class BaseStrategy(ABC):
         self.params_range = params_range
         self.params_step = params_step
         self.account = None
+        # 最近一次回测时最后一根K线的信号，与 status() 的结果相同
+        self.last_status = None
         self.parameters = {}
         self.factors = factors
+        self.factor_cache = FactorCache()
         self.load_parameters(self.params)
     
     def calculate(self):
         self.calculate_factors()
         self.account = self.calculate_profit()
         return self.account
+
+    def evaluate(self, optimize=False, opt_params={}):
+        """
+        单次遍历：可选的参数寻优、计算因子、回测并收集结果。
+        只修改本策略自己的 data 因子列、parameters、account 和 last_status，可以与同一只股票的其他策略并发执行。
+
+        各阶段的耗时由 optimize_parameters、calculate_factors 和 calculate_profit 记录在 recorder 中。
+
+        :return: 结果字典，不含股票涨跌幅
+        """
+        if optimize:
+            self.optimize_parameters(**opt_params)
+        self.calculate_factors()
+        self.account = self.calculate_profit()
+        return {
+            "name": self.name,
+            "description": get_first_line(self.__doc__),
+            "parameters": self.parameters,
+            'status': self.last_status,
+            'profit': self.account.get_profit(),
+            'factors': self.factors_value(),
+        }
     
+    @timed('load', strategy_key)
     def load_data(self):
-        data = self.stock_data.kline
+        data = self.factor_frame(self.stock_data.kline)
         self.length = len(data)
+        # 读取的K线列，其余为因子列
+        self.kline_columns = list(data.columns)
         return data
 
+    @staticmethod
+    def factor_frame(kline: pd.DataFrame) -> pd.DataFrame:
+        """
+        为策略创建独立的 DataFrame：K线的基础列直接引用原数组（不复制），因子列只写入这个 DataFrame，
+        同一只股票的多个策略不会互相覆盖同名因子，也不会让每一行带上其他策略的列。
+        """
+        columns = {column: kline[column].to_numpy() for column in kline.columns}
+        return pd.DataFrame(columns, index=kline.index, copy=False)
+
+    def sma(self, column, window):
+        """从因子缓存中获取 column 列的简单移动平均"""
+        return self.factor_cache.sma(self.stock_data.symbol, self.data[column], window)
+
+    def rolling_std(self, column, window):
+        """从因子缓存中获取 column 列的滚动标准差"""
+        return self.factor_cache.rolling_std(self.stock_data.symbol, self.data[column], window)
+
+    def ewm(self, column, span):
+        """从因子缓存中获取 column 列的指数移动平均"""
+        return self.factor_cache.ewm(self.stock_data.symbol, self.data[column], span)
+
+    def rolling_min(self, column, window):
+        """从因子缓存中获取 column 列包含当前K线的 window 根K线最小值，数据不足 window 根时取已有K线"""
+        return self.factor_cache.rolling_min(self.stock_data.symbol, self.data[column], window)
+
+    def rolling_max(self, column, window):
+        """从因子缓存中获取 column 列包含当前K线的 window 根K线最大值，数据不足 window 根时取已有K线"""
+        return self.factor_cache.rolling_max(self.stock_data.symbol, self.data[column], window)
+
+    def update_factors(self):
+        """
+        增量模式：只重新计算最后一根K线的因子，之前各行的因子保持不变。
+        追加或替换最新K线后调用，默认回退为完整的 calculate_factors，子类可以覆盖为 O(window) 的实现。
+        """
+        self.length = len(self.data)
+        self.calculate_factors()
+
+    def window_values(self, column, window, end=None):
+        """
+        返回以第 end 行（默认最后一行）结尾、长度为 window 的 numpy 数组，数据不足时返回 None。
+        """
+        stop = len(self.data) if end is None else end + 1
+        if window <= 0 or window > stop:
+            return None
+        return self.data[column].to_numpy()[stop - window:stop]
+
+    def window_mean(self, column, window, end=None):
+        """与 rolling(window).mean() 在第 end 行的取值相同"""
+        values = self.window_values(column, window, end)
+        return np.nan if values is None else values.mean()
+
+    def set_last(self, **values):
+        """写入最后一根K线的因子值"""
+        label = self.data.index[-1]
+        for column, value in values.items():
+            self.data.at[label, column] = value
+
     def check_params_exists(self):
         """检查self.params_path文件是否存在"""
         return os.path.exists(self.params_path)
@@ -52,13 +175,21 @@ class BaseStrategy(ABC):
         df = pd.DataFrame({name: [value] for name, value in self.parameters.items()})
         df.to_csv(self.params_path, index=False)
 
-    def calculate_profit(self) -> DemoAccount:
-        account = DemoAccount(initial_cash=1000000)  # 初始化DemoAccount实例
-        for index, row in self.data.iterrows():
-            if self.buy_signal(row, index):
-                account.buy(row, index)
-            elif self.sell_signal(row, index):
-                account.sell(row, index)
+    @timed('backtest', strategy_key)
+    def calculate_profit(self, ledger='list', start=0) -> DemoAccount:
+        """
+        回测当前参数。
+
+        :param ledger: DemoAccount 的交易记录方式，参数寻优时使用 profit 不记录明细
+        :param start: 从第 start 行开始交易，之前的K线只用于计算因子（预热）
+        """
+        signals = self.generate_signals() if self.vectorized else None
+        if signals is None:
+            account = self._replay_rows(ledger, start)
+        else:
+            buy, sell = signals
+            account = self._replay_signals(buy[start:], sell[start:], ledger=ledger, start=start)
+            self.last_status = self._signal_status(len(buy) and buy[-1], len(sell) and sell[-1])
 
         # 检查是否还有未卖出的股票
         for symbol, shares in account.holdings.items():
@@ -70,23 +201,104 @@ class BaseStrategy(ABC):
                     account.sell(last_row, last_index, position=1.0)
 
         return account
-    
+
+    def _replay_rows(self, ledger='list', start=0) -> DemoAccount:
+        """逐行调用 buy_signal/sell_signal 进行回测，兼容未实现 generate_signals 的策略"""
+        account = DemoAccount(initial_cash=1000000, ledger=ledger)  # 初始化DemoAccount实例
+        buy = sell = False
+        for index, row in self.data.iloc[start:].iterrows():
+            buy = self.buy_signal(row, index)
+            sell = False
+            if buy:
+                account.buy(row, index)
+            else:
+                sell = self.sell_signal(row, index)
+                if sell:
+                    account.sell(row, index)
+        self.last_status = self._signal_status(buy, sell)
+        return account
+
+    @staticmethod
+    def _signal_status(buy, sell):
+        if buy:
+            return "Buy"
+        if sell:
+            return "Sell"
+        return 'None'
+
+    def _replay_signals(self, buy, sell, ledger='list', start=0) -> DemoAccount:
+        """按向量化的买卖信号回放交易，只访问有信号的行，信号从第 start 行开始"""
+        account = DemoAccount(initial_cash=1000000, ledger=ledger)
+        buy = np.asarray(buy, dtype=bool)
+        sell = np.asarray(sell, dtype=bool)
+        columns = [col for col in (SYMBOL_COL, PRICE_COL, DATE_COL) if col in self.data.columns]
+        values = {col: self.data[col].to_numpy() for col in columns}
+        labels = self.data.index
+        for i in np.flatnonzero(buy | sell) + start:
+            row = {col: values[col][i] for col in columns}
+            if buy[i - start]:
+                account.buy(row, labels[i])
+            else:
+                account.sell(row, labels[i])
+        return account
+
+    def generate_signals(self):
+        """
+        向量化计算全部K线的买卖信号，规则由 signal_rules 定义。
+
+        :return: (buy, sell) 两个与 self.data 等长的布尔数组；返回 None 时回退到逐行的 buy_signal/sell_signal
+        """
+        return self.signal_rules(_FrameColumns(self.data), np.arange(len(self.data)), self.parameters)
+
+    @staticmethod
+    def signal_rules(data, index, parameters):
+        """
+        向量化的买卖规则，单只股票的 generate_signals 和整个指数的面板模式共用。
+
+        :param data: 列名到数组的映射，包含K线列和 calculate_factors 计算的因子列，
+            数组为 (K线数,)，或面板中的 (K线数, 股票数)
+        :param index: 各元素的K线序号，可以广播到 data 中数组的形状
+        :param parameters: 策略参数，面板中每个参数是每只股票一个值的数组
+        :return: (buy, sell) 两个与 data 中数组形状相同的布尔数组，不支持时返回 None
+        """
+        return None
+
     def validate_parameter(self, parameters):
         return True
         
-    def optimize_parameters(self, params_range=None, params_step=None):
-        
+    @timed('optimize', strategy_key)
+    def optimize_parameters(self, params_range=None, params_step=None, search=None):
+        """
+        参数寻优。
+
+        :param search: 搜索策略（见 event_trader.search），为 None 时遍历整个参数网格
+        """
+        self.set_search_space(params_range, params_step)
+        initial_parameters = self.parameters.copy()
+        if search is None:
+            param_names, combinations = self.parameter_grid()
+            best_profit, best_parameters = self.search_parameters(param_names, combinations)
+        else:
+            param_names, axes = self.parameter_axes()
+            best_profit, best_parameters = search.search(self, param_names, axes)
+        if best_parameters is None:
+            best_parameters = initial_parameters
+        return self.apply_parameters(best_parameters, best_profit)
+
+    def set_search_space(self, params_range=None, params_step=None):
         if params_range is not None:
             self.params_range = {**self.params_range, **params_range}
         if params_step is not None:
             self.params_step = {**self.params_step, **params_step}
         else:
             self.params_step = {param: 1 for param in self.params_range}  # 默认步长为 1
-        
-        best_profit = -np.inf
-        best_parameters = self.parameters.copy()
-        
-        import itertools
+
+    def parameter_axes(self):
+        """
+        根据 params_range/params_step 生成每个参数的取值。
+
+        :return: (参数名列表, 每个参数的取值数组列表)
+        """
         param_names = list(self.params_range.keys())
         param_ranges = [
             np.arange(self.params_range[param][0], 
@@ -94,25 +306,127 @@ class BaseStrategy(ABC):
                     self.params_step.get(param, 1))  # 使用 np.arange 来支持浮点数
             for param in param_names
         ]
-        
-        for param_combination in itertools.product(*param_ranges):
-            # 更新参数
-            for i, param_name in enumerate(param_names):
-                self.parameters[param_name] = param_combination[i]
-            
-            if self.validate_parameter(self.parameters):
-                # 计算因子和利润
-                account = self.calculate()
-                profit = account.get_profit()
-                # 更新最佳参数
-                if profit > best_profit:
-                    best_profit = profit
-                    best_parameters = self.parameters.copy()
-                    self.account = account
-        
-        # 更新为最佳参数
-        self.parameters = best_parameters
-        print(f"Optimized parameters: {self.parameters}, Profit = {best_profit}")
+        return param_names, param_ranges
+
+    def parameter_grid(self):
+        """
+        根据 params_range/params_step 生成参数网格。
+
+        :return: (参数名列表, 参数组合的迭代器)
+        """
+        import itertools
+        param_names, param_ranges = self.parameter_axes()
+        return param_names, itertools.product(*param_ranges)
+
+    def set_parameters(self, param_names, param_combination):
+        """设置一组参数，返回参数是否有效"""
+        for i, param_name in enumerate(param_names):
+            self.parameters[param_name] = param_combination[i]
+        return self.validate_parameter(self.parameters)
+
+    def evaluate_parameters(self, param_names, param_combination):
+        """
+        回测一组参数。
+
+        :return: 利润，参数无效时返回 None
+        """
+        if not self.set_parameters(param_names, param_combination):
+            return None
+        # 计算因子和利润，寻优时不需要交易明细
+        self.calculate_factors()
+        return self.calculate_profit(ledger='profit').get_profit()
+
+    def search_parameters(self, param_names, combinations):
+        """
+        依次回测参数组合，支持向量化信号的策略整批回测。
+
+        :return: (最佳利润, 最佳参数)，没有有效组合时最佳参数为 None
+        """
+        if self.vectorized:
+            combinations = [c for c in combinations if self.set_parameters(param_names, c)]
+            profits = self.batch_profits(param_names, combinations)
+            if profits is not None:
+                if not len(profits):
+                    return -np.inf, None
+                best = int(np.argmax(profits))
+                self.set_parameters(param_names, combinations[best])
+                return profits[best], self.parameters.copy()
+
+        best_profit = -np.inf
+        best_parameters = None
+        for param_combination in combinations:
+            profit = self.evaluate_parameters(param_names, param_combination)
+            # 更新最佳参数
+            if profit is not None and profit > best_profit:
+                best_profit = profit
+                best_parameters = self.parameters.copy()
+        return best_profit, best_parameters
+
+    def batch_profits(self, param_names, combinations, batch_size=256):
+        """
+        用 simulate_profits 整批回测多组参数。
+
+        :return: 与 combinations 等长的利润数组，策略不支持向量化信号时返回 None
+        """
+        prices = self.data[PRICE_COL].to_numpy()
+        profits = []
+        for start in range(0, len(combinations), batch_size):
+            signals = self.signal_matrix(param_names, combinations[start:start + batch_size])
+            if signals is None:
+                return None
+            profits.append(simulate_profits(prices, *signals))
+        return np.concatenate(profits) if profits else np.array([])
+
+    def signal_matrix(self, param_names, combinations):
+        """
+        生成多组参数的买卖信号矩阵。
+        默认逐组计算因子并调用 generate_signals，子类可以覆盖为一次性的向量化实现。
+
+        :return: 两个 (参数组数, K线数) 的布尔矩阵，不支持向量化信号时返回 None
+        """
+        buy = np.zeros((len(combinations), len(self.data)), dtype=bool)
+        sell = np.zeros((len(combinations), len(self.data)), dtype=bool)
+        for row, param_combination in enumerate(combinations):
+            self.set_parameters(param_names, param_combination)
+            self.calculate_factors()
+            signals = self.generate_signals()
+            if signals is None:
+                return None
+            buy[row], sell[row] = signals
+        return buy, sell
+
+    def recent_history(self, bars):
+        """临时只使用最近 bars 根K线，供逐级淘汰等搜索在较短历史上快速评估"""
+        return self.history_window(max(0, len(self.data) - bars), len(self.data))
+
+    @contextmanager
+    def history_window(self, start, stop):
+        """
+        临时只使用第 start 到 stop（不含）行K线，供滚动窗口寻优等在一段历史上评估。
+        截取期间使用独立的因子缓存，截取的历史用完即弃，其因子不占用共享缓存的容量。
+        """
+        full_data, factor_cache = self.data, self.factor_cache
+        self.data = full_data.iloc[start:stop].reset_index(drop=True)
+        self.factor_cache = FactorCache()
+        try:
+            yield self.data
+        finally:
+            self.data, self.factor_cache = full_data, factor_cache
+
+    def walk_forward(self, params_range=None, params_step=None, **kwargs):
+        """
+        滚动窗口寻优，报告每个窗口的样本外利润，不改变当前参数。
+
+        :param kwargs: WalkForward 的参数，例如 train、test、step、executor
+        :return: 每个窗口一行的 DataFrame，见 WalkForward.run
+        """
+        from event_trader.walk_forward import WalkForward
+        return WalkForward(**kwargs).run(self, params_range, params_step)
+
+    def apply_parameters(self, parameters, profit):
+        """更新为最佳参数并保存"""
+        self.parameters = parameters
+        print(f"Optimized parameters: {self.parameters}, Profit = {profit}, Factor cache = {self.factor_cache.stats()}")
         self.save_parameters()
         self.account = None
         return self
@@ -143,6 +457,8 @@ class BaseStrategy(ABC):
 
     
     def _plot_basic(self, days = CURRENT_DAYS, add_plots=None, title=None, volume_width=0.5, **kwargs):
+        # 绘图依赖只在需要时加载，无界面运行时不必导入
+        import mplfinance as mpf
         if title is None:
             title = f"{self.stock_data.symbol} {self.__class__.__name__} Figure, profit = {friendly_number(self.account.get_profit())}"
         if add_plots is None:
@@ -252,9 +568,10 @@ class BaseStrategy(ABC):
         return fig, axes
     
     def factors_value(self):
-        row = self.data.iloc[-1]
-        return row.to_dict()
+        # 逐列取最后一个值，避免为混合类型的整行构造 object Series
+        return {column: values.iat[-1] for column, values in self.data.items()}
 
+    @timed('status', strategy_key)
     def status(self):
         if self.buy_signal(self.data.iloc[-1], len(self.data) - 1):
             return "Buy"
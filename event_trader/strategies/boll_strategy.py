@@ -1,8 +1,9 @@
 import pandas as pd
+import numpy as np
 from .base_strategy import BaseStrategy
 from china_stock_data import StockData
-import mplfinance as mpf
 from event_trader.config import PRICE_COL
+from event_trader.utils import shift
 
 
 DEFAULT_PARAMS = {
@@ -38,14 +39,27 @@ class BollStrategy(BaseStrategy):
         
     def calculate_factors(self):
         window = self.parameters['window']
-        self.data['moving_avg'] = self.data[PRICE_COL].rolling(window=window).mean()
+        self.data['moving_avg'] = self.sma(PRICE_COL, window)
         # 计算标准差
-        self.data['std'] = self.data[PRICE_COL].rolling(window=window).std()
+        self.data['std'] = self.rolling_std(PRICE_COL, window)
 
         # 计算布林带上下轨
         self.data['upper'] = self.data['moving_avg'] + (self.data['std'] * self.parameters['std'])
         self.data['down'] = self.data['moving_avg'] - (self.data['std'] * self.parameters['std'])
         
+    def update_factors(self):
+        self.length = len(self.data)
+        window = self.parameters['window']
+        values = self.window_values(PRICE_COL, window)
+        moving_avg = np.nan if values is None else values.mean()
+        std = np.nan if values is None or window < 2 else values.std(ddof=1)
+        self.set_last(
+            moving_avg=moving_avg,
+            std=std,
+            upper=moving_avg + std * self.parameters['std'],
+            down=moving_avg - std * self.parameters['std'],
+        )
+
     def buy_signal(self, row, i) -> bool:
         # 确保布林带数据有效
         if i == 0 or pd.isna(row['down']):
@@ -103,7 +117,25 @@ class BollStrategy(BaseStrategy):
                     
         return False
 
+    @staticmethod
+    def signal_rules(data, index, parameters):
+        price, moving_avg, upper, down = data[PRICE_COL], data['moving_avg'], data['upper'], data['down']
+        last_price = shift(price)
+        band_width = upper - down
+        prev_band_width = shift(band_width)
+        # 布林带收缩或扩张，仅从第三根K线开始判断
+        band_changed = (index > 1) & ((band_width < prev_band_width * 0.8) | (band_width > prev_band_width * 1.2))
+
+        buy = ((index > 0) & ~np.isnan(down) &
+               (((price <= down) & (price > last_price)) |
+                (band_changed & (price > moving_avg) & (price > last_price))))
+        sell = ((index > 0) & ~np.isnan(upper) &
+                (((price >= upper) & (price < last_price)) |
+                 (band_changed & (price < moving_avg) & (price < last_price))))
+        return buy, sell
+
     def get_plots(self, data):
+        import mplfinance as mpf
         return [
             mpf.make_addplot(data['moving_avg'], width=0.8, color='blue', label=f'{self.parameters["window"]}-Day MA'),
             mpf.make_addplot(data['upper'], width=0.8, color='purple', label=f'{self.parameters["window"]}-Upper'),
@@ -1,7 +1,9 @@
 import pandas as pd
+import numpy as np
 from .base_strategy import BaseStrategy
 from china_stock_data import StockData
-import mplfinance as mpf
+from event_trader.indicators import kd_filter
+from event_trader.utils import shift
 
 
 DEFAULT_PARAMS = {
@@ -29,29 +31,35 @@ KDJ指标, 随机振荡器
         
     def calculate_factors(self):
         data = self.data
-        # 计算最低价和最高价的滚动窗口
-        data['L_n'] = data['最低'].rolling(window=self.n, min_periods=1).min()
-        data['H_n'] = data['最高'].rolling(window=self.n, min_periods=1).max()
+        # 计算最低价和最高价的滚动窗口以及RSV
+        low_n, high_n, rsv_values = self.factor_cache.rsv(self.stock_data.symbol, data, self.n)
+        data['L_n'] = low_n
+        data['H_n'] = high_n
+        data['RSV'] = rsv_values
 
-        # 计算RSV
-        data['RSV'] = (data['收盘'] - data['L_n']) / (data['H_n'] - data['L_n']) * 100
-
-        # 初始化K值和D值为浮点型
-        data['K'] = 50.0
-        data['D'] = 50.0
-
-        # 计算K值和D值
-        for i in range(1, len(data)):
-            k_value = ((self.m1 - 1) / self.m1) * data.loc[i-1, 'K'] + (1 / self.m1) * data.loc[i, 'RSV']
-            d_value = ((self.m2 - 1) / self.m2) * data.loc[i-1, 'D'] + (1 / self.m2) * k_value
-            
-            # 确保赋值时为浮点型
-            data.loc[i, 'K'] = float(k_value)
-            data.loc[i, 'D'] = float(d_value)
+        # K值和D值按一阶递归滤波计算
+        k, d = kd_filter(rsv_values, self.m1, self.m2)
+        data['K'] = k
+        data['D'] = d
 
         # 计算J值
         data['J'] = 3.0 * data['K'] - 2.0 * data['D']
 
+    def update_factors(self):
+        self.length = len(self.data)
+        data = self.data
+        window = min(self.n, len(data))
+        low_n = self.window_values('最低', window).min()
+        high_n = self.window_values('最高', window).max()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsv_value = (np.float64(data['收盘'].iloc[-1]) - low_n) / (high_n - low_n) * 100
+        if len(data) < 2:
+            k, d = 50.0, 50.0
+        else:
+            k = ((self.m1 - 1) / self.m1) * data['K'].iloc[-2] + (1 / self.m1) * rsv_value
+            d = ((self.m2 - 1) / self.m2) * data['D'].iloc[-2] + (1 / self.m2) * k
+        self.set_last(L_n=low_n, H_n=high_n, RSV=rsv_value, K=k, D=d, J=3.0 * k - 2.0 * d)
+
     # FILEPATH: /Users/juzhongsun/Codes/pythons/event_trader/event_trader/strategies/kdj_strategy.py
 
     def buy_signal(self, row, i) -> bool:
@@ -96,7 +104,28 @@ KDJ指标, 随机振荡器
         
         return death_cross or overbought_reversal or strong_divergence
         
+    @staticmethod
+    def signal_rules(data, index, parameters):
+        k, d, j, close = data['K'], data['D'], data['J'], data['收盘']
+        valid = (index >= 3) & ~np.isnan(k) & ~np.isnan(d) & ~np.isnan(j)
+        k1, k2, k3 = shift(k, 1), shift(k, 2), shift(k, 3)
+        d1, d2, d3 = shift(d, 1), shift(d, 2), shift(d, 3)
+        j1 = shift(j, 1)
+        close1, close2 = shift(close, 1), shift(close, 2)
+
+        golden_cross = (k > d) & (k1 > d1) & (k2 <= d2) & (k3 <= d3)
+        oversold_reversal = (j > 0) & (j1 <= 0) & (k < 30)
+        bottom_divergence = (close < close1) & (close1 < close2) & (k > k1) & (k1 > k2) & (k < 30)
+        buy = valid & (golden_cross | oversold_reversal | bottom_divergence)
+
+        death_cross = (k < d) & (k1 < d1) & (k2 >= d2) & (k3 >= d3)
+        overbought_reversal = (j < 100) & (j1 >= 100) & (k > 70)
+        top_divergence = (close > close1) & (close1 > close2) & (k < k1) & (k1 < k2) & (k > 70)
+        sell = valid & (death_cross | overbought_reversal | top_divergence)
+        return buy, sell
+
     def get_plots(self, data):
+        import mplfinance as mpf
         high = data['最高'].max()
         lower = data['最低'].max()
         ratio = (high - lower) / 100
@@ -1,8 +1,9 @@
 import pandas as pd
+import numpy as np
 from .base_strategy import BaseStrategy
 from china_stock_data import StockData
-import mplfinance as mpf
 from event_trader.config import PRICE_COL
+from event_trader.utils import shift
 
 DEFAULT_PARAMS = {
     'window': 5
@@ -27,9 +28,17 @@ MA (Moving Average) 移动平均策略
         
     def calculate_factors(self):
         window = self.parameters['window']
-        self.data['moving_avg'] = self.data[PRICE_COL].rolling(window=window).mean()
+        self.data['moving_avg'] = self.sma(PRICE_COL, window)
         self.data['mavg_derivative'] = self.data['moving_avg'].diff().fillna(0)
         
+    def update_factors(self):
+        self.length = len(self.data)
+        last = len(self.data) - 1
+        current = self.window_mean(PRICE_COL, self.window)
+        previous = self.window_mean(PRICE_COL, self.window, last - 1) if last > 0 else np.nan
+        derivative = current - previous
+        self.set_last(moving_avg=current, mavg_derivative=0.0 if pd.isna(derivative) else derivative)
+
     def buy_signal(self, row, i) -> bool:
         if i < self.window + 3 or pd.isna(row['moving_avg']):
             return False
@@ -50,7 +59,32 @@ MA (Moving Average) 移动平均策略
                 last1['mavg_derivative'] >= 0 and 
                 last2['mavg_derivative'] > 0)
     
+    @staticmethod
+    def signal_rules(data, index, parameters):
+        price, moving_avg, derivative = data[PRICE_COL], data['moving_avg'], data['mavg_derivative']
+        valid = (index >= parameters['window'] + 3) & ~np.isnan(moving_avg)
+        last1 = shift(derivative, 1)
+        last2 = shift(derivative, 2)
+        buy = valid & (price < moving_avg) & (derivative > 0) & (last1 <= 0) & (last2 < 0)
+        sell = valid & (price > moving_avg) & (derivative < 0) & (last1 >= 0) & (last2 > 0)
+        return buy, sell
+
+    def signal_matrix(self, param_names, combinations):
+        windows = np.array([dict(zip(param_names, c)).get('window', self.window) for c in combinations])
+        price = self.data[PRICE_COL].to_numpy()
+        index = np.arange(len(price))
+        rows = {}
+        for window in np.unique(windows):
+            moving_avg = self.sma(PRICE_COL, window)
+            derivative = moving_avg.diff().fillna(0)
+            factors = {PRICE_COL: price, 'moving_avg': moving_avg.to_numpy(), 'mavg_derivative': derivative.to_numpy()}
+            rows[window] = self.signal_rules(factors, index, {'window': window})
+        buy = np.array([rows[window][0] for window in windows], dtype=bool).reshape(len(windows), len(price))
+        sell = np.array([rows[window][1] for window in windows], dtype=bool).reshape(len(windows), len(price))
+        return buy, sell
+
     def get_plots(self, data):
+        import mplfinance as mpf
         return [
             mpf.make_addplot(data['moving_avg'], width=0.8, color='blue', label=f'{self.parameters["window"]}-Day MA')
         ]
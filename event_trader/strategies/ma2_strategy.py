@@ -1,9 +1,9 @@
 import pandas as pd
+import numpy as np
 from .base_strategy import BaseStrategy
 from china_stock_data import StockData
-import mplfinance as mpf
 from event_trader.config import PRICE_COL
-from event_trader.utils import plot_line_chart
+from event_trader.utils import plot_line_chart, shift
 DEFAULT_PARAMS = {
     'short_window': 5,
     'long_window': 20,
@@ -41,8 +41,8 @@ class MA2Strategy(BaseStrategy):
         long_window = self.parameters['long_window']
         
         # 计算短期和长期移动平均
-        self.data['short_mavg'] = self.data[PRICE_COL].rolling(window=short_window).mean()
-        self.data['long_mavg'] = self.data[PRICE_COL].rolling(window=long_window).mean()
+        self.data['short_mavg'] = self.sma(PRICE_COL, short_window)
+        self.data['long_mavg'] = self.sma(PRICE_COL, long_window)
         
        # 使用单独的变量来存储列，然后进行填充
         short_mavg_derivative = self.data['short_mavg'].diff()
@@ -52,6 +52,18 @@ class MA2Strategy(BaseStrategy):
         self.data['long_mavg_derivative'] = long_mavg_derivative.fillna(0)
 
         
+    def update_factors(self):
+        self.length = len(self.data)
+        last = len(self.data) - 1
+        values = {}
+        for name, window in (('short_mavg', self.parameters['short_window']), ('long_mavg', self.parameters['long_window'])):
+            current = self.window_mean(PRICE_COL, window)
+            previous = self.window_mean(PRICE_COL, window, last - 1) if last > 0 else np.nan
+            derivative = current - previous
+            values[name] = current
+            values[f'{name}_derivative'] = 0.0 if pd.isna(derivative) else derivative
+        self.set_last(**values)
+
     def validate_parameter(self, parameters):
         if parameters['short_window'] >= parameters['long_window']:
             return False
@@ -79,7 +91,29 @@ class MA2Strategy(BaseStrategy):
                 last1['short_mavg_derivative'] >= 0 and
                 last2['short_mavg_derivative'] > 0)
         
+    @staticmethod
+    def signal_rules(data, index, parameters):
+        short_mavg, long_mavg = data['short_mavg'], data['long_mavg']
+        derivative, long_derivative = data['short_mavg_derivative'], data['long_mavg_derivative']
+        valid = (index >= 2) & ~np.isnan(short_mavg) & ~np.isnan(long_mavg)
+        last1 = shift(derivative, 1)
+        last2 = shift(derivative, 2)
+        buy = (valid &
+               (short_mavg < long_mavg) &
+               (long_derivative > 0) &
+               (derivative > 0) &
+               (last1 <= 0) &
+               (last2 < 0))
+        sell = (valid &
+                (short_mavg > long_mavg) &
+                (long_derivative < 0) &
+                (derivative < 0) &
+                (last1 >= 0) &
+                (last2 > 0))
+        return buy, sell
+
     def get_plots(self, data):
+        import mplfinance as mpf
         return [
             mpf.make_addplot(data['short_mavg'], width=0.8, color='blue', label=f'{self.short_window}-Day MA'),
             mpf.make_addplot(data['long_mavg'], width=0.8, color='orange', label=f'{self.long_window}-Day MA')
@@ -1,8 +1,9 @@
 import pandas as pd
+import numpy as np
 from .base_strategy import BaseStrategy
 from china_stock_data import StockData
-import mplfinance as mpf
 from event_trader.config import PRICE_COL
+from event_trader.utils import shift
 
 DEFAULT_PARAMS = {
     'short': 12,
@@ -38,12 +39,34 @@ class MACDStrategy(BaseStrategy):
     def calculate_factors(self):
         data = self.data
         # 使用pandas的向量化操作
-        data['EMA_short'] = data[PRICE_COL].ewm(span=self.short, adjust=False).mean()
-        data['EMA_long'] = data[PRICE_COL].ewm(span=self.long, adjust=False).mean()
+        data['EMA_short'] = self.ewm(PRICE_COL, self.short)
+        data['EMA_long'] = self.ewm(PRICE_COL, self.long)
         data['DIF'] = data['EMA_short'] - data['EMA_long']
         data['DEA'] = data['DIF'].ewm(span=self.middle, adjust=False).mean()
         data['MACD'] = 2 * (data['DIF'] - data['DEA'])
+        # 包含当天在内 LOOKBACK_PERIOD+1 天的最低价和最高价，逐行判断信号时不再切片计算
+        data['low_period'] = self.rolling_min(PRICE_COL, LOOKBACK_PERIOD + 1)
+        data['high_period'] = self.rolling_max(PRICE_COL, LOOKBACK_PERIOD + 1)
         
+    def update_factors(self):
+        self.length = len(self.data)
+        data = self.data
+        price = data[PRICE_COL].iloc[-1]
+
+        def ema(column, value, span):
+            if len(data) < 2:
+                return value
+            alpha = 2 / (span + 1)
+            return (1 - alpha) * data[column].iloc[-2] + alpha * value
+
+        ema_short = ema('EMA_short', price, self.short)
+        ema_long = ema('EMA_long', price, self.long)
+        dif = ema_short - ema_long
+        dea = ema('DEA', dif, self.middle)
+        prices = data[PRICE_COL].to_numpy()[-(LOOKBACK_PERIOD + 1):]
+        self.set_last(EMA_short=ema_short, EMA_long=ema_long, DIF=dif, DEA=dea, MACD=2 * (dif - dea),
+                      low_period=prices.min(), high_period=prices.max())
+
     def validate_parameter(self, parameters):
         if parameters['short'] >= parameters['long']:
             return False
@@ -53,10 +76,10 @@ class MACDStrategy(BaseStrategy):
         if i < LOOKBACK_PERIOD or pd.isna(row['DIF']) or pd.isna(row['DEA']):
             return False
             
-        last = self.data.iloc[i-1]
+        last = self._previous(i)
         
-        # 计算过去LOOKBACK_PERIOD天的最低价
-        low_period = self.data[PRICE_COL].iloc[i-LOOKBACK_PERIOD:i+1].min()
+        # 过去LOOKBACK_PERIOD天的最低价
+        low_period = row['low_period']
         
         # 金叉（DIF 上穿 DEA）且价格接近LOOKBACK_PERIOD天低点
         if (row['DIF'] > row['DEA'] and last['DIF'] <= last['DEA'] and
@@ -70,21 +93,24 @@ class MACDStrategy(BaseStrategy):
             
         # 底背离（价格创新低但 MACD 低点抬高）
         if i > 1:
-            prev = self.data.iloc[i-2]
             if (row[PRICE_COL] < last[PRICE_COL] and row['MACD'] > last['MACD'] and
                 row[PRICE_COL] < low_period * BUY_THRESHOLD_STRICT):
                 return True
                 
         return False
 
+    def _previous(self, i):
+        """前一根K线判断信号用到的列，逐列读取，不为整行构造 Series"""
+        return {column: self.data[column].iat[i - 1] for column in (PRICE_COL, 'DIF', 'DEA', 'MACD')}
+
     def sell_signal(self, row, i) -> bool:
         if i < LOOKBACK_PERIOD or pd.isna(row['DIF']) or pd.isna(row['DEA']):
             return False
             
-        last = self.data.iloc[i-1]
+        last = self._previous(i)
         
-        # 计算过去LOOKBACK_PERIOD天的最高价
-        high_period = self.data[PRICE_COL].iloc[i-LOOKBACK_PERIOD:i+1].max()
+        # 过去LOOKBACK_PERIOD天的最高价
+        high_period = row['high_period']
         
         # 死叉（DIF 下穿 DEA）且价格接近LOOKBACK_PERIOD天高点
         if (row['DIF'] < row['DEA'] and last['DIF'] >= last['DEA'] and
@@ -98,14 +124,41 @@ class MACDStrategy(BaseStrategy):
             
         # 顶背离（价格创新高但 MACD 高点降低）
         if i > 1:
-            prev = self.data.iloc[i-2]
             if (row[PRICE_COL] > last[PRICE_COL] and row['MACD'] < last['MACD'] and
                 row[PRICE_COL] > high_period * SELL_THRESHOLD_STRICT):
                 return True
                 
         return False
         
+    @staticmethod
+    def signal_rules(data, index, parameters):
+        price, dif, dea, macd = data[PRICE_COL], data['DIF'], data['DEA'], data['MACD']
+        valid = (index >= LOOKBACK_PERIOD) & ~np.isnan(dif) & ~np.isnan(dea)
+        low_period = data['low_period']
+        high_period = data['high_period']
+        last_price = shift(price)
+        last_dif, last_dea, last_macd = shift(dif), shift(dea), shift(macd)
+
+        buy = valid & (
+            ((dif > dea) & (last_dif <= last_dea) &
+             (price < low_period * BUY_THRESHOLD_CLOSE)) |
+            ((macd > 0) & (last_macd <= 0) & (macd > last_macd) &
+             (price < low_period * BUY_THRESHOLD_MEDIUM)) |
+            ((price < last_price) & (macd > last_macd) &
+             (price < low_period * BUY_THRESHOLD_STRICT))
+        )
+        sell = valid & (
+            ((dif < dea) & (last_dif >= last_dea) &
+             (price > high_period * SELL_THRESHOLD_CLOSE)) |
+            ((macd < 0) & (last_macd >= 0) & (macd < last_macd) &
+             (price > high_period * SELL_THRESHOLD_MEDIUM)) |
+            ((price > last_price) & (macd < last_macd) &
+             (price > high_period * SELL_THRESHOLD_STRICT))
+        )
+        return buy, sell
+
     def get_plots(self, data):
+        import mplfinance as mpf
         high = data['最高'].max()
         lower = data['最低'].max()
         ratio = (high - lower) / 100
@@ -1,7 +1,7 @@
 import pandas as pd
+import numpy as np
 from .base_strategy import BaseStrategy
 from china_stock_data import StockData
-import mplfinance as mpf
 from event_trader.config import PRICE_COL
 
 
@@ -28,9 +28,15 @@ class PriceDeviationStrategy(BaseStrategy):
         super().__init__(stock_data, PriceDeviationStrategy.name, _params, _params_range, None, ['moving_avg'])
         
     def calculate_factors(self):
-        self.data['moving_avg'] = self.data[PRICE_COL].rolling(window=self.window).mean()
+        self.data['moving_avg'] = self.sma(PRICE_COL, self.window)
         self.data['percent'] = (self.data[PRICE_COL] - self.data['moving_avg']) * 100 / self.data['moving_avg']
         
+    def update_factors(self):
+        self.length = len(self.data)
+        moving_avg = self.window_mean(PRICE_COL, self.window)
+        price = self.data[PRICE_COL].iloc[-1]
+        self.set_last(moving_avg=moving_avg, percent=(price - moving_avg) * 100 / moving_avg)
+
     def buy_signal(self, row, i) -> bool:
         if i < self.window + 2:
             return False
@@ -41,7 +47,29 @@ class PriceDeviationStrategy(BaseStrategy):
             return False
         return row['percent'] >=  self.percent
     
+    @staticmethod
+    def signal_rules(data, index, parameters):
+        valid = index >= parameters['window'] + 2
+        percent = data['percent']
+        return valid & (percent <= -parameters['percent']), valid & (percent >= parameters['percent'])
+
+    def signal_matrix(self, param_names, combinations):
+        params = [dict(zip(param_names, c)) for c in combinations]
+        windows = np.array([p.get('window', self.window) for p in params])
+        percents = np.array([p.get('percent', self.percent) for p in params])
+        price = self.data[PRICE_COL]
+        deviation = {}
+        for window in np.unique(windows):
+            moving_avg = self.sma(PRICE_COL, window)
+            deviation[window] = ((price - moving_avg) * 100 / moving_avg).to_numpy()
+        percent = np.array([deviation[window] for window in windows]).reshape(len(params), len(self.data))
+        # 每组参数作为一列，与面板模式相同
+        buy, sell = self.signal_rules({'percent': percent.T}, np.arange(len(self.data))[:, None],
+                                      {'window': windows, 'percent': percents})
+        return buy.T, sell.T
+
     def get_plots(self, data):
+        import mplfinance as mpf
         return [
             mpf.make_addplot(data['moving_avg'], width=0.8, color='blue', label=f'{self.parameters["window"]}-Day MA')
         ]   
@@ -2,9 +2,8 @@ import pandas as pd
 import numpy as np
 from .base_strategy import BaseStrategy
 from china_stock_data import StockData
-import mplfinance as mpf
 from event_trader.config import PRICE_COL
-from event_trader.utils import is_continuous_growth
+from event_trader.utils import is_continuous_growth, continuous_growth
 
 DEFAULT_PARAMS = {
     'window': 10
@@ -36,16 +35,29 @@ class VMAStrategy(BaseStrategy):
         
     def calculate_factors(self):
         window = self.parameters['window']
-        self.data['volume_ma'] = self.data['成交量'].rolling(window=window).mean()
-        self.data['price_ma'] = self.data[PRICE_COL].rolling(window=window).mean()
+        self.data['volume_ma'] = self.sma('成交量', window)
+        self.data['price_ma'] = self.sma(PRICE_COL, window)
         self.calculate_rsi()
         
+    def update_factors(self):
+        self.length = len(self.data)
+        window = self.parameters['window']
+        closes = self.window_values(PRICE_COL, RSI_PERIOD + 1)
+        rsi = np.nan
+        if closes is not None:
+            delta = np.diff(closes)
+            gain = np.where(delta > 0, delta, 0).mean()
+            loss = np.where(delta < 0, -delta, 0).mean()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = 100 - (100 / (1 + np.float64(gain) / loss))
+        self.set_last(
+            volume_ma=self.window_mean('成交量', window),
+            price_ma=self.window_mean(PRICE_COL, window),
+            rsi=rsi,
+        )
+
     def calculate_rsi(self):
-        delta = self.data[PRICE_COL].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=RSI_PERIOD).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_PERIOD).mean()
-        rs = gain / loss
-        self.data['rsi'] = 100 - (100 / (1 + rs))
+        self.data['rsi'] = self.factor_cache.rsi(self.stock_data.symbol, self.data[PRICE_COL], RSI_PERIOD)
         
     def buy_signal(self, row, i) -> bool:
         if i < self.parameters['window'] or pd.isna(row['volume_ma']) or pd.isna(row['rsi']):
@@ -58,8 +70,8 @@ class VMAStrategy(BaseStrategy):
         # RSI超卖
         rsi_oversold_condition = row['rsi'] < RSI_OVERSOLD
         
-        # 连续3天价格上涨
-        price_continuous_up = is_continuous_growth(self.data[PRICE_COL].iloc[i-3:i+1], n=3)
+        # 连续3天价格上涨，直接取 numpy 数组的切片，不为每一行创建 Series
+        price_continuous_up = is_continuous_growth(self.data[PRICE_COL].to_numpy()[i-3:i+1], n=3)
         
         return volume_breakout and price_uptrend and rsi_oversold_condition and price_continuous_up
 
@@ -76,11 +88,29 @@ class VMAStrategy(BaseStrategy):
         rsi_overbought_condition = row['rsi'] > RSI_OVERBOUGHT
         
         # 连续3天价格下跌
-        price_continuous_down = price_continuous_down = is_continuous_growth(self.data[PRICE_COL].iloc[i-3:i+1], n=3, reverse=True)
+        price_continuous_down = is_continuous_growth(self.data[PRICE_COL].to_numpy()[i-3:i+1], n=3, reverse=True)
         
         return volume_breakout and price_downtrend and rsi_overbought_condition and price_continuous_down
 
+    @staticmethod
+    def signal_rules(data, index, parameters):
+        price, volume_ma, rsi = data[PRICE_COL], data['volume_ma'], data['rsi']
+        # 连续3天的判断需要至少4根K线的切片
+        valid = (index >= parameters['window']) & (index >= 3) & ~np.isnan(volume_ma) & ~np.isnan(rsi)
+        volume_breakout = data['成交量'] > VOLUME_THRESHOLD * volume_ma
+
+        buy = (valid & volume_breakout &
+               (price > data['price_ma'] * (1 + PRICE_CHANGE_THRESHOLD)) &
+               (rsi < RSI_OVERSOLD) &
+               continuous_growth(price, n=3))
+        sell = (valid & volume_breakout &
+                (price < data['price_ma'] * (1 - PRICE_CHANGE_THRESHOLD)) &
+                (rsi > RSI_OVERBOUGHT) &
+                continuous_growth(price, n=3, reverse=True))
+        return buy, sell
+
     def get_plots(self, data):
+        import mplfinance as mpf
         return [
             mpf.make_addplot(data['volume_ma'], width=0.8, color='blue', label=f'{self.parameters["window"]}-Day Volume MA'),
             mpf.make_addplot(data['price_ma'], width=0.8, color='red', label=f'{self.parameters["window"]}-Day Price MA'),
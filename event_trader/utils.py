@@ -56,14 +56,14 @@ def is_a_share(stock_code):
             return True
     return False
 
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 def is_continuous_growth(series, n=3, reverse=False):
     """
     判断最后n个数据是否连续增长或下降。
 
-    :param series: Pandas Series
+    :param series: Pandas Series 或 numpy 数组
     :param n: 要判断的最后几个数据
     :param reverse: 如果为True，则判断是否连续下降
     :return: 如果连续增长（或下降）返回True，否则返回False
@@ -71,12 +71,60 @@ def is_continuous_growth(series, n=3, reverse=False):
     if len(series) < n:
         return False
 
-    last_n = series.tail(n)
-    
-    if reverse:
-        return all(last_n.iloc[i] < last_n.iloc[i-1] for i in range(1, n))
+    last_n = np.asarray(series)[len(series) - n:]
+    delta = np.diff(last_n)
+    return bool((delta < 0).all() if reverse else (delta > 0).all())
+
+
+def continuous_growth(values, n=3, reverse=False):
+    """
+    is_continuous_growth 的向量化版本：用前缀和统计每个位置之前 n-1 次变化中上涨（或下跌）的次数。
+
+    :param values: 一维数组或 Series，或 (K线数, 股票数) 的二维数组（按列计算），NaN 不算上涨或下跌
+    :return: 与 values 形状相同的布尔数组，第 i 个元素为以第 i 个数据结尾的 n 个数据是否连续增长（或下降）
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.zeros(values.shape, dtype=bool)
+    if n <= 1:
+        result[:] = True
+        return result
+    if len(values) < n:
+        return result
+    delta = np.diff(values, axis=0)
+    moves = np.cumsum(delta < 0 if reverse else delta > 0, axis=0)
+    moves = np.concatenate([np.zeros((1,) + moves.shape[1:], dtype=moves.dtype), moves])
+    result[n - 1:] = moves[n - 1:] - moves[:len(values) - n + 1] == n - 1
+    return result
+
+
+def shift(values, periods=1):
+    """
+    沿第 0 维（K线）向后平移 periods 行，前面补 NaN，与 Series.shift 相同。
+
+    :param values: 一维数组，或 (K线数, 股票数) 的二维数组
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+
+def upsert_bar(kline: pd.DataFrame, bar: dict, date_col='日期'):
+    """
+    在原 DataFrame 上追加或替换最新一根K线。
+
+    :param kline: K线数据
+    :param bar: 新K线的列值，日期与最后一根K线相同则替换，否则追加
+    :return: 替换时返回True，追加时返回False
+    """
+    replace = len(kline) > 0 and bar.get(date_col) == kline[date_col].iloc[-1]
+    if replace:
+        label = kline.index[-1]
     else:
-        return all(last_n.iloc[i] > last_n.iloc[i-1] for i in range(1, n))
+        label = kline.index[-1] + 1 if len(kline) else 0
+    kline.loc[label, list(bar.keys())] = list(bar.values())
+    return replace
 
 
 def percent_change(current, previous):
@@ -100,6 +148,7 @@ def plot_line_chart(df: pd.DataFrame, columns: list[str], title='Line Chart', yl
     返回:
     - None
     """
+    import matplotlib.pyplot as plt
     df['日期'] = pd.to_datetime(df['日期'])
     plt.figure(figsize=figsize)
     for column in columns:
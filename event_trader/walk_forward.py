@@ -0,0 +1,178 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from event_trader.config import DATE_COL, PRICE_COL
+from event_trader.demo_account import simulate_profits
+from event_trader.instrumentation import timed, strategy_key
+
+# 各窗口回测的执行方式，也可以直接传入 ThreadPoolExecutor
+EXECUTORS = {'thread': ThreadPoolExecutor}
+
+
+class WalkForward:
+    """
+    滚动窗口的样本外检验：把历史分成连续的 (训练, 测试) 窗口，在每个训练窗口上寻优，
+    用最佳参数回测紧随其后的测试窗口，每个窗口都从空仓开始，测试窗口结束时按收盘价卖出。
+
+    支持向量化信号的策略在完整历史上只生成一次各组参数的信号矩阵（指标只用到当前及之前的K线），
+    各窗口截取其中的区间回测，重叠的训练窗口不再重复计算因子，窗口开头的指标也不缺少预热数据。
+    不支持向量化信号的策略逐个窗口截取历史寻优，测试窗口的因子从训练窗口开头算起，只回测测试窗口的K线。
+
+    线程池中并发回测各窗口，同时主线程生成下一批信号矩阵。信号矩阵依赖策略对象的状态，只能在主线程生成，
+    各窗口的回测只在 numpy 运算释放 GIL 时并行，因此不提供进程池：向子进程传递信号矩阵的开销超过回测本身。
+    """
+    def __init__(self, train=250, test=20, step=None, anchored=False, executor=None, workers=None, batch_size=256):
+        """
+        :param train: 训练窗口的K线数
+        :param test: 测试窗口的K线数，最后一个测试窗口可能较短
+        :param step: 相邻窗口之间移动的K线数，默认等于 test，使各测试窗口首尾相接
+        :param anchored: 为 True 时训练窗口都从第一根K线开始，随窗口向后扩展
+        :param executor: None（顺序执行）、'thread' 或 ThreadPoolExecutor 实例（由调用方负责关闭）
+        :param workers: executor 为 'thread' 时创建的线程数
+        :param batch_size: 每次生成信号矩阵的参数组数
+        """
+        if isinstance(executor, str) and executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', choose from {', '.join(EXECUTORS)}")
+        if isinstance(executor, ProcessPoolExecutor):
+            raise ValueError("Walk-forward windows share the strategy state, use a thread pool")
+        if train <= 0 or test <= 0 or (step is not None and step <= 0):
+            raise ValueError("train, test and step must be positive")
+        self.train = train
+        self.test = test
+        self.step = step or test
+        self.anchored = anchored
+        self.executor = executor
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def windows(self, length):
+        """
+        :param length: K线数
+        :return: [(训练开始, 训练结束, 测试结束)] 的行号列表，区间左闭右开，测试窗口从训练结束处开始
+        """
+        windows = []
+        train_end = self.train
+        while train_end < length:
+            train_start = 0 if self.anchored else train_end - self.train
+            windows.append((train_start, train_end, min(train_end + self.test, length)))
+            train_end += self.step
+        return windows
+
+    @timed('walk_forward', strategy_key)
+    def run(self, strategy, params_range=None, params_step=None):
+        """
+        对一个策略做滚动窗口寻优，结束后恢复策略原来的参数和搜索范围，不保存参数文件。
+
+        :return: 每个窗口一行的 DataFrame：训练和测试的起止日期、最佳参数、训练利润和测试（样本外）利润
+        """
+        windows = self.windows(len(strategy.data))
+        if not windows:
+            raise ValueError(f"Need more than {self.train} bars for walk-forward, got {len(strategy.data)}")
+        initial_parameters, initial_status = strategy.parameters.copy(), strategy.last_status
+        initial_space = strategy.params_range, strategy.params_step
+        try:
+            strategy.set_search_space(params_range, params_step)
+            param_names, combinations = strategy.parameter_grid()
+            combinations = list(combinations)
+            fits = self._fit_signals(strategy, param_names, combinations, windows) if strategy.vectorized else None
+            if fits is None:
+                fits = self._fit_rows(strategy, param_names, combinations, windows)
+        finally:
+            strategy.parameters, strategy.last_status = initial_parameters, initial_status
+            strategy.params_range, strategy.params_step = initial_space
+            strategy.account = None
+
+        dates = strategy.data[DATE_COL].to_numpy() if DATE_COL in strategy.data.columns else np.arange(len(strategy.data))
+        rows = []
+        for (train_start, train_end, test_end), (parameters, train_profit, test_profit) in zip(windows, fits):
+            rows.append({
+                'train_start': dates[train_start],
+                'train_end': dates[train_end - 1],
+                'test_start': dates[train_end],
+                'test_end': dates[test_end - 1],
+                'parameters': parameters,
+                'train_profit': train_profit,
+                'test_profit': test_profit,
+            })
+        return pd.DataFrame(rows)
+
+    def _fit_signals(self, strategy, param_names, combinations, windows):
+        """
+        逐批生成完整历史上的信号矩阵，每一批在各训练窗口上并发回测，保留每个窗口利润最高的参数（相同时取先出现的）。
+        一批在线程池中回测的同时，主线程生成下一批的信号矩阵。
+
+        :return: 每个窗口的 (最佳参数, 训练利润, 测试利润)，策略不支持向量化信号时返回 None
+        """
+        combinations = [c for c in combinations if strategy.set_parameters(param_names, c)]
+        prices = strategy.data[PRICE_COL].to_numpy()
+        best_profit = np.full(len(windows), -np.inf)
+        best_index = np.full(len(windows), -1)
+        best_buy = np.zeros((len(windows), len(prices)), dtype=bool)
+        best_sell = np.zeros((len(windows), len(prices)), dtype=bool)
+
+        owned = isinstance(self.executor, str)
+        executor = EXECUTORS[self.executor](max_workers=self.workers) if owned else self.executor
+        starts = list(range(0, len(combinations), self.batch_size))
+        try:
+            signals = strategy.signal_matrix(param_names, combinations[:self.batch_size]) if starts else None
+            for k, start in enumerate(starts):
+                if signals is None:
+                    return None
+                buy, sell = signals
+                tasks = [(prices[a:b], buy[:, a:b], sell[:, a:b]) for a, b, _ in windows]
+                if executor is None:
+                    results = [simulate_profits(*task) for task in tasks]
+                else:
+                    results = [executor.submit(simulate_profits, *task) for task in tasks]
+                if k + 1 < len(starts):
+                    following = starts[k + 1]
+                    signals = strategy.signal_matrix(param_names, combinations[following:following + self.batch_size])
+                for w, profits in enumerate(results):
+                    profits = profits if executor is None else profits.result()
+                    best = int(np.argmax(profits))
+                    if profits[best] > best_profit[w]:
+                        best_profit[w] = profits[best]
+                        best_index[w] = start + best
+                        best_buy[w], best_sell[w] = buy[best], sell[best]
+        finally:
+            if owned and executor is not None:
+                executor.shutdown()
+
+        fits = []
+        for w, (_, train_end, test_end) in enumerate(windows):
+            if best_index[w] < 0:
+                fits.append((None, np.nan, np.nan))
+                continue
+            strategy.set_parameters(param_names, combinations[best_index[w]])
+            test_profit = simulate_profits(prices[train_end:test_end], best_buy[w:w + 1, train_end:test_end],
+                                           best_sell[w:w + 1, train_end:test_end])[0]
+            fits.append((strategy.parameters.copy(), best_profit[w], test_profit))
+        return fits
+
+    def _fit_rows(self, strategy, param_names, combinations, windows):
+        """
+        逐个窗口截取历史，用 search_parameters 寻优。
+        测试时在训练窗口开头到测试窗口结束的历史上计算因子，训练窗口的K线只用于预热，只回测测试窗口的K线。
+        """
+        fits = []
+        for train_start, train_end, test_end in windows:
+            with strategy.history_window(train_start, train_end):
+                train_profit, parameters = strategy.search_parameters(param_names, combinations)
+            if parameters is None:
+                fits.append((None, np.nan, np.nan))
+                continue
+            strategy.parameters = parameters.copy()
+            with strategy.history_window(train_start, test_end):
+                strategy.calculate_factors()
+                test_profit = strategy.calculate_profit(ledger='profit', start=train_end - train_start).get_profit()
+            fits.append((parameters, train_profit, test_profit))
+        return fits
+
+    @staticmethod
+    def compounded(result: pd.DataFrame):
+        """
+        :param result: run 的返回值
+        :return: 各测试窗口利润百分比连乘得到的总利润百分比，step 小于 test 时测试窗口会重叠
+        """
+        profits = result['test_profit'].dropna().to_numpy() / 100
+        return (np.prod(1 + profits) - 1) * 100
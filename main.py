@@ -1,8 +1,20 @@
+import os
+import signal
 import typer
 from datetime import datetime
 from app.database import init_db as init_database
-from app.save_database import save_trade_records
+from app.save_database import strategy_select_writer, queue_trade_records
+from app.scheduler import TradingScheduler, TradingDayCache
 from event_trader import StocksManager
+from event_trader.kline_store import KlineStore
+from event_trader.fetcher import RateLimitedFetcher
+from event_trader.config import FETCH_RATE
+from event_trader.search import make_search
+from event_trader.instrumentation import recorder, profile_threads
+from event_trader.data_source import LiveDataSource, SnapshotDataSource, take_snapshot
+from event_trader.stock_info import StockInfo
+from event_trader.walk_forward import WalkForward
+from contextlib import nullcontext
 
 app = typer.Typer()
 
@@ -12,6 +24,15 @@ def is_market_open() -> bool:
     """Check if current time is within market hours using TradingTimeChecker"""
     return TradingTimeChecker.is_trading_time()
 
+def report_timings(json_path=None):
+    """Print the recorded stage timings and optionally write them to a JSON file"""
+    if not recorder.enabled:
+        return
+    recorder.report()
+    if json_path:
+        recorder.dump(json_path)
+        print(f"Timings written to {json_path}")
+
 @app.command()
 def init_db():
     """Initialize database tables"""
@@ -24,8 +45,19 @@ def start(
     allIndex: bool = typer.Option(False, help="Use all stock market index"),
     force: bool = typer.Option(False, help="Force run even if market is closed"),
     optimize: bool = typer.Option(False, help="Opmitize the strategy parameters"),
+    workers: int = typer.Option(1, help="Optimizer processes for the grid search, 0 uses all CPU cores, 1 keeps the in-thread optimizer"),
+    search: str = typer.Option("grid", help="Parameter search: grid/random/coarse/halving"),
+    budget: int = typer.Option(None, help="Backtests for random search or initial candidates for halving search"),
+    store: bool = typer.Option(False, help="Read klines from the local column store under CACHE_PATH, appending only new bars"),
+    panel: bool = typer.Option(False, help="Compute every symbol of the index at once on (bars x symbols) arrays"),
+    fetch_rate: float = typer.Option(FETCH_RATE, help="Maximum kline download requests per second, 0 disables the rate limiter"),
+    pipeline: bool = typer.Option(False, help="Stream fetch, compute (process pool) and persist stages instead of computing the whole index first"),
+    timings: bool = typer.Option(False, help="Record per-stage and per-strategy timings and print a summary at the end of the run"),
+    timings_json: str = typer.Option(None, help="Also write the timing summary to this JSON file"),
+    profile: str = typer.Option(None, help="Write a cProfile/pstats file covering the run and its worker threads"),
+    replay: str = typer.Option(None, help="Replay a snapshot directory written by the snapshot command instead of fetching data"),
 ):
-    if not is_market_open() and not force:
+    if not is_market_open() and not force and not replay:
         print("Market is closed. No need run")
         return
 
@@ -34,14 +66,142 @@ def start(
     print(f"Notification service started. Processing indexes: {', '.join(indexes)}")
     
     print(f"执行任务: {datetime.now()}")
-    for idx in indexes:
-        params = {}
-        if optimize:
-            params["optimize"] = True
-        sm = StocksManager(index=idx)
-        sm.add_callback(save_trade_records)
-        sm.show_result(**params)
+    # 计算线程只把记录放入队列，退出 with 时写出剩余记录
+    kline_store = KlineStore() if store else None
+    fetcher = RateLimitedFetcher(rate=fetch_rate) if fetch_rate > 0 else None
+    data_source = SnapshotDataSource(replay) if replay else None
+    if timings or timings_json:
+        recorder.enable()
+    with profile_threads(profile) if profile else nullcontext():
+        with strategy_select_writer() as writer:
+            for idx in indexes:
+                params = {}
+                sm = StocksManager(index=idx, store=kline_store, fetcher=fetcher, data_source=data_source)
+                if optimize and workers != 1 and search == "grid":
+                    # 先用进程池优化并保存参数，get_result 会加载保存后的参数
+                    sm.optimize(workers=workers)
+                elif optimize and panel:
+                    # 面板模式读取保存的参数，需要先完成寻优
+                    sm.optimize(search=make_search(search, budget) if search != "grid" else None)
+                elif optimize:
+                    params["optimize"] = True
+                    if search != "grid":
+                        params["opt_params"] = {"search": make_search(search, budget)}
+                sm.add_callback(queue_trade_records(writer))
+                if pipeline and not panel:
+                    # 每只股票算完立即交给写入队列，不等待整个指数
+                    for _ in sm.iter_results(**params):
+                        pass
+                    continue
+                if panel:
+                    sm.get_panel_result()
+                sm.show_result(**params)
+
+    report_timings(timings_json)
+    if profile:
+        print(f"Profile written to {profile}")
+
+    print("Notification service stopped.")
+
+@app.command()
+def snapshot(
+    path: str = typer.Argument(..., help="Directory to write the snapshot to, an existing snapshot is updated"),
+    index: str = typer.Option("000300", help="China stock market index"),
+    allIndex: bool = typer.Option(False, help="Use all stock market index"),
+    symbols: str = typer.Option(None, help="Comma separated symbols to capture in addition to the index constituents"),
+    workers: int = typer.Option(5, help="Kline download threads"),
+    fetch_rate: float = typer.Option(FETCH_RATE, help="Maximum kline download requests per second, 0 disables the rate limiter"),
+):
+    """Capture index constituents and klines into a local snapshot for offline replay with --replay"""
+    indexes = [index] if not allIndex else ["000001", "000300", "000905"]
+    extra = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()] if symbols else []
+    fetcher = RateLimitedFetcher(rate=fetch_rate) if fetch_rate > 0 else None
+    with fetcher.patch_requests() if fetcher else nullcontext():
+        saved, failed = take_snapshot(path, indexes, extra, workers=workers)
+    print(f"Snapshot written to {path}: {saved} symbols saved, {len(failed)} failed")
+
+@app.command()
+def walk_forward(
+    symbol: str = typer.Argument(..., help="Stock symbol"),
+    strategy: str = typer.Option(None, help="Only run this strategy, e.g. ma1"),
+    train: int = typer.Option(250, help="Bars in each training window"),
+    test: int = typer.Option(20, help="Bars in each out-of-sample test window"),
+    step: int = typer.Option(None, help="Bars between consecutive windows, defaults to --test"),
+    anchored: bool = typer.Option(False, help="Grow the training window from the first bar instead of rolling it"),
+    executor: str = typer.Option(None, help="Backtest windows concurrently on a thread pool: thread"),
+    workers: int = typer.Option(None, help="Threads for --executor"),
+    replay: str = typer.Option(None, help="Read klines from a snapshot directory written by the snapshot command"),
+):
+    """Optimize on rolling training windows and report the out-of-sample profit of each test window"""
+    data_source = SnapshotDataSource(replay) if replay else None
+    stock = StockInfo(symbol, data_source=data_source)
+    result = stock.walk_forward(strategy=strategy, train=train, test=test, step=step, anchored=anchored,
+                                executor=executor, workers=workers)
+    if result.empty:
+        print(f"Unknown strategy '{strategy}'")
+        return
+    print(result.to_string(index=False))
+    for name, group in result.groupby('name', sort=False):
+        print(f"{name}: compounded out-of-sample profit {WalkForward.compounded(group):.2f}%")
+
+@app.command()
+def serve(
+    index: str = typer.Option("000300", help="China stock market index"),
+    allIndex: bool = typer.Option(False, help="Use all stock market index"),
+    interval: int = typer.Option(int(os.getenv("LOOP_INTERVAL", 10)), help="Minutes between cycles during trading sessions"),
+    store: bool = typer.Option(False, help="Read klines from the local column store under CACHE_PATH, appending only new bars"),
+    panel: bool = typer.Option(False, help="Compute every symbol of the index at once on (bars x symbols) arrays"),
+    fetch_rate: float = typer.Option(FETCH_RATE, help="Maximum kline download requests per second, 0 disables the rate limiter"),
+    pipeline: bool = typer.Option(False, help="Stream fetch, compute (process pool) and persist stages instead of computing the whole index first"),
+    timings: bool = typer.Option(False, help="Record per-stage and per-strategy timings and print a summary at the end of the run"),
+    timings_json: str = typer.Option(None, help="Also write the timing summary to this JSON file"),
+    replay: str = typer.Option(None, help="Replay a snapshot directory written by the snapshot command instead of fetching data"),
+):
+    """Run the notification service as a resident process"""
+    indexes = [index] if not allIndex else ["000001", "000300", "000905"]
+    kline_store = KlineStore() if store else None
+    fetcher = RateLimitedFetcher(rate=fetch_rate) if fetch_rate > 0 else None
+    data_source = SnapshotDataSource(replay) if replay else None
+    writer = strategy_select_writer()
+
+    def create_manager(idx, day):
+        # StockData 的 end_date 固定为创建的日期，跨日后 TradingDayCache 按新的日期重新创建
+        source = data_source or LiveDataSource(kline_store, stock_kwargs={'end_date': day})
+        sm = StocksManager(index=idx, store=kline_store, fetcher=fetcher, data_source=source)
+        sm.add_callback(queue_trade_records(writer))
+        return sm
+
+    managers = TradingDayCache(create_manager)
+
+    if timings or timings_json:
+        recorder.enable()
+
+    def run_cycle():
+        print(f"执行任务: {datetime.now()}")
+        recorder.reset()
+        for idx in indexes:
+            # 同一交易日内复用成分股列表、StockInfo 和数据库连接池
+            sm = managers.get(idx)
+            if panel:
+                sm.get_panel_result()
+            elif pipeline:
+                for _ in sm.iter_results():
+                    pass
+            else:
+                sm.get_result()
+        report_timings(timings_json)
 
+    scheduler = TradingScheduler(run_cycle, interval_minutes=interval)
+    signal.signal(signal.SIGTERM, lambda *args: scheduler.stop())
+    signal.signal(signal.SIGINT, lambda *args: scheduler.stop())
+    print(f"Notification service serving indexes: {', '.join(indexes)}, every {interval} minutes")
+    try:
+        scheduler.run()
+    finally:
+        # 退出前写出队列中剩余的记录
+        writer.close()
+        if fetcher is not None:
+            fetcher.close()
     print("Notification service stopped.")
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+class SyntheticStockData:
+    """
+    离线测试用的股票数据，提供与 StockData 相同的 symbol/kline 接口。
+    """
+    def __init__(self, symbol='000001', days=360, seed=0):
+        self.symbol = symbol
+        self.kline = make_kline(symbol, days, seed)
+
+    def __getitem__(self, key):
+        if key == '涨跌幅':
+            return float(self.kline['涨跌幅'].iloc[-1])
+        if key == '股票简称':
+            return self.symbol
+        raise KeyError(key)
+
+
+def make_kline(symbol='000001', days=360, seed=0):
+    """生成确定性的随机游走K线数据"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.02, days)
+    close = np.round(10 * np.exp(np.cumsum(returns)), 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.005, days)), 2)
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, days)))
+    volume = rng.lognormal(12, 0.6, days).round()
+    dates = pd.bdate_range('2023-01-02', periods=days).strftime('%Y-%m-%d')
+    change = np.concatenate([[0.0], np.diff(close) / close[:-1] * 100])
+    return pd.DataFrame({
+        '日期': dates,
+        '股票代码': symbol,
+        '开盘': open_,
+        '收盘': close,
+        '最高': np.round(high, 2),
+        '最低': np.round(low, 2),
+        '成交量': volume,
+        '涨跌幅': np.round(change, 2),
+    })
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from event_trader.config import PRICE_COL
+from event_trader.demo_account import DemoAccount, simulate_profits
+from event_trader.strategies import MA1Strategy, PriceDeviationStrategy, KDJStrategy
+from tests.helpers import SyntheticStockData, make_kline
+
+
+class TestSimulateProfits(unittest.TestCase):
+
+    def test_matches_demo_account(self):
+        data = make_kline(days=250, seed=8)
+        rng = np.random.default_rng(8)
+        buy = rng.random((20, len(data))) < 0.05
+        sell = rng.random((20, len(data))) < 0.05
+        profits = simulate_profits(data[PRICE_COL].to_numpy(), buy, sell)
+        for row in range(len(buy)):
+            account = DemoAccount(initial_cash=1000000)
+            for i, bar in data.iterrows():
+                if buy[row, i]:
+                    account.buy(bar, i)
+                elif sell[row, i]:
+                    account.sell(bar, i)
+            for symbol, shares in account.holdings.items():
+                if shares > 0:
+                    account.sell(data.iloc[-1], len(data) - 1)
+            self.assertEqual(profits[row], account.get_profit())
+
+
+class TestLedgers(unittest.TestCase):
+
+    def trade(self, ledger):
+        data = make_kline(days=60, seed=10)
+        account = DemoAccount(ledger=ledger)
+        for i in range(0, 60, 5):
+            if i % 10 == 0:
+                account.buy(data.iloc[i], i)
+            else:
+                account.sell(data.iloc[i], i)
+        account.buy(data.iloc[-1], 59)
+        return account
+
+    def test_array_ledger_matches_list_ledger(self):
+        expected = self.trade('list')
+        actual = self.trade('array')
+        self.assertEqual(actual.transactions, expected.transactions)
+        self.assertEqual(actual.get_account_status(), expected.get_account_status())
+        self.assertEqual(actual.get_transactions()['price'].tolist(), expected.get_transactions()['price'].tolist())
+
+    def test_profit_ledger_records_nothing(self):
+        expected = self.trade('list')
+        actual = self.trade('profit')
+        self.assertEqual(actual.transactions, [])
+        self.assertEqual(actual.get_profit(), expected.get_profit())
+        self.assertEqual(actual.get_account_status(), expected.get_account_status())
+
+
+class TestBatchOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stock_data = SyntheticStockData(days=300, seed=9)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def optimize(self, strategy_class, vectorized, params_range=None):
+        strategy = strategy_class(self.stock_data)
+        strategy.params_path = os.path.join(self.tmp.name, f'{strategy_class.name}.csv')
+        strategy.vectorized = vectorized
+        strategy.optimize_parameters(params_range=params_range)
+        return strategy.parameters
+
+    def test_batch_matches_row_wise_optimizer(self):
+        cases = [
+            (PriceDeviationStrategy, {'window': (3, 12), 'percent': (2, 8)}),
+            (MA1Strategy, {'window': (5, 15)}),
+            (KDJStrategy, {'n': (5, 8), 'm1': (2, 5), 'm2': (2, 4)}),
+        ]
+        for strategy_class, params_range in cases:
+            with self.subTest(strategy=strategy_class.name):
+                self.assertEqual(self.optimize(strategy_class, False, params_range),
+                                 self.optimize(strategy_class, True, params_range))
+
+    def test_signal_matrix_matches_generate_signals(self):
+        for strategy_class, names, combinations in [
+            (PriceDeviationStrategy, ['window', 'percent'], [(5, 3), (8, 3), (5, 7)]),
+            (MA1Strategy, ['window'], [(5,), (9,), (17,)]),
+        ]:
+            strategy = strategy_class(self.stock_data)
+            buy, sell = strategy.signal_matrix(names, combinations)
+            for row, combination in enumerate(combinations):
+                strategy.set_parameters(names, combination)
+                strategy.calculate_factors()
+                expected_buy, expected_sell = strategy.generate_signals()
+                np.testing.assert_array_equal(buy[row], expected_buy)
+                np.testing.assert_array_equal(sell[row], expected_sell)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from event_trader.data_source import DataSource, SnapshotDataSource, take_snapshot
+from event_trader.pipeline import FrameStockData
+from event_trader.stock_info import StockInfo
+from event_trader.stocks_manager import StocksManager
+from tests.helpers import make_kline
+
+
+class FakeSource(DataSource):
+    """代替网络数据的来源，记录每只股票被读取的次数"""
+    def __init__(self, codes, broken=()):
+        self.codes = codes
+        self.broken = set(broken)
+        self.klines = {code: make_kline(code, 200, seed) for seed, code in enumerate(codes)}
+        self.reads = {}
+
+    def stock_data(self, symbol):
+        if symbol in self.broken:
+            raise ConnectionError('timeout')
+        self.reads[symbol] = self.reads.get(symbol, 0) + 1
+        return FrameStockData(symbol, self.klines[symbol])
+
+    def index_codes(self, index):
+        return list(self.codes)
+
+
+def records(df):
+    return df.sort_values(['symbol', 'name']).drop(columns='symbol').to_dict('records')
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'snapshot')
+        # 'AB1234' 不是 A 股，不参与计算也不保存K线
+        self.source = FakeSource(['600000', '600001', '000002', 'AB1234'])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_round_trip(self):
+        saved, failed = take_snapshot(self.root, indexes=['000300'], source=self.source, workers=2)
+        self.assertEqual((saved, failed), (3, []))
+        snapshot = SnapshotDataSource(self.root)
+        self.assertEqual(snapshot.index_codes('000300'), self.source.codes)
+        self.assertEqual(snapshot.symbols(), ['000002', '600000', '600001'])
+        self.assertEqual(snapshot.info()['indexes'], ['000300'])
+        for symbol in snapshot.symbols():
+            kline = snapshot.stock_data(symbol).kline
+            expected = self.source.klines[symbol]
+            self.assertEqual(list(kline.columns), list(expected.columns))
+            self.assertEqual(list(kline['日期']), list(expected['日期']))
+            np.testing.assert_array_equal(kline['收盘'].to_numpy(), expected['收盘'].to_numpy())
+
+    def test_replay_matches_live_run(self):
+        take_snapshot(self.root, indexes=['000300'], source=self.source)
+        reads = dict(self.source.reads)
+
+        live = StocksManager(index='000300', data_source=self.source).get_result()
+        replay = StocksManager(index='000300', data_source=SnapshotDataSource(self.root))
+        self.assertEqual(replay.symbols, ['600000', '600001', '000002'])
+        first = replay.get_result()
+        second = replay.get_result()
+        np.testing.assert_equal(records(first), records(live))
+        np.testing.assert_equal(records(second), records(first))
+        # 回放只读本地文件，不再访问数据来源
+        self.assertEqual(self.source.reads, {symbol: reads[symbol] + 1 for symbol in reads})
+
+    def test_optimize_skips_failed_symbols(self):
+        optimized = []
+
+        class Optimizer:
+            def __init__(self, workers=None):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def optimize_stocks(self, stocks):
+                optimized.extend(stock.symbol for stock in stocks)
+
+        manager = StocksManager(index='000300', data_source=FakeSource(['600000', '600001', '000002'], broken=['600001']))
+        with mock.patch('event_trader.stocks_manager.ParallelOptimizer', Optimizer):
+            manager.optimize(workers=2)
+        self.assertEqual(optimized, ['600000', '000002'])
+
+    def test_failed_symbols_are_reported(self):
+        source = FakeSource(['600000', '600001'], broken=['600001'])
+        saved, failed = take_snapshot(self.root, symbols=['600000', '600001'], source=source)
+        self.assertEqual((saved, failed), (1, ['600001']))
+        with self.assertRaises(KeyError):
+            SnapshotDataSource(self.root).stock_data('600001')
+        with self.assertRaises(KeyError):
+            SnapshotDataSource(self.root).index_codes('000905')
+
+    def test_csv_klines(self):
+        os.makedirs(os.path.join(self.root, 'csv'))
+        os.makedirs(os.path.join(self.root, 'index'))
+        kline = self.source.klines['000002']
+        kline.to_csv(os.path.join(self.root, 'csv', '000002.csv'), index=False)
+        with open(os.path.join(self.root, 'index', '000300.json'), 'w') as f:
+            json.dump(['000002'], f)
+
+        snapshot = SnapshotDataSource(self.root)
+        self.assertEqual(snapshot.symbols(), ['000002'])
+        stock = StockInfo('000002', data_source=snapshot)
+        self.assertEqual(stock.stock_data.kline['股票代码'].iloc[0], '000002')
+        expected = StockInfo('000002', stock_data=FrameStockData('000002', kline)).get_result()
+        np.testing.assert_equal(stock.get_result().to_dict('records'), expected.to_dict('records'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import pandas as pd
+from event_trader.factor_cache import FactorCache
+from event_trader.stock_info import StockInfo
+from event_trader.strategies import MA2Strategy, BollStrategy
+from tests.helpers import SyntheticStockData
+
+
+class TestFactorCache(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        cache = FactorCache()
+        series = pd.Series(range(50), dtype=float, name='收盘')
+        first = cache.sma('000001', series, 5)
+        second = cache.sma('000001', series, 5)
+        self.assertIs(first, second)
+        cache.sma('000002', series, 5)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_lru_bound(self):
+        cache = FactorCache(maxsize=2)
+        series = pd.Series(range(50), dtype=float, name='收盘')
+        for window in (3, 4, 5):
+            cache.sma('000001', series, window)
+        self.assertEqual(len(cache), 2)
+        cache.sma('000001', series, 3)
+        self.assertEqual(cache.stats()['misses'], 4)
+
+    def test_new_bar_invalidates(self):
+        cache = FactorCache()
+        series = pd.Series(range(50), dtype=float, name='收盘')
+        cache.sma('000001', series, 5)
+        cache.sma('000001', pd.concat([series, pd.Series([100.0], name='收盘')], ignore_index=True), 5)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_same_length_and_last_value_do_not_collide(self):
+        cache = FactorCache()
+        first = cache.sma('000001', pd.Series([1, 2, 3, 4, 5], dtype=float, name='收盘'), 2)
+        second = cache.sma('000001', pd.Series([9, 9, 9, 9, 5], dtype=float, name='收盘'), 2)
+        self.assertEqual(first.iloc[-1], 4.5)
+        self.assertEqual(second.iloc[-1], 7.0)
+
+    def test_rsv_depends_on_high_and_low(self):
+        cache = FactorCache()
+        kline = SyntheticStockData(days=60, seed=1).kline
+        before = cache.rsv('000001', kline, 9)
+        # 盘中刷新：最高价变化，收盘价不变
+        kline = kline.copy()
+        kline.loc[kline.index[-1], '最高'] += 1.0
+        after = cache.rsv('000001', kline, 9)
+        self.assertEqual(cache.stats()['misses'], 2)
+        self.assertNotEqual(before[1][-1], after[1][-1])
+
+    def test_reload_clears_cache(self):
+        stock = StockInfo('000001', stock_data=SyntheticStockData(days=120, seed=3))
+        stock.get_result()
+        self.assertGreater(len(stock.factor_cache), 0)
+        stock.reload()
+        self.assertEqual(len(stock.factor_cache), 0)
+
+    def test_cached_factors_match_direct_computation(self):
+        stock_data = SyntheticStockData(days=200, seed=2)
+        strategy = BollStrategy(stock_data)
+        strategy.calculate_factors()
+        expected = stock_data.kline['收盘'].rolling(window=20).std()
+        pd.testing.assert_series_equal(strategy.data['std'], expected, check_names=False)
+
+    def test_rolling_extrema_match_slices(self):
+        # 与 MACD 原来逐行切片 iloc[i-20:i+1].min()/max() 相同，NaN 被跳过
+        series = SyntheticStockData(days=120, seed=4).kline['收盘'].copy()
+        series.iloc[30] = float('nan')
+        cache = FactorCache()
+        low, high = cache.rolling_min('000001', series, 21), cache.rolling_max('000001', series, 21)
+        for i in range(20, len(series)):
+            self.assertEqual(low.iloc[i], series.iloc[i - 20:i + 1].min())
+            self.assertEqual(high.iloc[i], series.iloc[i - 20:i + 1].max())
+
+    def test_optimizer_reuses_series(self):
+        strategy = MA2Strategy(SyntheticStockData(days=200, seed=2))
+        strategy.save_parameters = lambda: None
+        strategy.optimize_parameters(params_range={'short_window': (3, 8), 'long_window': (12, 20)},
+                                     params_step={'short_window': 1, 'long_window': 1})
+        stats = strategy.factor_cache.stats()
+        # 5 个短周期 + 8 个长周期，每条均线只计算一次
+        self.assertEqual(stats['misses'], 13)
+        self.assertGreater(stats['hits'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from event_trader.fetcher import TokenBucket, RateLimitedFetcher
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # 长连接，客户端复用连接时同一个端口会发起多个请求
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            failing = server.failures > 0
+            if failing:
+                server.failures -= 1
+        try:
+            time.sleep(server.latency)
+            if failing:
+                self.reply(503, {'error': 'busy'}, {'Retry-After': '0'})
+            else:
+                self.reply(200, {'path': self.path})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, payload, headers={}):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, failures=0):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.failures = failures
+        self.requests = 0
+        self.ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(clock.now, 1.0)
+        # 空闲期间补充的令牌不超过容量
+        clock.now += 10
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0)
+        self.assertGreater(bucket.acquire(), 0)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimitedFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_rate_limit(self):
+        with RateLimitedFetcher(rate=50, burst=1, concurrency=4) as fetcher:
+            start = time.monotonic()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                responses = list(executor.map(lambda i: fetcher.get(f'{self.server.url}/kline/{i}'), range(11)))
+            elapsed = time.monotonic() - start
+        self.assertEqual([r.json()['path'] for r in responses], [f'/kline/{i}' for i in range(11)])
+        # 第一个请求使用初始令牌，之后每 20ms 一个
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertEqual(fetcher.stats['requests'], 11)
+
+    def test_concurrency_bound_and_connection_reuse(self):
+        self.server.latency = 0.05
+        with RateLimitedFetcher(rate=1000, burst=1000, concurrency=2) as fetcher:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda i: fetcher.get(f'{self.server.url}/kline/{i}'), range(12)))
+        self.assertEqual(self.server.requests, 12)
+        self.assertLessEqual(self.server.max_in_flight, 2)
+        self.assertLessEqual(len(self.server.ports), 2)
+
+    def test_retry_with_backoff(self):
+        self.server.failures = 2
+        sleeps = []
+        fetcher = RateLimitedFetcher(rate=1000, retries=3, backoff=0.01, sleep=lambda s: sleeps.append(s), rng=lambda: 1.0)
+        response = fetcher.get(f'{self.server.url}/kline')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(fetcher.stats['retries'], 2)
+        # 指数退避：第 n 次重试最多等待 backoff * 2 ** n
+        self.assertEqual(sleeps, [0.01, 0.02])
+
+    def test_retries_exhausted_returns_last_response(self):
+        self.server.failures = 10
+        fetcher = RateLimitedFetcher(rate=1000, retries=1, backoff=0, sleep=lambda s: None)
+        response = fetcher.get(f'{self.server.url}/kline')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(fetcher.stats['failures'], 1)
+
+    def test_connection_errors_are_retried(self):
+        # 绑定后立即关闭的端口上没有服务，连接会被拒绝
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        fetcher = RateLimitedFetcher(rate=1000, retries=2, backoff=0, sleep=lambda s: None, timeout=1)
+        with self.assertRaises(requests.ConnectionError):
+            fetcher.get(f'http://127.0.0.1:{port}/kline')
+        self.assertEqual(fetcher.stats['requests'], 3)
+        self.assertEqual(fetcher.stats['failures'], 1)
+
+    def test_patch_requests(self):
+        original = requests.get
+        fetcher = RateLimitedFetcher(rate=1000)
+        with fetcher.patch_requests():
+            with fetcher.patch_requests():
+                self.assertEqual(requests.get(f'{self.server.url}/a').json()['path'], '/a')
+            self.assertEqual(requests.get(f'{self.server.url}/b').status_code, 200)
+        self.assertIs(requests.get, original)
+        self.assertEqual(fetcher.stats['requests'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
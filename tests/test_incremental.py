@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from event_trader import StockInfo
+from event_trader.strategies import STRATEGIES
+from tests.helpers import SyntheticStockData, make_kline
+
+FACTORS = {
+    'ma2': ['short_mavg', 'long_mavg', 'short_mavg_derivative', 'long_mavg_derivative'],
+    'kdj': ['L_n', 'H_n', 'RSV', 'K', 'D', 'J'],
+    'ma1': ['moving_avg', 'mavg_derivative'],
+    'boll': ['moving_avg', 'std', 'upper', 'down'],
+    'macd': ['EMA_short', 'EMA_long', 'DIF', 'DEA', 'MACD', 'low_period', 'high_period'],
+    'vma': ['volume_ma', 'price_ma', 'rsi'],
+    'pd': ['moving_avg', 'percent'],
+}
+
+
+class TestIncrementalUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.full = make_kline(days=160, seed=11)
+        self.stock_data = SyntheticStockData(days=150, seed=11)
+        self.stock_data.kline = self.full.iloc[:150].copy()
+
+    def bar(self, i, **overrides):
+        bar = self.full.iloc[i].to_dict()
+        bar.update(overrides)
+        return bar
+
+    def expected(self, kline):
+        stock_data = SyntheticStockData()
+        stock_data.kline = kline.reset_index(drop=True)
+        results = {}
+        for strategy_class in STRATEGIES:
+            strategy = strategy_class(stock_data)
+            strategy.calculate_factors()
+            results[strategy_class.name] = (strategy.data.iloc[-1], strategy.status())
+        return results
+
+    def assert_matches(self, stock, statuses, kline):
+        for name, (row, status) in self.expected(kline).items():
+            self.assertEqual(statuses[name], status, name)
+            strategy = stock.strategies[name]
+            for factor in FACTORS[name]:
+                np.testing.assert_allclose(strategy.data[factor].iloc[-1], row[factor], rtol=1e-9,
+                                           err_msg=f'{name}.{factor}')
+
+    def test_append_and_replace_bars(self):
+        stock = StockInfo('000001', stock_data=self.stock_data)
+        stock.update_bar(self.bar(150))
+        for i in range(151, 160):
+            statuses = stock.update_bar(self.bar(i))
+            self.assert_matches(stock, statuses, self.full.iloc[:i + 1])
+
+        # 盘中刷新：同一日期的K线被替换
+        replaced = self.bar(159, 收盘=self.full['收盘'].iloc[159] * 1.03)
+        statuses = stock.update_bar(replaced)
+        self.assertTrue(all(len(item.data) == 160 for item in stock.strategies.values()))
+        kline = self.full.copy()
+        kline.loc[159, '收盘'] = replaced['收盘']
+        self.assert_matches(stock, statuses, kline)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+import pandas as pd
+from event_trader.indicators import kdj, kdj_batch
+from event_trader.utils import continuous_growth, is_continuous_growth, shift
+from tests.helpers import make_kline
+
+
+def reference_kdj(data, n, m1, m2):
+    """逐行写入 DataFrame 的原始 KDJ 实现"""
+    data = data.copy()
+    data['L_n'] = data['最低'].rolling(window=n, min_periods=1).min()
+    data['H_n'] = data['最高'].rolling(window=n, min_periods=1).max()
+    data['RSV'] = (data['收盘'] - data['L_n']) / (data['H_n'] - data['L_n']) * 100
+    data['K'] = 50.0
+    data['D'] = 50.0
+    for i in range(1, len(data)):
+        k_value = ((m1 - 1) / m1) * data.loc[i-1, 'K'] + (1 / m1) * data.loc[i, 'RSV']
+        d_value = ((m2 - 1) / m2) * data.loc[i-1, 'D'] + (1 / m2) * k_value
+        data.loc[i, 'K'] = float(k_value)
+        data.loc[i, 'D'] = float(d_value)
+    data['J'] = 3.0 * data['K'] - 2.0 * data['D']
+    return data
+
+
+class TestKDJ(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_kline(days=150, seed=7)
+
+    def test_kdj_is_bit_compatible(self):
+        for n, m1, m2 in [(9, 3, 3), (5, 2, 19), (19, 7, 2)]:
+            expected = reference_kdj(self.data, n, m1, m2)
+            k, d, j = kdj(self.data['最高'], self.data['最低'], self.data['收盘'], n, m1, m2)
+            np.testing.assert_array_equal(k, expected['K'].to_numpy())
+            np.testing.assert_array_equal(d, expected['D'].to_numpy())
+            np.testing.assert_array_equal(j, expected['J'].to_numpy())
+
+    def test_kdj_batch_matches_single(self):
+        params = [(n, m1, m2) for n in (5, 9) for m1 in (2, 3, 11) for m2 in (3, 4)]
+        k, d, j = kdj_batch(self.data['最高'], self.data['最低'], self.data['收盘'], params)
+        self.assertEqual(k.shape, (len(params), len(self.data)))
+        for row, (n, m1, m2) in enumerate(params):
+            single = kdj(self.data['最高'], self.data['最低'], self.data['收盘'], n, m1, m2)
+            np.testing.assert_array_equal(k[row], single[0])
+            np.testing.assert_array_equal(d[row], single[1])
+            np.testing.assert_array_equal(j[row], single[2])
+
+
+class TestRollingWindows(unittest.TestCase):
+
+    def setUp(self):
+        self.close = make_kline(days=150, seed=3)['收盘']
+
+    def test_continuous_growth_matches_slices(self):
+        values = self.close.to_numpy()
+        for n in (1, 2, 3, 5):
+            for reverse in (False, True):
+                expected = [is_continuous_growth(self.close.iloc[:i + 1], n=n, reverse=reverse) for i in range(len(values))]
+                np.testing.assert_array_equal(continuous_growth(values, n=n, reverse=reverse), expected)
+        self.assertFalse(continuous_growth([1.0, 2.0], n=3).any())
+        # 相等不算增长
+        self.assertEqual(list(continuous_growth([1.0, 2.0, 2.0, 3.0, 4.0], n=3)), [False, False, False, False, True])
+
+    def test_columns_of_2d_arrays(self):
+        values = np.column_stack([self.close.to_numpy(), self.close.to_numpy()[::-1]])
+        values[:10, 1] = np.nan
+        for n in (2, 3):
+            for reverse in (False, True):
+                expected = np.column_stack([continuous_growth(values[:, j], n=n, reverse=reverse) for j in range(2)])
+                np.testing.assert_array_equal(continuous_growth(values, n=n, reverse=reverse), expected)
+        for periods in (1, 3):
+            expected = np.column_stack([pd.Series(values[:, j]).shift(periods).to_numpy() for j in range(2)])
+            np.testing.assert_array_equal(shift(values, periods), expected)
+            np.testing.assert_array_equal(shift(values[:, 0], periods), expected[:, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import contextlib
+import io
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from event_trader.instrumentation import Recorder, recorder, profile_threads
+from event_trader.stock_info import StockInfo
+from event_trader.stocks_manager import StocksManager
+from event_trader.strategies import STRATEGIES, MA1Strategy
+from tests.helpers import SyntheticStockData
+
+
+def spin(n=20000):
+    return sum(i * i for i in range(n))
+
+
+def notify(df, symbol, manager):
+    pass
+
+
+class TestRecorder(unittest.TestCase):
+
+    def test_disabled_records_nothing(self):
+        rec = Recorder()
+        with rec.timer('fetch'):
+            pass
+        self.assertEqual(rec.timed('stage')(lambda x: x + 1)(1), 2)
+        self.assertEqual(rec.summary(), [])
+
+    def test_timer_and_timed(self):
+        rec = Recorder()
+        rec.enable()
+        with rec.timer('fetch', '600000'):
+            spin()
+        square = rec.timed('compute', key=lambda x: f'n={x}')(lambda x: x * x)
+        self.assertEqual(square(3), 9)
+        square(3)
+        rows = {(row['stage'], row['key']): row for row in rec.summary()}
+        self.assertEqual(set(rows), {('fetch', '600000'), ('compute', 'n=3')})
+        self.assertEqual(rows[('compute', 'n=3')]['count'], 2)
+        fetch = rows[('fetch', '600000')]
+        self.assertGreater(fetch['total'], 0)
+        self.assertLessEqual(fetch['min'], fetch['p50'])
+        self.assertLessEqual(fetch['p95'], fetch['max'])
+        self.assertEqual(sum(fetch['histogram'].values()), 1)
+
+    def test_exceptions_are_timed(self):
+        rec = Recorder()
+        rec.enable()
+
+        @rec.timed('persist')
+        def fail():
+            raise ValueError('database is locked')
+
+        with self.assertRaises(ValueError):
+            fail()
+        self.assertEqual(rec.summary()[0]['count'], 1)
+
+    def test_quantiles_from_histogram(self):
+        rec = Recorder()
+        for seconds in [0.001] * 90 + [0.1] * 10:
+            rec.add('backtest', 'ma1', seconds)
+        row = rec.summary()[0]
+        # 区间上界：1ms 落在 (512us, 1024us]，100ms 的最大值为 0.1
+        self.assertAlmostEqual(row['p50'], 1024e-6)
+        self.assertAlmostEqual(row['p95'], 0.1)
+        self.assertAlmostEqual(row['mean'], (0.09 + 1.0) / 100)
+
+    def test_report_and_dump(self):
+        rec = Recorder()
+        rec.add('factors', 'kdj', 0.002)
+        out = io.StringIO()
+        rec.report(file=out)
+        self.assertIn('factors', out.getvalue())
+        self.assertIn('kdj', out.getvalue())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'timings.json')
+            rec.dump(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)[0]['key'], 'kdj')
+
+
+class TestHotPaths(unittest.TestCase):
+
+    def setUp(self):
+        recorder.reset()
+        recorder.enable()
+
+    def tearDown(self):
+        recorder.disable()
+        recorder.reset()
+
+    def test_stock_and_strategy_stages(self):
+        sm = StocksManager(symbols=['000001', '000002'])
+        for seed, symbol in enumerate(sm.symbols):
+            sm.stocks[symbol] = StockInfo(symbol, stock_data=SyntheticStockData(symbol, days=200, seed=seed))
+        sm.add_callback(notify)
+        sm.get_result()
+        sm.stocks['000001'].strategies['ma1'].status()
+        rows = {(row['stage'], row['key']): row for row in recorder.summary()}
+        names = [cls.name for cls in STRATEGIES]
+        for stage in ('load', 'factors', 'backtest'):
+            for name in names:
+                self.assertIn((stage, name), rows)
+        self.assertEqual(rows[('factors', 'kdj')]['count'], 2)
+        self.assertEqual(rows[('stock', None)]['count'], 2)
+        self.assertEqual(rows[('callback', 'notify')]['count'], 2)
+        self.assertEqual(rows[('status', 'ma1')]['count'], 1)
+
+    def test_nested_calculate_factors_timed_once(self):
+        class Wrapped(MA1Strategy):
+            def calculate_factors(self):
+                super().calculate_factors()
+
+        strategy = Wrapped(SyntheticStockData(days=100))
+        strategy.calculate_factors()
+        rows = recorder.summary()
+        self.assertEqual([(row['stage'], row['key'], row['count']) for row in rows if row['stage'] == 'factors'],
+                         [('factors', 'ma1', 1)])
+
+    def test_get_result_prints_nothing(self):
+        # 耗时只记录在 recorder 中，由 --timings 打印
+        sm = StocksManager(symbols=['000001'])
+        sm.stocks['000001'] = StockInfo('000001', stock_data=SyntheticStockData(days=100))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            sm.get_result()
+        self.assertEqual(out.getvalue(), '')
+
+
+class TestProfileThreads(unittest.TestCase):
+
+    def test_worker_threads_are_profiled(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'run.prof')
+            with profile_threads(path):
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    list(executor.map(spin, [1000] * 4))
+            stats = pstats.Stats(path)
+        calls = [value[1] for (filename, line, name), value in stats.stats.items() if name == 'spin']
+        self.assertEqual(sum(calls), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
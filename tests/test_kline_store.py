@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from event_trader.kline_store import KlineStore, StoredStockData
+from event_trader.stock_info import StockInfo
+from tests.helpers import SyntheticStockData, make_kline
+
+
+class TestKlineStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = KlineStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_is_memory_mapped(self):
+        kline = make_kline('000001', 200, seed=1)
+        self.store.write('000001', kline)
+        loaded = self.store.read('000001')
+        pd.testing.assert_frame_equal(loaded, kline)
+        self.assertIsInstance(loaded['收盘'].to_numpy().base, np.memmap)
+        # 写时复制：修改读取结果不会写回文件
+        loaded.loc[0, '收盘'] = -1.0
+        self.assertEqual(self.store.read('000001')['收盘'].iloc[0], kline['收盘'].iloc[0])
+
+    def test_append_only_new_bars(self):
+        kline = make_kline('000001', 120, seed=2)
+        self.store.write('000001', kline.iloc[:100])
+        size = os.path.getsize(self.store._file('000001', 3))
+
+        # 第 100 根与已存储的最后一根同日，视为盘中刷新
+        update = kline.iloc[99:].copy()
+        update.loc[99, '收盘'] = 99.0
+        self.assertEqual(self.store.append('000001', update), (20, True))
+        self.assertEqual(os.path.getsize(self.store._file('000001', 3)), size + 20 * 8)
+
+        expected = kline.copy()
+        expected.loc[99, '收盘'] = 99.0
+        pd.testing.assert_frame_equal(self.store.read('000001'), expected)
+        self.assertEqual(self.store.append('000001', kline.iloc[:50]), (0, False))
+        self.assertEqual(self.store.last_date('000001'), kline['日期'].iloc[-1])
+
+    def test_earlier_reads_are_not_changed(self):
+        kline = make_kline('000001', 120, seed=2)
+        self.store.write('000001', kline.iloc[:100])
+        before = self.store.read('000001')
+        close = before['收盘'].iloc[-1]
+
+        update = kline.iloc[99:].copy()
+        update.loc[99, '收盘'] = 99.0
+        self.store.append('000001', update)
+        self.assertEqual(self.store.read('000001')['收盘'].iloc[99], 99.0)
+        # 替换最后一根时写入新文件，之前读取的 DataFrame 仍是原来的值
+        self.assertEqual(before['收盘'].iloc[-1], close)
+
+        self.store.write('000001', kline.iloc[:10])
+        self.assertEqual(len(before), 100)
+        self.assertEqual(before['收盘'].iloc[-1], close)
+        pd.testing.assert_frame_equal(self.store.read('000001'), kline.iloc[:10])
+
+    def test_refresh_rewrites_adjusted_history(self):
+        kline = make_kline('000001', 120, seed=4)
+        self.store.write('000001', kline.iloc[:100])
+
+        source = SyntheticStockData('000001', days=120, seed=4)
+        source.kline = kline.iloc[20:].reset_index(drop=True)
+        stock_data = StoredStockData('000001', self.store, source, days=None)
+        # 历史没有变化时只追加新K线，保留存储中更早的K线
+        self.assertEqual(stock_data.refresh(), 20)
+        pd.testing.assert_frame_equal(self.store.read('000001'), kline)
+
+        # 除权除息后前复权价格整体下调，按新下载的K线整体重写
+        adjusted = kline.iloc[20:].reset_index(drop=True)
+        for column in ('开盘', '收盘', '最高', '最低'):
+            adjusted.loc[:110, column] = (adjusted.loc[:110, column] * 0.95).round(2)
+        source.kline = adjusted
+        self.assertTrue(self.store.history_changed('000001', adjusted))
+        self.assertEqual(stock_data.refresh(), len(adjusted))
+        pd.testing.assert_frame_equal(self.store.read('000001'), adjusted)
+        self.assertFalse(self.store.history_changed('000001', adjusted))
+
+    def test_append_widens_dtype(self):
+        kline = make_kline('000001', 10)
+        kline['成交量'] = kline['成交量'].astype(np.int64)
+        self.store.write('000001', kline.iloc[:5])
+        tail = kline.iloc[5:].copy()
+        tail['成交量'] = tail['成交量'] + 0.5
+        self.store.append('000001', tail)
+        self.assertEqual(self.store.read('000001')['成交量'].tolist(), kline.iloc[:5]['成交量'].tolist() + tail['成交量'].tolist())
+
+    def test_read_from_start_date(self):
+        kline = make_kline('000001', 50)
+        self.store.write('000001', kline)
+        loaded = self.store.read('000001', start=kline['日期'].iloc[30])
+        pd.testing.assert_frame_equal(loaded, kline.iloc[30:].reset_index(drop=True))
+        self.assertIsNone(self.store.read('000002'))
+
+    def test_stored_stock_data_as_source(self):
+        source = SyntheticStockData('000001', days=200, seed=3)
+        stock_data = StoredStockData('000001', self.store, source, days=None, is_stale=lambda meta: meta is None)
+        pd.testing.assert_frame_equal(stock_data.kline, source.kline)
+        self.assertEqual(self.store.symbols(), ['000001'])
+
+        offline = StockInfo('000001', stock_data=StoredStockData('000001', self.store, days=None))
+        online = StockInfo('000001', stock_data=source)
+        pd.testing.assert_frame_equal(offline.get_result().drop(columns='stock_profit'),
+                                      online.get_result().drop(columns='stock_profit'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_headless_import_skips_plotting(self):
+        code = (
+            "import sys, event_trader, event_trader.strategies; "
+            "print(any(m.split('.')[0] in ('matplotlib', 'mplfinance') for m in sys.modules))"
+        )
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import numpy as np
+import pandas as pd
+from event_trader.panel import Panel, panel_result
+from event_trader.stock_info import StockInfo
+from event_trader.stocks_manager import StocksManager
+from event_trader.strategies import PriceDeviationStrategy
+from tests.helpers import SyntheticStockData, make_kline
+
+
+class FreshStockData(SyntheticStockData):
+    """与 StockData 一样每次访问 kline 都返回新的 DataFrame，各策略的因子互不影响"""
+    def __init__(self, kline):
+        self.symbol = kline['股票代码'].iloc[0]
+        self._kline = kline
+
+    @property
+    def kline(self):
+        return self._kline.copy()
+
+    def __getitem__(self, key):
+        if key == '涨跌幅':
+            close = self._kline['收盘']
+            return (close.iloc[-1] - close.iloc[0]) * 100 / close.iloc[0]
+        return super().__getitem__(key)
+
+
+class TestPanel(unittest.TestCase):
+
+    def setUp(self):
+        # 不同长度的历史，验证右对齐后每列与逐只计算一致
+        lengths = [360, 300, 120, 45] + [360] * 16
+        self.klines = {f'9{i:05d}': make_kline(f'9{i:05d}', days, seed=i) for i, days in enumerate(lengths)}
+
+    def test_right_aligned(self):
+        panel = Panel(self.klines)
+        self.assertEqual(panel['收盘'].shape, (360, 20))
+        self.assertEqual(panel.start.tolist()[:5], [0, 60, 240, 315, 0])
+        np.testing.assert_array_equal(panel['收盘'][240:, 2], self.klines['900002']['收盘'].to_numpy())
+        self.assertTrue(np.isnan(panel['收盘'][:240, 2]).all())
+
+    def test_matches_get_result(self):
+        result = panel_result(self.klines)
+        self.assertEqual(len(result), 20 * 7)
+        self.assertTrue(result['status'].isin(['Buy', 'Sell']).any())
+        for symbol, kline in self.klines.items():
+            expected = StockInfo(symbol, stock_data=FreshStockData(kline)).get_result()
+            actual = result[result['symbol'] == symbol].reset_index(drop=True)
+            self.assertEqual(list(actual.columns), list(expected.columns) + ['symbol'])
+            for (_, a), (_, e) in zip(actual.iterrows(), expected.iterrows()):
+                with self.subTest(symbol=symbol, strategy=e['name']):
+                    self.assertEqual(a['name'], e['name'])
+                    self.assertEqual(a['status'], e['status'])
+                    self.assertEqual(a['profit'], e['profit'])
+                    self.assertAlmostEqual(a['stock_profit'], e['stock_profit'])
+                    self.assertEqual(a['parameters'], e['parameters'])
+                    self.assertEqual(list(a['factors']), list(e['factors']))
+                    for key, value in e['factors'].items():
+                        if isinstance(value, str) or pd.isna(value):
+                            self.assertTrue(a['factors'][key] == value or pd.isna(a['factors'][key]))
+                        else:
+                            self.assertEqual(a['factors'][key], value, key)
+
+    def test_uses_strategy_signal_rules(self):
+        class Momentum(PriceDeviationStrategy):
+            """偏离均线 2% 后顺势交易：与 pd 的规则相反"""
+            @staticmethod
+            def signal_rules(data, index, parameters):
+                buy, sell = PriceDeviationStrategy.signal_rules(data, index, {**parameters, 'percent': 2})
+                return sell, buy
+
+        # 面板模式使用策略类上的规则，不另写一份
+        result = panel_result(self.klines, [Momentum])
+        self.assertTrue((result['profit'] != 0).any())
+        for symbol, kline in self.klines.items():
+            expected = StockInfo(symbol, stock_data=FreshStockData(kline), strategies=[Momentum]).get_result()
+            actual = result[result['symbol'] == symbol].reset_index(drop=True)
+            with self.subTest(symbol=symbol):
+                self.assertEqual(actual['status'].iloc[0], expected['status'].iloc[0])
+                self.assertEqual(actual['profit'].iloc[0], expected['profit'].iloc[0])
+
+    def test_stocks_manager_callbacks(self):
+        sm = StocksManager(symbols=list(self.klines)[:3])
+        sm.load_klines = lambda: self.klines
+        seen = []
+        sm.add_callback(lambda df, symbol, manager: seen.append((symbol, len(df))))
+        result = sm.get_panel_result()
+        self.assertEqual(seen, [('900000', 7), ('900001', 7), ('900002', 7)])
+        self.assertEqual(len(result), 21)
+        self.assertIs(sm.result, result)
+
+    def test_empty(self):
+        self.assertTrue(panel_result({'900009': pd.DataFrame()}).empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
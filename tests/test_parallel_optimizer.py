@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+import warnings
+from event_trader.parallel_optimizer import ParallelOptimizer
+from event_trader.strategies import MA2Strategy, BollStrategy, KDJStrategy
+from tests.helpers import SyntheticStockData
+
+
+class TestParallelOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stock_data = SyntheticStockData(days=200, seed=4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, strategy_class, name):
+        strategy = strategy_class(self.stock_data)
+        strategy.params_path = os.path.join(self.tmp.name, name, f'{strategy_class.name}.csv')
+        return strategy
+
+    def test_matches_sequential_optimizer(self):
+        cases = [
+            (MA2Strategy, {'short_window': (3, 9), 'long_window': (12, 24)}, {'short_window': 1, 'long_window': 2}),
+            (BollStrategy, {'window': (10, 22)}, {'window': 2, 'std': 0.5}),
+            (KDJStrategy, {'n': (5, 9), 'm1': (2, 5), 'm2': (2, 5)}, None),
+        ]
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', ResourceWarning)
+            with ParallelOptimizer(workers=2) as optimizer:
+                for strategy_class, params_range, params_step in cases:
+                    with self.subTest(strategy=strategy_class.name):
+                        sequential = self.make(strategy_class, 'sequential')
+                        sequential.optimize_parameters(params_range=params_range, params_step=params_step)
+                        parallel = self.make(strategy_class, 'parallel')
+                        optimizer.optimize(parallel, params_range=params_range, params_step=params_step)
+                        self.assertEqual(sequential.parameters, parallel.parameters)
+                        with open(sequential.params_path) as a, open(parallel.params_path) as b:
+                            self.assertEqual(a.read(), b.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import unittest
+import numpy as np
+from event_trader.pipeline import Pipeline, FrameStockData, compute_result
+from event_trader.stock_info import StockInfo
+from event_trader.stocks_manager import StocksManager
+from tests.helpers import make_kline
+
+
+SYMBOLS = ['000001', '000002', '000004', '000005', '000006', '000007']
+
+
+def failing_compute(symbol, kline, **kwargs):
+    if symbol == '000002':
+        raise ValueError('broken kline')
+    return compute_result(symbol, kline, **kwargs)
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.klines = {symbol: make_kline(symbol, 200, seed) for seed, symbol in enumerate(SYMBOLS)}
+
+    def manager(self):
+        sm = StocksManager(symbols=list(SYMBOLS))
+        sm.fetch_kline = lambda symbol: self.klines[symbol]
+        return sm
+
+    def expected(self, symbol):
+        kline = self.klines[symbol]
+        return StockInfo(symbol, stock_data=FrameStockData(symbol, kline)).get_result()
+
+    def test_matches_per_symbol_results(self):
+        for executor in ('thread', 'process'):
+            with self.subTest(executor=executor):
+                sm = self.manager()
+                seen = []
+                sm.add_callback(lambda df, symbol, manager: seen.append(symbol))
+                results = {df['symbol'].iloc[0]: df for df in sm.iter_results(compute_workers=2, executor=executor)}
+                self.assertEqual(sorted(results), sorted(SYMBOLS))
+                self.assertEqual(sorted(seen), sorted(SYMBOLS))
+                for symbol, df in results.items():
+                    expected = self.expected(symbol)
+                    np.testing.assert_equal(df.drop(columns='symbol').to_dict('records'), expected.to_dict('records'))
+
+    def test_results_stream_before_fetching_finishes(self):
+        release = threading.Event()
+
+        def fetch(symbol):
+            if symbol == SYMBOLS[-1]:
+                self.assertTrue(release.wait(10))
+            return self.klines[symbol]
+
+        pipeline = Pipeline(fetch, fetch_workers=2, compute_workers=2, executor='thread')
+        results = pipeline.run(SYMBOLS)
+        symbol, df = next(results)
+        # 最后一只股票还在下载时已经得到了第一个结果
+        self.assertNotEqual(symbol, SYMBOLS[-1])
+        release.set()
+        rest = [item[0] for item in results]
+        self.assertEqual(sorted([symbol] + rest), sorted(SYMBOLS))
+
+    def test_failures_are_skipped(self):
+        def fetch(symbol):
+            if symbol == '000004':
+                raise ConnectionError('timeout')
+            return self.klines[symbol]
+
+        pipeline = Pipeline(fetch, compute=failing_compute, compute_workers=2, executor='thread')
+        symbols = sorted(item[0] for item in pipeline.run(SYMBOLS))
+        self.assertEqual(symbols, ['000001', '000005', '000006', '000007'])
+
+    def test_early_close_stops_fetching(self):
+        fetched = []
+        pipeline = Pipeline(lambda symbol: (fetched.append(symbol), self.klines[symbol])[1],
+                            fetch_workers=1, compute_workers=1, executor='thread', queue_size=1)
+        results = pipeline.run(SYMBOLS * 10)
+        next(results)
+        results.close()
+        # 队列有界，下载线程只会比计算超前有限的几只
+        self.assertLess(len(fetched), len(SYMBOLS) * 10)
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            Pipeline(lambda symbol: None, executor='fiber')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from datetime import datetime, timedelta
+from app.scheduler import TradingScheduler, TradingDayCache
+from event_trader.data_source import LiveDataSource
+from event_trader.stocks_manager import StocksManager
+
+
+class FakeClock:
+    """sleep 只推进虚拟时间"""
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+class TestTradingScheduler(unittest.TestCase):
+
+    def scheduler(self, **kwargs):
+        return TradingScheduler(lambda: None, interval_minutes=10, is_open=lambda moment: True, **kwargs)
+
+    def test_next_run_aligns_to_sessions(self):
+        scheduler = self.scheduler()
+        cases = [
+            (datetime(2024, 5, 6, 8, 0), datetime(2024, 5, 6, 9, 30)),
+            (datetime(2024, 5, 6, 9, 31), datetime(2024, 5, 6, 9, 40)),
+            (datetime(2024, 5, 6, 9, 40), datetime(2024, 5, 6, 9, 40)),
+            (datetime(2024, 5, 6, 11, 25), datetime(2024, 5, 6, 11, 30)),
+            (datetime(2024, 5, 6, 11, 31), datetime(2024, 5, 6, 13, 0)),
+            (datetime(2024, 5, 6, 15, 1), datetime(2024, 5, 7, 9, 30)),
+        ]
+        for now, expected in cases:
+            self.assertEqual(scheduler.next_run(now), expected, now)
+
+    def test_run_skips_closed_days(self):
+        runs = []
+        clock = FakeClock(datetime(2024, 5, 3, 14, 45))
+        scheduler = TradingScheduler(lambda: runs.append(clock.now), interval_minutes=10,
+                                     is_open=lambda moment: moment.weekday() < 5, clock=clock, sleep=clock.sleep)
+        scheduler.run(max_cycles=3)
+        # 周五 14:50、15:00 之后跳过周末，周一 9:30 开盘执行
+        self.assertEqual(runs, [datetime(2024, 5, 3, 14, 50), datetime(2024, 5, 3, 15, 0), datetime(2024, 5, 6, 9, 30)])
+
+    def test_job_errors_do_not_stop_scheduler(self):
+        def job():
+            raise RuntimeError('db down')
+        clock = FakeClock(datetime(2024, 5, 6, 9, 30))
+        scheduler = TradingScheduler(job, interval_minutes=10, is_open=lambda moment: True, clock=clock, sleep=clock.sleep)
+        scheduler.run(max_cycles=2)
+        self.assertEqual(scheduler.cycles, 2)
+
+
+class TestTradingDayCache(unittest.TestCase):
+
+    def test_rebuilds_on_new_day(self):
+        clock = FakeClock(datetime(2024, 5, 6, 14, 50))
+        # 与 serve 相同：数据对象的 end_date 取创建时的日期
+        cache = TradingDayCache(lambda index, day: StocksManager(
+            symbols=['600000'], data_source=LiveDataSource(stock_kwargs={'end_date': day})), clock=clock)
+        manager = cache.get('000300')
+        self.assertIs(cache.get('000300'), manager)
+        self.assertEqual(manager.data_source.stock_data('600000').end_date, '2024-05-06')
+
+        clock.sleep(24 * 3600)
+        rebuilt = cache.get('000300')
+        self.assertIsNot(rebuilt, manager)
+        self.assertEqual(rebuilt.data_source.stock_data('600000').end_date, '2024-05-07')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from event_trader.search import GridSearch, RandomSearch, CoarseToFineSearch, SuccessiveHalving, make_search
+from event_trader.strategies import MA2Strategy, PriceDeviationStrategy
+from tests.helpers import SyntheticStockData
+
+
+class CountingSearch:
+    """记录回测的参数组数的包装，逐组回测和整批回测都计入"""
+    def __init__(self, search):
+        self.inner = search
+        self.count = 0
+
+    def search(self, strategy, param_names, axes):
+        evaluate = strategy.evaluate_parameters
+        batch_profits = strategy.batch_profits
+
+        def counted(*args):
+            self.count += 1
+            return evaluate(*args)
+
+        def counted_batch(param_names, combinations, *args):
+            profits = batch_profits(param_names, combinations, *args)
+            if profits is not None:
+                self.count += len(combinations)
+            return profits
+        strategy.evaluate_parameters = counted
+        strategy.batch_profits = counted_batch
+        try:
+            return self.inner.search(strategy, param_names, axes)
+        finally:
+            del strategy.evaluate_parameters
+            del strategy.batch_profits
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stock_data = SyntheticStockData(days=300, seed=5)
+        self.params_range = {'window': (3, 35), 'percent': (2, 20)}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def optimize(self, search):
+        strategy = PriceDeviationStrategy(self.stock_data)
+        strategy.params_path = os.path.join(self.tmp.name, 'pd.csv')
+        strategy.optimize_parameters(params_range=self.params_range, search=search)
+        return strategy
+
+    def test_grid_search_matches_default(self):
+        default = self.optimize(None)
+        grid = self.optimize(GridSearch())
+        self.assertEqual(default.parameters, grid.parameters)
+
+    def test_searches_use_fewer_backtests(self):
+        grid_size = 32 * 18
+        counter = CountingSearch(GridSearch())
+        self.optimize(counter)
+        self.assertEqual(counter.count, grid_size)
+        for search in [RandomSearch(budget=50, seed=1), CoarseToFineSearch(), SuccessiveHalving(seed=1)]:
+            with self.subTest(search=type(search).__name__):
+                counter = CountingSearch(search)
+                strategy = self.optimize(counter)
+                self.assertGreater(counter.count, 0)
+                self.assertLess(counter.count, grid_size)
+                self.assertIn(strategy.parameters['window'], range(3, 35))
+
+    def test_batch_and_row_counts_match(self):
+        # 整批回测的最后一轮与逐组回测计入相同的组数
+        strategy = PriceDeviationStrategy(self.stock_data)
+        strategy.set_search_space(self.params_range)
+        param_names, axes = strategy.parameter_axes()
+        counts = []
+        for vectorized in (True, False):
+            strategy.vectorized = vectorized
+            counter = CountingSearch(SuccessiveHalving(seed=1))
+            counter.search(strategy, param_names, axes)
+            counts.append(counter.count)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_latin_hypercube_covers_each_axis(self):
+        axes = [list(range(10)), list(range(20))]
+        samples = RandomSearch(budget=10, seed=3).sample(axes)
+        self.assertEqual(sorted(s[0] for s in samples), list(range(10)))
+
+    def test_invalid_parameters_are_skipped(self):
+        strategy = MA2Strategy(self.stock_data)
+        strategy.params_path = os.path.join(self.tmp.name, 'ma2.csv')
+        strategy.optimize_parameters(search=CoarseToFineSearch())
+        self.assertLess(strategy.parameters['short_window'], strategy.parameters['long_window'])
+
+    def test_make_search(self):
+        self.assertIsInstance(make_search('random', 20), RandomSearch)
+        self.assertEqual(make_search('halving', 27).candidates, 27)
+        with self.assertRaises(ValueError):
+            make_search('unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
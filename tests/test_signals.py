@@ -0,0 +1,48 @@
+import unittest
+from event_trader.strategies import STRATEGIES
+from tests.helpers import SyntheticStockData
+
+
+class TestVectorizedSignals(unittest.TestCase):
+
+    def run_both(self, strategy_class, stock_data):
+        strategy = strategy_class(stock_data)
+        strategy.calculate_factors()
+        strategy.vectorized = False
+        rows = strategy.calculate_profit()
+        strategy.vectorized = True
+        vectors = strategy.calculate_profit()
+        return rows, vectors
+
+    def test_builtin_strategies_match_row_wise(self):
+        for seed in range(5):
+            for strategy_class in STRATEGIES:
+                with self.subTest(strategy=strategy_class.name, seed=seed):
+                    stock_data = SyntheticStockData(days=400, seed=seed)
+                    rows, vectors = self.run_both(strategy_class, stock_data)
+                    self.assertEqual(rows.transactions, vectors.transactions)
+                    self.assertEqual(rows.get_profit(), vectors.get_profit())
+
+    def test_signals_match_row_wise_per_bar(self):
+        stock_data = SyntheticStockData(days=200, seed=3)
+        for strategy_class in STRATEGIES:
+            with self.subTest(strategy=strategy_class.name):
+                strategy = strategy_class(stock_data)
+                strategy.calculate_factors()
+                buy, sell = strategy.generate_signals()
+                for i, row in strategy.data.iterrows():
+                    self.assertEqual(bool(buy[i]), bool(strategy.buy_signal(row, i)))
+                    self.assertEqual(bool(sell[i]), bool(strategy.sell_signal(row, i)))
+
+    def test_signals_cover_every_bar(self):
+        stock_data = SyntheticStockData(days=120, seed=1)
+        for strategy_class in STRATEGIES:
+            strategy = strategy_class(stock_data)
+            strategy.calculate_factors()
+            buy, sell = strategy.generate_signals()
+            self.assertEqual(len(buy), 120)
+            self.assertEqual(len(sell), 120)
+
+
+if __name__ == '__main__':
+    unittest.main()
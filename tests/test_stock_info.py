@@ -0,0 +1,173 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from unittest import mock
+from event_trader.search import RandomSearch
+from event_trader.stock_info import StockInfo
+from event_trader.stocks_manager import StocksManager
+from event_trader.strategies import BaseStrategy, STRATEGIES
+from tests.helpers import SyntheticStockData
+
+
+class CountingStockData(SyntheticStockData):
+    """记录K线被读取的次数"""
+    reads = 0
+
+    @property
+    def kline(self):
+        self.reads += 1
+        return self._kline
+
+    @kline.setter
+    def kline(self, value):
+        self._kline = value
+
+    def __getitem__(self, key):
+        # StockData 的涨跌幅不经过 kline
+        if key == '涨跌幅':
+            return float(self._kline['涨跌幅'].iloc[-1])
+        return super().__getitem__(key)
+
+
+class TestSinglePassResult(unittest.TestCase):
+
+    def test_last_status_matches_status(self):
+        for seed in range(5):
+            stock = StockInfo('000001', stock_data=SyntheticStockData(days=240, seed=seed))
+            for item in stock.strategies.values():
+                for vectorized in (True, False):
+                    with self.subTest(seed=seed, strategy=item.name, vectorized=vectorized):
+                        item.vectorized = vectorized
+                        item.calculate()
+                        self.assertEqual(item.last_status, item.status())
+
+    def test_factors_computed_once_without_status(self):
+        stock = StockInfo('000001', stock_data=SyntheticStockData(days=240))
+        calls = []
+        for item in stock.strategies.values():
+            original = item.calculate_factors
+            item.calculate_factors = lambda original=original, name=item.name: (calls.append(name), original())[1]
+        with mock.patch.object(BaseStrategy, 'status', side_effect=AssertionError('status re-evaluated')):
+            result = stock.get_result()
+        self.assertEqual(sorted(calls), sorted(cls.name for cls in STRATEGIES))
+        self.assertEqual(list(result['name']), [cls.name for cls in STRATEGIES])
+
+    def test_manager_reuses_stock_info(self):
+        sm = StocksManager(symbols=['000001', '000002'])
+        for seed, symbol in enumerate(sm.symbols):
+            sm.stocks[symbol] = StockInfo(symbol, stock_data=SyntheticStockData(symbol, days=200, seed=seed))
+        stocks = dict(sm.stocks)
+        first = sm.get_result()
+        second = sm.get_result()
+        self.assertEqual(sm.stocks, stocks)
+        self.assertTrue(all(stock.evaluated for stock in stocks.values()))
+        self.assertEqual(sorted(first['profit']), sorted(second['profit']))
+
+
+class TestFactorFrames(unittest.TestCase):
+
+    def test_strategies_have_isolated_factor_frames(self):
+        stock_data = SyntheticStockData(days=200)
+        stock = StockInfo('000001', stock_data=stock_data)
+        stock.get_result()
+        base = list(stock_data.kline.columns)
+        self.assertEqual(base, ['日期', '股票代码', '开盘', '收盘', '最高', '最低', '成交量', '涨跌幅'])
+        for item in stock.strategies.values():
+            # 基础列与原始K线共享内存，因子列只属于该策略
+            self.assertTrue(np.shares_memory(item.data['收盘'].to_numpy(), stock_data.kline['收盘'].to_numpy()))
+        owners = lambda column: sorted(item.name for item in stock.strategies.values() if column in item.data.columns)
+        self.assertEqual(owners('K'), ['kdj'])
+        self.assertEqual(owners('moving_avg'), ['boll', 'ma1', 'pd'])
+        ma1, boll, pd_ = stock.strategies['ma1'], stock.strategies['boll'], stock.strategies['pd']
+        np.testing.assert_array_equal(ma1.data['moving_avg'], ma1.data['收盘'].rolling(ma1.window).mean())
+        np.testing.assert_array_equal(boll.data['moving_avg'], boll.data['收盘'].rolling(boll.parameters['window']).mean())
+        np.testing.assert_array_equal(pd_.data['moving_avg'], pd_.data['收盘'].rolling(pd_.window).mean())
+
+
+class TestConcurrentStrategies(unittest.TestCase):
+
+    def setUp(self):
+        # 寻优会写入 params/ 下的 CSV，在临时目录中运行（子进程继承工作目录）
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def stock(self, **kwargs):
+        return StockInfo('000001', stock_data=SyntheticStockData(days=240, seed=3), **kwargs)
+
+    def assert_same_result(self, result, expected):
+        self.assertEqual(list(result.columns), list(expected.columns))
+        np.testing.assert_equal(result.to_dict('records'), expected.to_dict('records'))
+
+    def test_results_match_sequential(self):
+        stocks = {executor: self.stock(executor=executor, workers=2) for executor in (None, 'thread', 'process')}
+        opt_params = {'search': RandomSearch(budget=6, seed=0)}
+        expected = stocks.pop(None).get_result(optimize=True, opt_params=opt_params)
+        for executor, stock in stocks.items():
+            with self.subTest(executor=executor):
+                result = stock.get_result(optimize=True, opt_params=opt_params)
+                self.assert_same_result(result, expected)
+                for item, status in zip(stock.strategies.values(), expected['status']):
+                    self.assertEqual(item.last_status, status)
+                # 再次计算时复用策略对象，使用已优化的参数
+                self.assert_same_result(stock.get_result(), expected)
+
+    def test_optimize_matches_sequential(self):
+        sequential, process = self.stock(), self.stock(executor='process', workers=2)
+        kwargs = {'search': RandomSearch(budget=6, seed=1)}
+        sequential.optmize(**kwargs)
+        process.optmize(**kwargs)
+        for key, item in sequential.strategies.items():
+            self.assertEqual(process.strategies[key].parameters, item.parameters)
+
+    def test_merge_order_is_deterministic(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            stock = self.stock(executor=executor)
+            first = next(iter(stock.strategies.values()))
+            evaluate = first.evaluate
+            # 第一个策略最后完成，结果仍按策略顺序排列
+            first.evaluate = lambda *args: (time.sleep(0.2), evaluate(*args))[1]
+            result = stock.get_result()
+        self.assertEqual(list(result['name']), list(stock.strategies))
+
+    def test_process_pool_uses_loaded_kline(self):
+        stock_data = CountingStockData(days=240, seed=3)
+        stock = StockInfo('000001', stock_data=stock_data, executor='process', workers=2)
+        reads = stock_data.reads
+        self.assert_same_result(stock.get_result(), self.stock().get_result())
+        self.assertEqual(stock_data.reads, reads)
+
+    def test_manager_shares_pool(self):
+        def manager(**kwargs):
+            sm = StocksManager(symbols=['000001', '000002'], **kwargs)
+            sm.data_source = mock.Mock(stock_data=lambda symbol: SyntheticStockData(symbol, days=200, seed=int(symbol)))
+            return sm
+
+        expected = manager().get_result()
+        with manager(executor='process', workers=2) as sm:
+            first = sm.get_result()
+            second = sm.get_result()
+            pools = {id(stock.executor) for stock in sm.stocks.values()}
+            self.assertEqual(len(pools), 1)
+            self.assertIsInstance(sm.stocks['000001'].executor, ProcessPoolExecutor)
+        self.assertIsNone(sm._pool)
+        for result in (first, second):
+            self.assert_same_result(result.sort_values(['symbol', 'name'], ignore_index=True),
+                                    expected.sort_values(['symbol', 'name'], ignore_index=True))
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            self.stock(executor='fiber')
+        with self.assertRaises(ValueError):
+            StocksManager(symbols=['000001'], executor='fiber')
+
+
+if __name__ == '__main__':
+    unittest.main()
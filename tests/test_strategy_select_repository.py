@@ -0,0 +1,139 @@
+import unittest
+from unittest import mock
+from datetime import datetime, date
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import sessionmaker
+from app.database.models.strategy_select import Base, StrategySelect
+from app.database.repositories.strategy_select_repository import StrategySelectRepository
+from app.database.migrations import migrate
+
+
+def strategy_data(name, status='Buy', price=10.0):
+    return {'index': '000300', 'name': name, 'status': status, 'factors': {'收盘': price}, 'profit': 1.5}
+
+
+class TestStrategySelectRepository(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.repository = StrategySelectRepository(self.db)
+
+    def tearDown(self):
+        self.db.close()
+
+    def rows(self):
+        return {(r.symbol, r.strategy): r for r in self.db.query(StrategySelect).all()}
+
+    def test_bulk_save_matches_row_by_row(self):
+        items = [
+            ('600000', strategy_data('ma1')),
+            ('600000', strategy_data('kdj', 'Sell')),
+            ('600001', strategy_data('ma1')),
+            ('600001', strategy_data('ma1')),
+        ]
+        self.repository.save_strategy_select('600000', strategy_data('ma1'))
+
+        inserted, updated = self.repository.save_strategy_selects(items)
+        self.assertEqual((inserted, updated), (2, 1))
+
+        rows = self.rows()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[('600000', 'ma1')].update_count, 1)
+        self.assertEqual(rows[('600001', 'ma1')].update_count, 1)
+        self.assertEqual(rows[('600000', 'kdj')].action, 'Sell')
+        self.assertEqual(rows[('600000', 'kdj')].price, 10.0)
+        self.assertEqual(rows[('600000', 'kdj')].date, datetime.now().date())
+
+        self.repository.save_strategy_selects(items)
+        self.assertEqual(self.rows()[('600001', 'ma1')].update_count, 3)
+
+    def test_concurrent_writer(self):
+        # 另一个写入方在本次读取已有记录之后插入了同一条记录
+        other = StrategySelectRepository(sessionmaker(bind=self.db.get_bind())())
+        self.repository.find_keys_by_date = lambda day: (other.save_strategy_selects([('600000', strategy_data('ma1'))]), {})[1]
+        self.assertEqual(self.repository.save_strategy_selects([('600000', strategy_data('ma1'))]), (1, 0))
+        other.db.close()
+        rows = self.rows()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[('600000', 'ma1')].update_count, 1)
+
+    def test_mysql_upsert(self):
+        statement = str(StrategySelectRepository.upsert_statement('mysql').compile(dialect=mysql.dialect()))
+        self.assertIn('ON DUPLICATE KEY UPDATE last_trade_time = VALUES(last_trade_time)', statement)
+        self.assertIn('update_count = (strategy_select.update_count + VALUES(update_count) +', statement)
+
+    def test_fallback_without_upsert(self):
+        items = [
+            ('600000', strategy_data('ma1')),
+            ('600000', strategy_data('kdj', 'Sell')),
+            ('600001', strategy_data('ma1')),
+            ('600001', strategy_data('ma1')),
+        ]
+        self.repository.save_strategy_select('600000', strategy_data('ma1'))
+        self.assertIsNone(StrategySelectRepository.upsert_statement('oracle'))
+        commit = mock.Mock(wraps=self.repository.commit)
+        with mock.patch.object(self.db.get_bind().dialect, 'name', 'oracle'), \
+                mock.patch.object(self.repository, 'commit', commit):
+            self.assertEqual(self.repository.save_strategy_selects(items), (2, 1))
+            self.assertEqual(self.repository.save_strategy_selects(items), (0, 3))
+        self.assertEqual(commit.call_count, 2)
+        rows = self.rows()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[('600000', 'ma1')].update_count, 2)
+        self.assertEqual(rows[('600001', 'ma1')].update_count, 3)
+        self.assertEqual(rows[('600000', 'kdj')].action, 'Sell')
+
+    def test_empty_batch(self):
+        self.assertEqual(self.repository.save_strategy_selects([]), (0, 0))
+
+    def test_unique_key(self):
+        self.repository.save_strategy_select('600000', strategy_data('ma1'))
+        record = StrategySelect(**self.repository.build_record('600000', strategy_data('ma1'), datetime.now().date(), datetime.now()))
+        self.db.add(record)
+        with self.assertRaises(IntegrityError):
+            self.db.commit()
+
+
+class TestMigration(unittest.TestCase):
+
+    OLD_SCHEMA = (
+        "CREATE TABLE strategy_select (id INTEGER PRIMARY KEY AUTOINCREMENT, date DATE NOT NULL, "
+        "symbol VARCHAR(20) NOT NULL, idx VARCHAR(20), strategy VARCHAR(50) NOT NULL, "
+        "action VARCHAR(4) NOT NULL, price FLOAT NOT NULL, last_trade_time DATETIME, "
+        "update_count INTEGER DEFAULT 0, strategy_info JSON, remark VARCHAR(255))"
+    )
+
+    def test_migrate_existing_database(self):
+        engine = create_engine('sqlite://')
+        with engine.begin() as conn:
+            conn.execute(text(self.OLD_SCHEMA))
+            for symbol, count, moment in [
+                ('600000', 0, '2024-01-02 10:00:00.000000'),
+                ('600000', 2, '2024-01-02 14:00:00.000000'),
+                ('600001', 0, '2024-01-02 10:00:00.000000'),
+            ]:
+                conn.execute(text(
+                    "INSERT INTO strategy_select (date, symbol, strategy, action, price, last_trade_time, update_count) "
+                    "VALUES ('2024-01-02', :symbol, 'ma1', 'Buy', 10.0, :moment, :count)"
+                ), {'symbol': symbol, 'count': count, 'moment': moment})
+
+        created = migrate(engine)
+        self.assertEqual(set(created), {'uq_strategy_select_date_symbol_strategy', 'ix_strategy_select_date_action'})
+        self.assertEqual(migrate(engine), [])
+        indexes = {index['name']: index for index in inspect(engine).get_indexes('strategy_select')}
+        self.assertTrue(indexes['uq_strategy_select_date_symbol_strategy']['unique'])
+
+        with sessionmaker(bind=engine)() as db:
+            rows = {r.symbol: r for r in db.query(StrategySelect).all()}
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(rows['600000'].update_count, 3)
+            self.assertEqual(rows['600000'].last_trade_time, datetime(2024, 1, 2, 14))
+            self.assertEqual(rows['600000'].date, date(2024, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from event_trader.config import PRICE_COL
+from event_trader.demo_account import simulate_profits
+from event_trader.stock_info import StockInfo
+from event_trader.strategies import BollStrategy, MA1Strategy, PriceDeviationStrategy
+from event_trader.walk_forward import WalkForward
+from tests.helpers import SyntheticStockData
+
+RANGES = {
+    PriceDeviationStrategy: {'window': (3, 15), 'percent': (2, 10)},
+    MA1Strategy: {'window': (5, 30)},
+    BollStrategy: {'window': (5, 20), 'std': (1, 3)},
+}
+
+
+def reference(strategy, params_range, windows):
+    """逐组参数在完整历史上计算信号，再逐个窗口回测"""
+    strategy.set_search_space(params_range)
+    param_names, combinations = strategy.parameter_grid()
+    prices = strategy.data[PRICE_COL].to_numpy()
+    signals = []
+    for combination in combinations:
+        if strategy.set_parameters(param_names, combination):
+            strategy.calculate_factors()
+            signals.append((strategy.parameters.copy(), *strategy.generate_signals()))
+    fits = []
+    for start, train_end, test_end in windows:
+        train = [simulate_profits(prices[start:train_end], buy[None, start:train_end], sell[None, start:train_end])[0]
+                 for _, buy, sell in signals]
+        parameters, buy, sell = signals[int(np.argmax(train))]
+        test = simulate_profits(prices[train_end:test_end], buy[None, train_end:test_end], sell[None, train_end:test_end])[0]
+        fits.append((parameters, max(train), test))
+    return fits
+
+
+class TestWindows(unittest.TestCase):
+
+    def test_rolling_windows(self):
+        self.assertEqual(WalkForward(train=100, test=40).windows(300),
+                         [(0, 100, 140), (40, 140, 180), (80, 180, 220), (120, 220, 260), (160, 260, 300)])
+        # 最后一个测试窗口较短
+        self.assertEqual(WalkForward(train=100, test=40).windows(230)[-1], (120, 220, 230))
+        self.assertEqual(WalkForward(train=100, test=40).windows(100), [])
+
+    def test_step_and_anchored(self):
+        self.assertEqual(WalkForward(train=100, test=40, step=20).windows(180),
+                         [(0, 100, 140), (20, 120, 160), (40, 140, 180), (60, 160, 180)])
+        self.assertEqual(WalkForward(train=100, test=50, anchored=True).windows(250),
+                         [(0, 100, 150), (0, 150, 200), (0, 200, 250)])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            WalkForward(executor='process')
+        with ProcessPoolExecutor(max_workers=1) as executor, self.assertRaises(ValueError):
+            WalkForward(executor=executor)
+        with self.assertRaises(ValueError):
+            WalkForward(test=0)
+        with self.assertRaises(ValueError):
+            WalkForward(train=400).run(PriceDeviationStrategy(SyntheticStockData(days=300)))
+
+
+class TestWalkForward(unittest.TestCase):
+
+    def setUp(self):
+        self.stock_data = SyntheticStockData(days=300, seed=7)
+
+    def test_matches_per_window_reference(self):
+        walk = WalkForward(train=100, test=40, batch_size=16)
+        for strategy_class, params_range in RANGES.items():
+            with self.subTest(strategy=strategy_class.name):
+                strategy = strategy_class(self.stock_data)
+                parameters = strategy.parameters.copy()
+                space = strategy.params_range, strategy.params_step
+                result = walk.run(strategy, params_range)
+                self.assertEqual(strategy.parameters, parameters)
+                self.assertEqual((strategy.params_range, strategy.params_step), space)
+                expected = reference(strategy_class(self.stock_data), params_range, walk.windows(300))
+                self.assertEqual(list(result['parameters']), [fit[0] for fit in expected])
+                np.testing.assert_allclose(result['train_profit'], [fit[1] for fit in expected])
+                np.testing.assert_allclose(result['test_profit'], [fit[2] for fit in expected])
+
+    def test_dates(self):
+        result = WalkForward(train=100, test=40).run(PriceDeviationStrategy(self.stock_data), RANGES[PriceDeviationStrategy])
+        dates = self.stock_data.kline['日期']
+        self.assertEqual(list(result['train_start']), list(dates[[0, 40, 80, 120, 160]]))
+        self.assertEqual(list(result['test_start']), list(dates[[100, 140, 180, 220, 260]]))
+        self.assertEqual(result['test_end'].iloc[-1], dates.iloc[-1])
+
+    def test_signals_are_shared_across_windows(self):
+        for test in (100, 20):
+            strategy = PriceDeviationStrategy(self.stock_data)
+            calls = []
+            signal_matrix = strategy.signal_matrix
+            strategy.signal_matrix = lambda names, combinations: calls.append(len(combinations)) or signal_matrix(names, combinations)
+            result = WalkForward(train=100, test=test).run(strategy, RANGES[PriceDeviationStrategy])
+            self.assertEqual(len(result), 200 // test)
+            self.assertEqual(calls, [12 * 8])
+
+    def test_executors_match_sequential(self):
+        params_range = RANGES[PriceDeviationStrategy]
+        # 每批 16 组参数，回测与下一批信号的生成交替进行
+        expected = WalkForward(train=100, test=40, batch_size=16).run(PriceDeviationStrategy(self.stock_data), params_range)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for executor in ('thread', pool):
+                with self.subTest(executor=executor):
+                    result = WalkForward(train=100, test=40, executor=executor, workers=2, batch_size=16).run(
+                        PriceDeviationStrategy(self.stock_data), params_range)
+                    self.assertEqual(list(result['parameters']), list(expected['parameters']))
+                    np.testing.assert_allclose(result['test_profit'], expected['test_profit'])
+
+    def test_row_replay_fallback(self):
+        strategy = PriceDeviationStrategy(self.stock_data)
+        strategy.vectorized = False
+        parameters = strategy.parameters.copy()
+        result = WalkForward(train=100, test=40).run(strategy, {'window': (3, 6), 'percent': (2, 5)})
+        self.assertEqual(strategy.parameters, parameters)
+        self.assertEqual(len(result), 5)
+        self.assertTrue(np.isfinite(result['test_profit']).all())
+        for found in result['parameters']:
+            self.assertIn(found['window'], range(3, 6))
+            self.assertIn(found['percent'], range(2, 5))
+
+    def test_row_replay_warms_up_test_window(self):
+        # 只有一组参数时两种方式选出的参数相同；测试窗口的均线由训练窗口预热，样本外利润应与向量化结果一致
+        params_range = {'window': (20, 21), 'percent': (3, 4)}
+        expected = WalkForward(train=100, test=40).run(PriceDeviationStrategy(self.stock_data), params_range)
+        strategy = PriceDeviationStrategy(self.stock_data)
+        strategy.vectorized = False
+        result = WalkForward(train=100, test=40).run(strategy, params_range)
+        self.assertTrue((expected['test_profit'] != 0).any())
+        np.testing.assert_allclose(result['test_profit'], expected['test_profit'])
+
+    def test_stock_info(self):
+        stock = StockInfo('000001', stock_data=self.stock_data, strategies=[PriceDeviationStrategy, MA1Strategy])
+        result = stock.walk_forward(train=150, test=50, params_range={'window': (5, 10)})
+        self.assertEqual(list(result['name']), ['pd'] * 3 + ['ma1'] * 3)
+        compounded = WalkForward.compounded(result[result['name'] == 'pd'])
+        profits = result.loc[result['name'] == 'pd', 'test_profit'] / 100
+        self.assertAlmostEqual(compounded, (np.prod(1 + profits) - 1) * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
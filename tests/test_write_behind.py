@@ -0,0 +1,78 @@
+import queue
+import threading
+import time
+import unittest
+from app.write_behind import WriteBehindQueue
+
+
+class SlowWriter:
+    """记录每个批次，可以用 release 控制写入何时完成"""
+    def __init__(self, blocked=False):
+        self.batches = []
+        self.release = threading.Event()
+        if not blocked:
+            self.release.set()
+
+    def __call__(self, batch):
+        self.release.wait()
+        self.batches.append(list(batch))
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+
+    def test_batches_by_size_and_flushes_on_close(self):
+        writer = SlowWriter()
+        with WriteBehindQueue(writer, max_batch=10, max_delay=60) as wb:
+            wb.put_many(range(25))
+        self.assertEqual([len(b) for b in writer.batches], [10, 10, 5])
+        self.assertEqual(sum(writer.batches, []), list(range(25)))
+        self.assertEqual((wb.written, wb.batches), (25, 3))
+
+    def test_batches_by_time(self):
+        writer = SlowWriter()
+        with WriteBehindQueue(writer, max_batch=100, max_delay=0.05) as wb:
+            wb.put(1)
+            wb.join()
+            self.assertEqual(writer.batches, [[1]])
+            wb.put(2)
+        self.assertEqual(writer.batches, [[1], [2]])
+
+    def test_producer_does_not_wait_for_slow_writes(self):
+        writer = SlowWriter(blocked=True)
+        wb = WriteBehindQueue(writer, max_batch=5, max_delay=0.01)
+        start = time.perf_counter()
+        wb.put_many(range(50))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        writer.release.set()
+        wb.close()
+        self.assertEqual(sum(writer.batches, []), list(range(50)))
+
+    def test_backpressure_when_queue_full(self):
+        writer = SlowWriter(blocked=True)
+        wb = WriteBehindQueue(writer, max_batch=1, max_delay=0, maxsize=2)
+        wb.put_many(range(3))  # 一条正在写入，两条在队列中
+        with self.assertRaises(queue.Full):
+            wb.put(3, timeout=0.05)
+        writer.release.set()
+        wb.put(3, timeout=5)
+        wb.close()
+        self.assertEqual(sum(writer.batches, []), [0, 1, 2, 3])
+        with self.assertRaises(RuntimeError):
+            wb.put(4)
+
+    def test_write_errors_do_not_stop_writer(self):
+        calls = []
+
+        def write(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise IOError('database is down')
+
+        with WriteBehindQueue(write, max_batch=1, max_delay=0) as wb:
+            wb.put_many([1, 2])
+        self.assertEqual(calls, [[1], [2]])
+        self.assertEqual((wb.errors, wb.written), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()